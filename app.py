@@ -1,7 +1,59 @@
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import plotly.graph_objects as go
-import yfinance as yf
+
+import perf
+from charts import (
+    comparison_figure,
+    correlation_figure,
+    distribution_yield_figure,
+    drawdown_figure,
+    entry_outcomes_figure,
+    erosion_figure,
+    portfolio_figure,
+    projection_figure,
+    single_asset_figure,
+)
+from engine import (
+    EMPTY_META,
+    HISTORY_URL,
+    HOLDING_PERIODS,
+    MASTER_URL,
+    PROJECTION_POOL_MIN_PATHS,
+    REBALANCE_FREQUENCIES,
+    AssetSeries,
+    build_overlay_frames,
+    calculate_journeys,
+    align_pay_dates,
+    entry_date_outcomes,
+    entry_prices,
+    index_metadata,
+    index_pay_frequencies,
+    index_pay_sheet,
+    index_underlyings,
+    load_asset_frames,
+    load_base_sheets as read_base_sheets,
+    project_unit_paths,
+    projection_pool,
+    risk_panel,
+    scale_journey,
+    simulate_portfolio,
+    slice_window,
+)
+from export import FORMATS, export_windows, iter_results, write_results
+from fetch_scheduler import FetchError
+from price_store import PriceStore
+from sheet_cache import SheetCache
+from screener import METRICS, WINDOWS, SNAPSHOT_PATH, ScreenerJob, read_snapshot, snapshot_age
+from warmer import CacheWarmer
 
 # --- 1. PAGE CONFIGURATION (MUST BE FIRST) ---
 st.set_page_config(
@@ -13,32 +65,374 @@ st.set_page_config(
 # ==========================================
 # 🔧 GLOBAL HELPER FUNCTIONS
 # ==========================================
-@st.cache_data(ttl=3600)
-def fetch_overlay_data(ticker, start_date, end_date):
-    """Fetches historical data for underlying assets using yfinance."""
+FETCH_WORKERS = 8  # concurrent Yahoo requests per rerun
+
+@st.cache_resource
+def get_sheet_cache():
+    """Disk snapshots of the master/history sheets, revalidated in the background."""
+    return SheetCache(required_columns={MASTER_URL: ['Ticker']})
+
+@st.cache_resource
+def get_price_store():
+    """One on-disk price store per process; the SQLite file itself is shared host-wide."""
+    return PriceStore()
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def fetch_overlay_series(ticker):
+    """Full history of an underlying asset as a shared, read-only `AssetSeries` (None if there is none).
+
+    A `FetchError` propagates instead, so the failure is not cached and the next rerun asks again.
+    """
+    perf.record_miss("fetch_overlay_data", ticker)
+    if not get_price_store().is_fresh(ticker):
+        get_cache_warmer().record_cold_load(ticker)
     try:
-        ticker_obj = yf.Ticker(ticker)
-        hist = ticker_obj.history(
-            start=start_date,
-            end=end_date + pd.Timedelta(days=1),
-            actions=True,
-            auto_adjust=False
-        )
-        if hist.empty:
-            return None, None
-        df_u = hist.reset_index()[['Date', 'Close']].rename(columns={'Close': 'Closing Price'})
-        df_u['Date'] = pd.to_datetime(df_u['Date']).dt.tz_localize(None)
-        df_u['Ticker'] = ticker
-        divs = hist[hist['Dividends'] > 0]['Dividends'].reset_index()
-        if not divs.empty:
-            df_h = divs.rename(columns={'Date': 'Date of Pay', 'Dividends': 'Amount'})
-            df_h['Date of Pay'] = pd.to_datetime(df_h['Date of Pay']).dt.tz_localize(None)
-            df_h['Ticker'] = ticker
-        else:
-            df_h = pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])
-        return df_u, df_h
+        df_u, df_h = build_overlay_frames(ticker, get_price_store().load(ticker))
+    except FetchError:
+        raise
     except Exception:
-        return None, None
+        return None
+    return None if df_u is None else AssetSeries.from_frames(ticker, df_u, df_h)
+
+def fetch_overlay_data(ticker):
+    """Fetches the full history of an underlying asset from the local price store.
+
+    Cached per ticker only; callers cut their date window with `slice_window`.
+    Raises `FetchError` when Yahoo could not be reached, as opposed to having no data.
+    """
+    get_cache_warmer().record_request(ticker)
+    series = fetch_overlay_series(ticker)
+    return (None, None) if series is None else series.frames()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_pay_date_report(_df_h_sheet, sheet_version):
+    """Sheet pay dates no stored ex-date claimed, across every ticker in the price store.
+
+    Keyed on the pay sheet's snapshot version, so a sheet refresh rebuilds it.
+    """
+    perf.record_miss("load_pay_date_report")
+    _, unmatched = align_pay_dates(get_price_store().dividends(), _df_h_sheet)
+    return unmatched
+
+def data_fingerprint(prices, history):
+    """Per ticker: (last date, rows) of the prices and (last pay date, rows, total paid) of the payouts.
+
+    A refresh that adds a bar or a sheet change that adds or restates a payout
+    changes it, so caches over frames key on it in place of the frames.
+    """
+    key = tuple(prices.groupby('Ticker', observed=True)['Date'].agg(['max', 'size']).itertuples(name=None))
+    if not history.empty:
+        payouts = history.groupby('Ticker', observed=True).agg(last=('Date of Pay', 'max'), rows=('Amount', 'size'), paid=('Amount', 'sum'))
+        key += tuple(payouts.itertuples(name=None))
+    return key
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def project_asset(_price_df, _hist_df, ticker, horizon_days, use_drip, n_paths, data_version):
+    """Monte Carlo fan per $1 held today; keyed on the ticker and `data_fingerprint` of its frames."""
+    perf.record_miss("project_asset", ticker)
+    pool = get_projection_pool() if n_paths >= PROJECTION_POOL_MIN_PATHS else None
+    return project_unit_paths(_price_df, _hist_df, horizon_days, use_drip, n_paths, pool=pool)
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=256)
+def load_unit_journeys(_unified_df, _history_df, source, tickers, start, end, use_drip, data_version):
+    """One-share journeys memoized on (tickers, start, end, DRIP) and the data they were computed from.
+
+    `source` ("fund" or "underlying") tells apart the two frame builders for a ticker;
+    `data_version` is the frames' `data_fingerprint` plus the pay sheet's snapshot version.
+    """
+    perf.record_miss("unit_journeys", source)
+    return calculate_journeys(list(tickers), start, end, 1.0, use_drip, _unified_df, _history_df)
+
+def memo_journeys(unified_df, history_df, source, tickers, start, end, shares, use_drip):
+    """`calculate_journeys`, rescaled from the memoized one-share run.
+
+    Rescaling (see `scale_journey`) makes a new dollar amount or share count
+    cost a multiply instead of a re-simulation. Windows are keyed by calendar day,
+    and only tickers present in `unified_df` count toward the key, so a ticker
+    whose fetch failed is simulated once it loads instead of staying cached out.
+    """
+    present = set(unified_df['Ticker'].unique())
+    tickers = tuple(t for t in tickers if t in present)
+    data_version = (data_fingerprint(unified_df, history_df), get_sheet_cache().version([HISTORY_URL]))
+    units = load_unit_journeys(unified_df, history_df, source, tickers, start.normalize(), end.normalize(), use_drip, data_version)
+    return {t: scale_journey(j, shares[t] if isinstance(shares, dict) else shares) for t, j in units.items()}
+
+def traced_fragment(fn):
+    """`st.fragment` whose own reruns (a widget inside it changed) get a perf trace of their own."""
+    @st.fragment
+    @wraps(fn)
+    def run(*args, **kwargs):
+        ctx = get_script_run_ctx()
+        if ctx is None or not ctx.fragment_ids_this_run:
+            return fn(*args, **kwargs)
+        trace = perf.start_rerun(fragment=fn.__name__)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            trace.finish()
+    return run
+
+@st.cache_resource
+def get_projection_pool():
+    """One set of projection worker processes per server, started on the first large run (None on one core)."""
+    return projection_pool() if (os.cpu_count() or 1) > 1 else None
+
+@st.cache_resource
+def get_cache_warmer():
+    """Keeps popular tickers, their underlyings and related picks fresh in the price store."""
+    return CacheWarmer(get_price_store())
+
+def record_selection(tickers):
+    """Counts newly selected tickers as demand and queues their related tickers for prefetch.
+
+    Only changes to the selection count, so widget reruns on the same ticker don't inflate demand.
+    """
+    warmer = get_cache_warmer()
+    previous = st.session_state.get("_selected_tickers", [])
+    new = [t for t in tickers if t not in previous]
+    for t in new:
+        warmer.record_demand(t)
+    if new:
+        warmer.prefetch([r for t in new for r in warmer.related(t) if r not in tickers])
+    st.session_state["_selected_tickers"] = list(tickers)
+
+@st.cache_resource
+def get_screener_job():
+    return ScreenerJob()
+
+@st.cache_data(show_spinner=False)
+def load_screener_snapshot(snapshot_mtime):
+    """Reads the screener snapshot; keyed on its mtime so a rebuild invalidates it."""
+    perf.record_miss("load_screener_snapshot")
+    return read_snapshot()
+
+def fetch_failed_message(tickers, error):
+    """User-facing text for a `FetchError`, distinct from the "no data" messages."""
+    if error.throttled:
+        return f"Yahoo Finance is rate-limiting requests right now, so {', '.join(tickers)} could not be loaded. Try again in a minute."
+    return f"Could not reach Yahoo Finance for {', '.join(tickers)} ({error.__cause__ or error}). Try again shortly."
+
+def warn_fetch_errors(errors, name=lambda key: key, note=""):
+    """One `st.warning` per kind of failure in a `fetch_concurrently` errors dict. Returns the failed names."""
+    unreachable = {name(key): e for key, e in errors.items() if isinstance(e, FetchError)}
+    broken = {name(key): e for key, e in errors.items() if not isinstance(e, FetchError)}
+    if unreachable:
+        st.warning(fetch_failed_message(list(unreachable), next(iter(unreachable.values()))) + note)
+    if broken:
+        st.warning(f"Could not load {', '.join(broken)} ({next(iter(broken.values()))}).{note}")
+    return set(unreachable) | set(broken)
+
+def fetch_concurrently(tasks, max_workers=FETCH_WORKERS, errors=None):
+    """Runs {key: zero-arg callable} on a bounded thread pool and returns {key: result}.
+
+    Failures are isolated per key: a key whose callable raised maps to None
+    (callers drop those before unpacking results) and its exception goes into
+    the `errors` dict when one is passed, for `warn_fetch_errors`. Workers inherit the script
+    context so cached fetchers fill the same per-ticker cache entries as a direct call,
+    and a copy of the caller's context variables so cache misses reach the perf trace.
+    """
+    pool_size = max(1, min(max_workers, len(tasks)))
+    ctx = get_script_run_ctx()
+
+    def run(fn):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        futures = {key: pool.submit(contextvars.copy_context().run, run, fn) for key, fn in tasks.items()}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = None
+                if errors is not None:
+                    errors[key] = e
+    return results
+
+# ==========================================
+# 🧩 INDEPENDENT SECTIONS (FRAGMENTS)
+# ==========================================
+# Widgets that only change one section live inside it, so touching them reruns
+# that section alone instead of the whole dashboard.
+
+@traced_fragment
+def render_single_chart(journey, initial_cap, total_pl, use_drip, overlay_underlying, und, und_journey, und_start_price):
+    overlay = None
+    if overlay_underlying and not und_journey.empty and und_start_price > 0:
+        # The unit journey scaled to the same capital (see `scale_journey`)
+        overlay = (und, und_journey['Date'], und_journey['True_Value'] * (initial_cap / und_start_price))
+    with perf.phase("build_figure"):
+        fig = single_asset_figure(journey, initial_cap, total_pl, use_drip, overlay)
+    with perf.phase("plotly_chart") as rec:
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        rec["rows"] = sum(len(tr.x) for tr in fig.data if tr.x is not None)
+    
+    st.markdown('<div style="background-color: #161b22; border: 1px solid #30363d; border-radius: 8px; padding: 5px 8px; text-align: center;"><span style="color: #00C805; font-weight: 800;">💚 True Value (Total Equity)</span> &nbsp;&nbsp; <span style="color: #8AC7DE; font-weight: 800;">🔵 Price Appreciation</span> &nbsp;&nbsp; <span style="color: #FF4B4B; font-weight: 800;">🔴 Price Erosion</span></div>', unsafe_allow_html=True)
+
+@traced_fragment
+def render_projection(ticker, price_df, hist_df, journey, use_drip, initial_cap):
+    c1, c2 = st.columns(2)
+    projection_years = c1.slider("Projection Horizon (Years)", 1, 10, 5)
+    n_paths = c2.selectbox("Simulated Paths", [1000, 10000, 50000], index=1, format_func=lambda n: f"{n:,}")
+    with perf.phase("project_asset", cache_keys=[("project_asset", ticker)], ticker=ticker, paths=n_paths) as rec:
+        unit_fan = project_asset(price_df, hist_df, ticker, projection_years * 252, use_drip, n_paths, data_fingerprint(price_df, hist_df))
+        rec["rows"] = len(unit_fan)
+    if unit_fan.empty:
+        st.warning("Not enough history to project this asset.")
+        return
+    
+    # The fan is per $1 of position today; cash already pocketed rides along unchanged
+    end = journey.iloc[-1]
+    fan = unit_fan.copy()
+    fan[fan.filter(like='Value').columns] = fan.filter(like='Value') * end['Market_Value'] + end['Cash_Pocketed']
+    fan[fan.filter(like='Income').columns] = fan.filter(like='Income') * end['Market_Value']
+    last = fan.iloc[-1]
+    st.markdown(f"### 🔮 {projection_years}-Year Projection ({n_paths:,} bootstrap paths)")
+    p1, p2, p3, p4, p5 = st.columns(5)
+    p1.metric("Today's Value", f"${end['True_Value']:,.2f}")
+    p2.metric("Pessimistic (5th pct)", f"${last['Value p5']:,.2f}", f"{(last['Value p5'] / initial_cap - 1) * 100:+.2f}%")
+    p3.metric("Median Income" if not use_drip else "Median Reinvested", f"${last['Income p50']:,.2f}")
+    p4.metric("Optimistic (95th pct)", f"${last['Value p95']:,.2f}", f"{(last['Value p95'] / initial_cap - 1) * 100:+.2f}%")
+    p5.metric("Median Value", f"${last['Value p50']:,.2f}", f"{(last['Value p50'] / initial_cap - 1) * 100:+.2f}%")
+    fig_proj = projection_figure(journey, fan)
+    st.plotly_chart(fig_proj, use_container_width=True, config={'displayModeBar': False})
+    st.caption(f"Resamples {ticker}'s own daily returns and distributions in one-month blocks. Past behaviour, not a forecast.")
+
+@traced_fragment
+def render_entry_chart(outcomes):
+    outcome_metric = st.radio("Chart", ["Total Return %", "Cash Yield %", "Price Return %"], horizontal=True, label_visibility="collapsed")
+    with perf.phase("build_figure"):
+        fig_entry = entry_outcomes_figure(outcomes, outcome_metric)
+    with perf.phase("plotly_chart") as rec:
+        st.plotly_chart(fig_entry, use_container_width=True, config={'displayModeBar': False})
+        rec["rows"] = sum(len(tr.x) for tr in fig_entry.data if tr.x is not None)
+
+@traced_fragment
+def render_screener_table(table, age):
+    c1, c2 = st.columns([2, 1])
+    screen_window = c1.radio("Window", list(WINDOWS), index=3, horizontal=True)
+    rank_by = c2.selectbox("Rank By", METRICS)
+    view = table[table['Window'] == screen_window].sort_values(rank_by, ascending=False)
+    st.caption(f"{len(view)} funds ranked by {rank_by} · snapshot refreshed {age / 60:.0f} min ago")
+    st.dataframe(
+        view,
+        column_order=["Ticker", "Total Return %", "Cash Yield %", "NAV Erosion %", "DRIP vs Cash Spread", "Start", "End"],
+        column_config={
+            "Total Return %": st.column_config.NumberColumn(format="%+.2f%%"),
+            "Cash Yield %": st.column_config.NumberColumn(format="%.2f%%"),
+            "NAV Erosion %": st.column_config.NumberColumn(format="%+.2f%%"),
+            "DRIP vs Cash Spread": st.column_config.NumberColumn(format="%+.2f pp"),
+            "Start": st.column_config.DateColumn(),
+            "End": st.column_config.DateColumn(),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+
+@traced_fragment
+def render_distribution_health(distributions, start, end):
+    head, scope = st.columns([4, 1])
+    head.markdown("### 💸 Distribution Health")
+    if distributions is None or len(distributions) == 0:
+        st.caption("No distributions on record for this asset.")
+        return
+    if scope.toggle("Full History", value=False, help="Show every payout on record instead of the simulation window."):
+        start, end = distributions.dates[0], distributions.dates[-1]
+    # Every series below is a prefix-sum lookup into the precomputed index
+    with perf.phase("distribution_index") as rec:
+        rolling = distributions.rolling_yield(start, end)
+        erosion = distributions.erosion(start, end)
+        events = distributions.events(start, end)
+        rec["rows"] = len(rolling)
+    if rolling.empty:
+        st.caption("No prices in this window.")
+        return
+    
+    ttm = rolling['TTM Yield %'].iloc[-1]
+    ttm_start = rolling['TTM Yield %'].dropna()
+    last = events.iloc[-1] if not events.empty else None
+    streak = 0 if last is None else int(last['Streak'])
+    net = erosion.iloc[-1]
+    d1, d2, d3, d4, d5 = st.columns(5)
+    d1.metric("TTM Yield", "N/A (< 1 Year)" if pd.isna(ttm) else f"{ttm:.2f}%", None if pd.isna(ttm) or ttm_start.empty else f"{ttm - ttm_start.iloc[0]:+.2f} pp in window")
+    d2.metric("Payout Frequency", distributions.frequency, f"{len(events)} payouts in window", delta_color="off")
+    d3.metric("Last Payout", "-" if last is None else f"${last['Amount']:,.4f}", None if last is None or pd.isna(last['Change %']) else f"{last['Change %']:+.2f}%")
+    d4.metric("Raise / Cut Streak", f"{streak} raise{'s' if streak > 1 else ''}" if streak > 0 else f"{-streak} cut{'s' if streak < -1 else ''}" if streak < 0 else "Flat")
+    d5.metric("Paid vs Price Change", f"{net['Distributions %']:.1f}% vs {net['Price Return %']:+.1f}%", f"{net['Total Return %']:+.2f}% net")
+    
+    c1, c2 = st.columns(2)
+    with c1:
+        st.plotly_chart(distribution_yield_figure(rolling, events), use_container_width=True, config={'displayModeBar': False})
+    with c2:
+        st.plotly_chart(erosion_figure(erosion), use_container_width=True, config={'displayModeBar': False})
+    if net['Price Return %'] < 0 and -net['Price Return %'] > net['Distributions %']:
+        st.warning("NAV erosion has outrun the distributions over this window: the price lost more than the payouts returned.")
+    with st.expander("🗓️ Payout History"):
+        st.dataframe(
+            events.sort_values('Date of Pay', ascending=False),
+            column_config={
+                "Date of Pay": st.column_config.DateColumn(),
+                "Amount": st.column_config.NumberColumn(format="$%.4f"),
+                "Change %": st.column_config.NumberColumn(format="%+.2f%%"),
+                "Price at Payout": st.column_config.NumberColumn(format="$%.2f"),
+                "Yield at Payout %": st.column_config.NumberColumn(format="%.2f%%"),
+                "TTM Amount": st.column_config.NumberColumn(format="$%.4f"),
+                "TTM Yield %": st.column_config.NumberColumn(format="%.2f%%"),
+            },
+            hide_index=True, use_container_width=True,
+        )
+
+@traced_fragment
+def render_risk_panel(journeys, styles):
+    head, rate = st.columns([4, 1])
+    head.markdown("### 🛡️ Risk Panel")
+    risk_free = rate.number_input("Risk-Free Rate (%)", value=4.0, step=0.25, help="Annual rate Sharpe and Sortino are measured against.")
+    with perf.phase("risk_panel", tickers=len(journeys)) as rec:
+        metrics, correlation, drawdowns = risk_panel(journeys, risk_free / 100)
+        rec["rows"] = drawdowns.size
+    st.dataframe(
+        metrics.sort_values("Sharpe", ascending=False),
+        column_config={
+            "Max Drawdown %": st.column_config.NumberColumn(format="%.2f%%"),
+            "Recovery Days": st.column_config.NumberColumn(format="%d", help="Calendar days from the deepest trough back to the prior peak; blank if not recovered yet."),
+            "Volatility %": st.column_config.NumberColumn(format="%.2f%%"),
+            "Sharpe": st.column_config.NumberColumn(format="%.2f"),
+            "Sortino": st.column_config.NumberColumn(format="%.2f"),
+            "Yield on Cost %": st.column_config.NumberColumn(format="%.2f%%", help="Annualized distributions (cash or reinvested) over the starting value."),
+            "YoC Drift": st.column_config.NumberColumn(format="%+.2f pp", help="Yield on cost in the second half of the window minus the first half."),
+        },
+        use_container_width=True,
+    )
+    c1, c2 = st.columns([3, 2])
+    with c1, perf.phase("plotly_chart") as rec:
+        fig_dd = drawdown_figure(drawdowns, styles)
+        st.plotly_chart(fig_dd, use_container_width=True, config={'displayModeBar': False})
+        rec["rows"] = sum(len(tr.x) for tr in fig_dd.data if tr.x is not None)
+    with c2:
+        st.plotly_chart(correlation_figure(correlation), use_container_width=True, config={'displayModeBar': False})
+    st.caption("Correlations use daily total returns on the days every asset traded.")
+
+@traced_fragment
+def render_export(tickers, load_asset):
+    with st.expander(f"📦 Bulk Export ({len(tickers)} funds × every window × cash and DRIP)"):
+        c1, c2 = st.columns(2)
+        fmt = c1.radio("Format", list(FORMATS), format_func=str.upper, horizontal=True)
+        amount = c2.number_input("Investment per Fund ($)", value=10000, step=1000)
+        as_of = pd.Timestamp('today').normalize()
+
+        def build_export():
+            # Runs on click, off the script thread; rows go to a temp file ticker by ticker
+            out = tempfile.TemporaryFile()
+            write_results(iter_results(tickers, load_asset, export_windows(as_of), [False, True], amount), out, fmt)
+            out.seek(0)
+            return out
+
+        st.download_button(
+            f"⬇️ Download {fmt.upper()}", build_export, file_name=f"high-yield-export-{as_of.date()}.{fmt}",
+            mime=FORMATS[fmt], on_click="ignore", use_container_width=True,
+        )
+        st.caption("Built when you click from the prices already stored, so it never waits on Yahoo; a large universe can take a minute. For scheduled exports run `batch.py` with `--out`.")
 
 # ==========================================
 # 🚀 MAIN APP LOGIC
@@ -116,177 +510,93 @@ def authenticated_dashboard():
     """, unsafe_allow_html=True)
     
     # --- PHASE 1: LOAD ONLY THE MENUS (INSTANT) ---
-    @st.cache_data(ttl=3600)
-    def load_base_sheets():
+    # Keyed on the snapshot mtimes: a background refresh that changed a sheet invalidates it.
+    # Shared rather than pickled per hit, so every rerun gets the same parsed objects; treat them as read-only.
+    @st.cache_resource(show_spinner=False, max_entries=2)
+    def load_base_sheets(master_path, history_path, sheet_version):
+        perf.record_miss("load_base_sheets")
         try:
-            h_url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQe4koGj386xkUGn3XXhysM-54_DIbYawunKX49C2Kt6KH9i097JDNnhbKQpRVn7WH05noFpgY3p1_e/pub?gid=970184313&single=true&output=csv"
-            m_url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQe4koGj386xkUGn3XXhysM-54_DIbYawunKX49C2Kt6KH9i097JDNnhbKQpRVn7WH05noFpgY3p1_e/pub?gid=618318322&single=true&output=csv"
-            
-            df_m = pd.read_csv(m_url)
-            df_h_sheet = pd.read_csv(h_url)
-            
-            # 1. Clean invisible spaces off column headers
-            df_m.columns = df_m.columns.str.strip()
-            df_h_sheet.columns = df_h_sheet.columns.str.strip()
-            
-            # 2. Rename mapped columns
-            m_rename_map = {'Fund Strategy': 'Strategy', 'Asset Class': 'Strategy', 'Fund Name': 'Company', 'Name': 'Company'}
-            df_m = df_m.rename(columns=m_rename_map)
-            df_h_sheet = df_h_sheet.rename(columns={'Pay Date': 'Date of Pay', 'Payment Date': 'Date of Pay', 'Payout Date': 'Date of Pay', 'Date': 'Date of Pay'})
-            
-            if 'Ticker' not in df_m.columns:
-                return None, None
-            
-            # 3. Clean Ticker Data & Explicit Denylist
-            df_m['Ticker'] = df_m['Ticker'].astype(str).str.strip().str.upper()
-            
-            bad_headers = [
-                'DEFIANCE', 
-                'YIELDMAX', 
-                'ROUNDHILL', 
-                'KURV', 
-                'PROSHARES', 
-                'GLOBALX', 
-                'REX',
-                'TIDAL',
-                'ELEVATE',
-                'SIMPLIFY',
-                'ISHARES',
-                'VANGUARD',
-                'VANECK',
-                'INVESCO',
-                'COMPANY',
-                'STRATEGY',
-                'CALAMOS',
-                'GRAYSCALE',
-                'INVESCO',
-                'KRANESHARES',
-                'VISTASHARES',
-            ]
-            
-            # Remove explicit bad headers
-            df_m = df_m[~df_m['Ticker'].isin(bad_headers)]
-            # Remove any entry containing a space
-            df_m = df_m[~df_m['Ticker'].str.contains(' ', na=False)]
-                
-            # 4. Clean History Dates
-            if 'Date of Pay' in df_h_sheet.columns and 'Ticker' in df_h_sheet.columns:
-                df_h_sheet['Date of Pay'] = pd.to_datetime(df_h_sheet['Date of Pay']).dt.tz_localize(None)
-                df_h_sheet['Ticker'] = df_h_sheet['Ticker'].astype(str).str.strip().str.upper()
-                df_h_sheet = df_h_sheet.sort_values(['Ticker', 'Date of Pay'])
-            else:
-                df_h_sheet = pd.DataFrame(columns=['Date of Pay', 'Ticker'])
-                
-            return df_m, df_h_sheet
+            df_m, df_h_sheet = read_base_sheets(master_path, history_path)
+            if df_m is None:
+                return None, None, None, None, None
+            # Key pay dates, payout frequencies and metadata by ticker once so nothing rescans the sheets per lookup
+            meta = index_metadata(df_m)
+            pay_index = index_pay_sheet(df_h_sheet)
+            return meta, df_h_sheet, pay_index, index_underlyings(meta), index_pay_frequencies(pay_index)
         except Exception as e:
             st.error(f"Failed to load Google Sheets: {e}")
-            return None, None
+            return None, None, None, None, None
 
-    df_m, df_h_sheet = load_base_sheets()
-    if df_m is None:
+    with perf.phase("load_base_sheets", cache_keys=[("load_base_sheets",)]) as rec:
+        sheets = get_sheet_cache()
+        try:
+            # Serves the last good snapshot at once; only a first-ever load waits on Google
+            sheet_paths = sheets.paths([MASTER_URL, HISTORY_URL])
+        except Exception as e:
+            st.error(f"Failed to load Google Sheets: {e}")
+            st.stop()
+        meta, df_h_sheet, pay_index, funds_by_underlying, pay_frequencies = load_base_sheets(*sheet_paths, sheets.version([MASTER_URL, HISTORY_URL]))
+        rec["rows"] = 0 if df_h_sheet is None else len(df_h_sheet)
+    if meta is None:
         st.stop()
 
-    all_tickers = sorted(df_m['Ticker'].unique())
+    all_tickers = sorted(meta)
 
     # --- PHASE 2: LAZY LOAD A SPECIFIC TICKER ---
-    @st.cache_data(ttl=3600)
-    def fetch_single_asset(ticker):
+    # Held as compact shared arrays (no pickling per hit); each call gets zero-copy frames over them.
+    # The ticker's distribution index is built alongside, once per load. `pay_version` (the pay
+    # sheet's snapshot version) keys the pay dates and frequencies this reads from the enclosing scope.
+    @st.cache_resource(ttl=3600, show_spinner=False)
+    def fetch_asset_series(ticker, pay_version):
+        perf.record_miss("fetch_single_asset", ticker)
+        if not get_price_store().is_fresh(ticker):
+            get_cache_warmer().record_cold_load(ticker)
         try:
-            t = yf.Ticker(ticker)
-            hist = t.history(period="max", auto_adjust=False)
-            if hist.empty:
-                return pd.DataFrame(), pd.DataFrame()
-            
-            hist = hist.reset_index()
-            
-            # Build Prices
-            prices = hist[['Date', 'Close']].copy().rename(columns={'Close': 'Closing Price'})
-            prices['Ticker'] = ticker
-            prices['Date'] = pd.to_datetime(prices['Date']).dt.tz_localize(None)
-            
-            # Attach Metadata Safely
-            meta = df_m[df_m['Ticker'] == ticker]
-            if not meta.empty:
-                for col in ['Strategy', 'Company', 'Underlying']:
-                    if col in meta.columns:
-                        val = meta.iloc[0][col]
-                        if pd.isna(val) or str(val).strip() == '' or str(val).lower() == 'nan':
-                            prices[col] = '-'
-                        else:
-                            prices[col] = val
-                    else:
-                        prices[col] = '-'
-            prices['Closing Price'] = pd.to_numeric(prices['Closing Price'], errors='coerce').fillna(0.0)
-            
-            # Build Dividends (Matching YF Amount to Sheet Pay Date)
-            final_history = []
-            if 'Dividends' in hist.columns:
-                divs = hist[hist['Dividends'] > 0][['Date', 'Dividends']].copy()
-                if not divs.empty:
-                    divs['YF_Ex_Date'] = pd.to_datetime(divs['Date']).dt.tz_localize(None)
-                    divs = divs.sort_values('YF_Ex_Date')
-                    
-                    sheet_dates = df_h_sheet[df_h_sheet['Ticker'] == ticker].sort_values('Date of Pay')
-                    
-                    for j, yf_row in enumerate(divs.itertuples()):
-                        amt = yf_row.Dividends
-                        # Use Sheet Pay Date if available, fallback to YF Ex-Date
-                        pay_date = sheet_dates.iloc[j]['Date of Pay'] if j < len(sheet_dates) else yf_row.YF_Ex_Date
-                        final_history.append({'Date of Pay': pay_date, 'Ticker': ticker, 'Amount': amt})
-            
-            df_h_single = pd.DataFrame(final_history) if final_history else pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])
-            return prices, df_h_single
-            
+            prices, history = load_asset_frames(ticker, pay_index, get_price_store())
+        except FetchError:
+            raise
         except Exception:
-            return pd.DataFrame(), pd.DataFrame()
+            return None
+        return None if prices.empty else AssetSeries.from_frames(ticker, prices, history, frequency=pay_frequencies.get(ticker))
+
+    def fetch_single_asset(ticker):
+        """Empty frames when Yahoo has no data; `FetchError` (never cached) when it could not be asked."""
+        get_cache_warmer().record_request(ticker)
+        series = fetch_asset_series(ticker, sheets.version([HISTORY_URL]))
+        return (pd.DataFrame(), pd.DataFrame()) if series is None else series.frames()
+
+    def fetch_distributions(ticker):
+        """The ticker's `DistributionIndex` from the same cached series (None without data).
+
+        Not counted as a warmer request: it follows `fetch_single_asset` on the same rerun, so it always hits.
+        """
+        series = fetch_asset_series(ticker, sheets.version([HISTORY_URL]))
+        return None if series is None else series.distributions
+
+    # Keep requested and related tickers warm, and the universe-wide screener snapshot fresh, in the background
+    get_cache_warmer().update(all_tickers, meta, funds_by_underlying)
+    get_screener_job().update(all_tickers, partial(load_asset_frames, pay_index=pay_index, store=get_price_store(), refresh=False), get_cache_warmer().prefetch)
 
-    # --- COMPOUNDING ENGINE ---
-    def calculate_journey(ticker, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
-        t_price = unified_df[unified_df['Ticker'] == ticker].sort_values('Date')
-        journey = t_price[(t_price['Date'] >= start_date) & (t_price['Date'] <= end_date)].copy()
-        if journey.empty: return journey
-            
-        t_divs = history_df[history_df['Ticker'] == ticker].sort_values('Date of Pay')
-        relevant_divs = t_divs[(t_divs['Date of Pay'] >= start_date) & (t_divs['Date of Pay'] <= end_date)].copy()
-        
-        journey = journey.set_index('Date')
-        journey['Shares'] = initial_shares
-        journey['Cash_Pocketed'] = 0.0
-        
-        current_shares = initial_shares
-        cum_cash = 0.0
-        
-        if not relevant_divs.empty:
-            for _, row in relevant_divs.iterrows():
-                d_date = row['Date of Pay']
-                d_amt = row['Amount']
-                if d_date in journey.index:
-                    payout = current_shares * d_amt
-                    if drip_enabled:
-                        reinvest_price = journey.loc[d_date, 'Closing Price']
-                        if reinvest_price > 0:
-                            current_shares += (payout / reinvest_price)
-                        journey.loc[d_date:, 'Shares'] = current_shares
-                    else:
-                        cum_cash += payout
-                        journey.loc[d_date:, 'Cash_Pocketed'] = cum_cash
-        
-        journey = journey.reset_index()
-        journey['Market_Value'] = journey['Closing Price'] * journey['Shares']
-        journey['Base_Asset_Value'] = journey['Closing Price'] * initial_shares
-        journey['True_Value'] = journey['Market_Value'] if drip_enabled else journey['Market_Value'] + journey['Cash_Pocketed']
-        return journey
-        
     # --- SIDEBAR ---
     with st.sidebar:
-        app_mode = st.radio("Select Mode", ["🛡️ Single Asset", "⚔️ Head-to-Head"], label_visibility="collapsed")
+        if sheets.last_error is not None:
+            st.caption(f"⚠️ Google Sheets unreachable; showing the copy checked {(time.time() - sheets.checked_at(MASTER_URL)) / 60:.0f} min ago.")
+        app_mode = st.radio("Select Mode", ["🛡️ Single Asset", "⚔️ Head-to-Head", "🧺 Portfolio", "🎯 Every Entry Date", "🔎 Screener"], label_visibility="collapsed")
+        if perf.current() is not None:
+            perf.current().context["mode"] = app_mode.split(" ", 1)[1]
         
         if app_mode == "🛡️ Single Asset":
             selected_ticker = st.selectbox("Select Asset", all_tickers)
+            record_selection([selected_ticker])
             
             # FETCH ONLY THE SELECTED TICKER
-            with st.spinner(f"Loading {selected_ticker}..."):
-                price_df, hist_df = fetch_single_asset(selected_ticker)
+            with st.spinner(f"Loading {selected_ticker}..."), perf.phase("fetch_single_asset", cache_keys=[("fetch_single_asset", selected_ticker)], ticker=selected_ticker) as rec:
+                try:
+                    price_df, hist_df = fetch_single_asset(selected_ticker)
+                except FetchError as e:
+                    st.error(fetch_failed_message([selected_ticker], e))
+                    st.stop()
+                rec["rows"] = len(price_df)
             
             if price_df.empty:
                 st.error("No data found on Yahoo Finance for this ticker.")
@@ -305,13 +615,13 @@ def authenticated_dashboard():
             
             buy_date = pd.to_datetime(buy_date)
             
-            date_mode = st.radio("Simulation End:", ["Hold to Present", "Sell on Specific Date"])
+            date_mode = st.radio("Simulation End:", ["Hold to Present", "Sell on Specific Date", "Project Forward"])
             end_date = pd.to_datetime(st.date_input("Sell Date", pd.to_datetime("today"))) if date_mode == "Sell on Specific Date" else pd.to_datetime("today")
                 
             mode = st.radio("Input Method:", ["Share Count", "Dollar Amount"])
             use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
             
-            temp_journey = price_df[(price_df['Date'] >= buy_date) & (price_df['Date'] <= end_date)]
+            temp_journey = slice_window(price_df, buy_date, end_date)
             if not temp_journey.empty:
                 entry_price = temp_journey.iloc[0]['Closing Price']
                 if mode == "Share Count":
@@ -328,8 +638,9 @@ def authenticated_dashboard():
                 
             overlay_underlyings = st.checkbox("📊 Overlay Underlying Assets", value=False, help="Adds the performance of underlying tickers (e.g., AAPL for AAPY/AAPW) to the chart and leaderboard.")
             
-        else:
+        elif app_mode == "⚔️ Head-to-Head":
             selected_tickers = st.multiselect("Select Assets to Compare", all_tickers, default=all_tickers[:2] if len(all_tickers) > 1 else all_tickers)
+            record_selection(selected_tickers)
             st.markdown("##### Common Date Range")
             buy_date = pd.to_datetime(st.date_input("Start Date", pd.to_datetime("today") - pd.DateOffset(months=12)))
             end_date = pd.to_datetime(st.date_input("End Date", pd.to_datetime("today")))
@@ -339,13 +650,44 @@ def authenticated_dashboard():
             st.info(f"Leaderboard assumes ${sim_amt:,.0f} invested in each.")
             overlay_underlyings = st.checkbox("📊 Overlay Underlying Assets", value=False, help="Adds the performance of underlying tickers (e.g., AAPL for AAPY/AAPW) to the chart and leaderboard.")
             
+        elif app_mode == "🧺 Portfolio":
+            selected_tickers = st.multiselect("Holdings", all_tickers, default=all_tickers[:3])
+            record_selection(selected_tickers)
+            if selected_tickers:
+                st.markdown("##### Target Weights")
+                weights_df = st.data_editor(
+                    pd.DataFrame({"Ticker": selected_tickers, "Weight %": [round(100 / len(selected_tickers), 2)] * len(selected_tickers)}),
+                    column_config={"Weight %": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=1.0, format="%.2f")},
+                    disabled=["Ticker"], hide_index=True, use_container_width=True, key=f"weights_{'_'.join(selected_tickers)}",
+                )
+            st.markdown("##### Date Range")
+            buy_date = pd.to_datetime(st.date_input("Start Date", pd.to_datetime("today") - pd.DateOffset(months=12)))
+            end_date = pd.to_datetime(st.date_input("End Date", pd.to_datetime("today")))
+            st.markdown("##### Portfolio Rules")
+            sim_amt = st.number_input("Starting Capital ($)", value=10000, step=1000)
+            rebalance_label = st.selectbox("Rebalance", list(REBALANCE_FREQUENCIES), index=2)
+            dividend_labels = {"💵 Take as Cash": 'cash', "🔄 DRIP (Same Fund)": 'same', "🧺 DRIP (Whole Portfolio)": 'portfolio', "🧹 Sweep Cash at Rebalance": 'sweep'}
+            dividend_policy = dividend_labels[st.radio("Distributions", list(dividend_labels))]
+            
+        elif app_mode == "🎯 Every Entry Date":
+            selected_ticker = st.selectbox("Select Asset", all_tickers)
+            record_selection([selected_ticker])
+            holding_label = st.radio("Holding Period", list(HOLDING_PERIODS), index=2, horizontal=True)
+            use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
+            st.info(f"Every trading day is a possible purchase date, each held for {holding_label}.")
+            
+        else:
+            st.info("Cash-distribution returns; the spread shows what DRIP would have added.")
+            
     # ==========================================
     # MAIN LAYOUT LOGIC
     # ==========================================
     
     # --- SINGLE ASSET MODE ---
     if app_mode == "🛡️ Single Asset":
-        journey = calculate_journey(selected_ticker, buy_date, end_date, initial_shares, use_drip, price_df, hist_df)
+        with perf.phase("memo_journeys", cache_keys=[("unit_journeys", "fund")], ticker=selected_ticker) as rec:
+            journey = memo_journeys(price_df, hist_df, "fund", [selected_ticker], buy_date, end_date, initial_shares, use_drip).get(selected_ticker, pd.DataFrame())
+            rec["rows"] = len(journey)
         if journey.empty:
             st.error("Journey calculation failed (empty data).")
             st.stop()
@@ -362,22 +704,31 @@ def authenticated_dashboard():
         annual_yield = (cash_total/initial_cap)*(365.25/days_held)*100 if days_held > 0 and initial_cap > 0 else 0
 
         # --- HEADER ---
-        meta_row = price_df.iloc[0]
-        asset_strategy = meta_row.get('Strategy', '-')
-        asset_company = meta_row.get('Company', '-')
-        und = meta_row.get('Underlying', '-')
-        if pd.isna(und) or str(und).strip() == '' or str(und).lower() == 'nan': und = '-'
+        meta_row = meta.get(selected_ticker, EMPTY_META)
+        asset_strategy = meta_row['Strategy']
+        asset_company = meta_row['Company']
+        und = meta_row['Underlying']
+        sibling_funds = [t for t in funds_by_underlying.get(und, []) if t != selected_ticker]
         
+        # One fetch and one unit-share journey feed both the header chip and the overlay trace
         und_pct = None
+        start_p = 0
+        und_journey = pd.DataFrame()
         if und != '-':
-            df_u_und, df_h_und = fetch_overlay_data(und, buy_date, end_date)
+            with perf.phase("fetch_overlay_data", cache_keys=[("fetch_overlay_data", und)], ticker=und) as rec:
+                try:
+                    df_u_und, df_h_und = fetch_overlay_data(und)
+                except FetchError as e:
+                    df_u_und = df_h_und = None
+                    st.toast(fetch_failed_message([und], e))
+                rec["rows"] = 0 if df_u_und is None else len(df_u_und)
             if df_u_und is not None and not df_u_und.empty:
-                t_price_check = df_u_und[(df_u_und['Date'] >= buy_date) & (df_u_und['Date'] <= end_date)].sort_values('Date')
+                t_price_check = slice_window(df_u_und, buy_date, end_date)
                 if not t_price_check.empty:
                     start_p = t_price_check.iloc[0]['Closing Price']
-                    t_journey = calculate_journey(und, buy_date, end_date, 1.0, use_drip, df_u_und, df_h_und)
-                    if not t_journey.empty:
-                        und_pct = ((t_journey.iloc[-1]['True_Value'] - start_p) / start_p) * 100 if start_p > 0 else 0
+                    und_journey = memo_journeys(df_u_und, df_h_und, "underlying", [und], buy_date, end_date, 1.0, use_drip).get(und, pd.DataFrame())
+                    if not und_journey.empty:
+                        und_pct = ((und_journey.iloc[-1]['True_Value'] - start_p) / start_p) * 100 if start_p > 0 else 0
                         
         col_head, col_meta = st.columns([1.8, 1.2])
         with col_head:
@@ -387,7 +738,7 @@ def authenticated_dashboard():
                         Performance Simulator : <span style="color: #8AC7DE;">{selected_ticker}</span>
                     </h1>
                     <p style="font-size: 1.1rem; color: #8AC7DE; opacity: 0.8; margin-top: -5px; margin-bottom: 10px;">
-                        <b>{final_shares:.2f} shares</b> &nbsp;|&nbsp; {buy_date.date()} ➝ {end_date.date()} ({days_held} days)
+                        <b>{final_shares:.2f} shares</b> &nbsp;|&nbsp; {buy_date.date()} ➝ {end_date.date()} ({days_held} days){f" &nbsp;|&nbsp; Also on {und}: {', '.join(sibling_funds)}" if sibling_funds else ""}
                     </p>
                 </div>
             """, unsafe_allow_html=True)
@@ -420,75 +771,80 @@ def authenticated_dashboard():
             m4.metric("Annualized Yield", f"{annual_yield:.2f}%")
         m5.metric("True Total Value", f"${current_total_val:,.2f}", f"{total_return_pct:.2f}%")
         
-        fig = go.Figure()
-        bottom_y = journey['Market_Value'] if not use_drip else journey['Base_Asset_Value']
-        price_color = '#8AC7DE' if journey.iloc[-1]['Closing Price'] >= journey.iloc[0]['Closing Price'] else '#FF4B4B'
+        render_single_chart(journey, initial_cap, total_pl, use_drip, overlay_underlyings, und, und_journey, start_p)
+        if date_mode == "Project Forward":
+            render_projection(selected_ticker, price_df, hist_df, journey, use_drip, initial_cap)
+        render_distribution_health(fetch_distributions(selected_ticker), buy_date, end_date)
         
-        fig.add_trace(go.Scatter(x=journey['Date'], y=bottom_y, mode='lines', name='Asset Price', line=dict(color=price_color, width=2)))
-        fig.add_trace(go.Scatter(x=journey['Date'], y=journey['True_Value'], mode='lines', name='True Value', line=dict(color='#00C805', width=3), fill='tonexty', fillcolor='rgba(0, 200, 5, 0.1)'))
-        fig.add_hline(y=initial_cap, line_dash="dash", line_color="white", opacity=0.3)
-        
-        profit_bg = "#00C805" if total_pl >= 0 else "#FF4B4B"
-        fig.add_annotation(
-            x=0.02, y=0.95, xref="paper", yref="paper", text=f"PROFIT: +${total_pl:,.2f}" if total_pl >= 0 else f"LOSS: -${abs(total_pl):,.2f}", showarrow=False,
-            font=dict(family="Arial Black, sans-serif", size=16, color="white"), bgcolor=profit_bg, bordercolor=profit_bg, borderpad=8, opacity=0.9, align="left"
-        )
-        
-        if overlay_underlyings and und != '-':
-            df_u_und, df_h_und = fetch_overlay_data(und, buy_date, end_date)
-            if df_u_und is not None:
-                t_price_check = df_u_und[(df_u_und['Date'] >= buy_date) & (df_u_und['Date'] <= end_date)].sort_values('Date')
-                if not t_price_check.empty:
-                    t_journey = calculate_journey(und, buy_date, end_date, initial_cap / t_price_check.iloc[0]['Closing Price'], use_drip, df_u_und, df_h_und)
-                    if not t_journey.empty:
-                        fig.add_trace(go.Scatter(x=t_journey['Date'], y=t_journey['True_Value'], mode='lines', name=und, line=dict(color='#FFD700', width=2, dash='dash')))
-                        
-        fig.update_layout(
-            template="plotly_dark", 
-            paper_bgcolor='rgba(0,0,0,0)', 
-            plot_bgcolor='rgba(0,0,0,0)', 
-            height=340, 
-            margin=dict(l=0, r=0, t=20, b=0), 
-            showlegend=False, 
-            hovermode="x unified", 
-            xaxis=dict(fixedrange=True), 
-            yaxis=dict(fixedrange=True)
-        )
-        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-        
-        st.markdown('<div style="background-color: #161b22; border: 1px solid #30363d; border-radius: 8px; padding: 5px 8px; text-align: center;"><span style="color: #00C805; font-weight: 800;">💚 True Value (Total Equity)</span> &nbsp;&nbsp; <span style="color: #8AC7DE; font-weight: 800;">🔵 Price Appreciation</span> &nbsp;&nbsp; <span style="color: #FF4B4B; font-weight: 800;">🔴 Price Erosion</span></div>', unsafe_allow_html=True)
         with st.expander("View Data"): st.dataframe(journey.sort_values('Date', ascending=False), use_container_width=True)
+        with st.expander("🧾 Pay-Date Matching"):
+            fallbacks = hist_df[~hist_df['Matched']] if 'Matched' in hist_df.columns else hist_df.iloc[0:0]
+            with perf.phase("load_pay_date_report", cache_keys=[("load_pay_date_report",)]) as rec:
+                report = load_pay_date_report(df_h_sheet, sheets.version([HISTORY_URL]))
+                rec["rows"] = len(report)
+            orphans = report[report['Ticker'] == selected_ticker]
+            st.caption(f"{len(hist_df) - len(fallbacks)} of {len(hist_df)} Yahoo payouts matched a sheet pay date · {len(fallbacks)} fell back to the ex-date · {len(orphans)} sheet rows unmatched")
+            if not fallbacks.empty:
+                st.dataframe(fallbacks[['Ex Date', 'Amount']].sort_values('Ex Date', ascending=False), hide_index=True, use_container_width=True)
+            if not orphans.empty:
+                st.dataframe(orphans[['Date of Pay']].sort_values('Date of Pay', ascending=False), hide_index=True, use_container_width=True)
 
     # --- HEAD-TO-HEAD MODE ---
-    else:
+    elif app_mode == "⚔️ Head-to-Head":
         st.markdown('<div style="margin-top: -10px; margin-bottom: 20px;"><h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">⚔️ Head-to-Head <span style="color: #8AC7DE;">Comparison</span></h1></div>', unsafe_allow_html=True)
         if not selected_tickers:
             st.warning("Please select at least one asset in the sidebar.")
             st.stop()
             
         comp_data = []
-        fig_comp = go.Figure()
+        comp_lines = []
+        risk_journeys = {}
         colors = ['#00C805', '#F59E0B', '#8AC7DE', '#FF4B4B', '#A855F7', '#EC4899', '#EAB308']
         
+        unique_und = []
+        if overlay_underlyings:
+            unique_und = list(dict.fromkeys(meta.get(t, EMPTY_META)['Underlying'] for t in selected_tickers))
+            unique_und = [u for u in unique_und if u != '-']
+        
         with st.spinner("Fetching data for selected assets..."):
-            for idx, t in enumerate(selected_tickers):
-                price_df, hist_df = fetch_single_asset(t)
-                if price_df.empty: continue
-                
-                t_price_check = price_df[(price_df['Date'] >= buy_date) & (price_df['Date'] <= end_date)].sort_values('Date')
-                if t_price_check.empty: continue
+            # Fetch every fund and underlying at once; wall time tracks the slowest ticker
+            cache_keys = [("fetch_single_asset", t) for t in selected_tickers] + [("fetch_overlay_data", u) for u in unique_und]
+            with perf.phase("fetch_concurrently", cache_keys=cache_keys, tickers=len(cache_keys)) as rec:
+                fetch_errors = {}
+                fetched = fetch_concurrently(
+                    {('fund', t): partial(fetch_single_asset, t) for t in selected_tickers}
+                    | {('und', u): partial(fetch_overlay_data, u) for u in unique_und},
+                    errors=fetch_errors,
+                )
+                rec["rows"] = sum(len(r[0]) for r in fetched.values() if r is not None and r[0] is not None)
+            warn_fetch_errors(fetch_errors, name=lambda key: key[1])
+            
+            # Stack every fund into one frame and simulate them in a single batched call
+            # A fetch that raised left None behind; the others still chart
+            loaded = [fetched[('fund', t)] for t in selected_tickers]
+            loaded = [(p, h) for p, h in (r for r in loaded if r is not None) if not p.empty]
+            if loaded:
+                unified_df = pd.concat([p for p, _ in loaded], ignore_index=True)
+                history_df = pd.concat([h for _, h in loaded if not h.empty] or [pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])], ignore_index=True)
+                initial_s = (sim_amt / entry_prices(unified_df, buy_date, end_date)).to_dict()
+                with perf.phase("memo_journeys", cache_keys=[("unit_journeys", "fund")], tickers=len(loaded)) as rec:
+                    journeys = memo_journeys(unified_df, history_df, "fund", selected_tickers, buy_date, end_date, initial_s, use_drip)
+                    rec["rows"] = sum(len(j) for j in journeys.values())
+            else:
+                journeys = {}
                 
-                initial_s = sim_amt / t_price_check.iloc[0]['Closing Price']
-                t_journey = calculate_journey(t, buy_date, end_date, initial_s, use_drip, price_df, hist_df)
-                if t_journey.empty: continue
+            for idx, t in enumerate(selected_tickers):
+                if t not in journeys: continue
+                t_journey = journeys[t]
                 
                 t_journey['Total_Return_Pct'] = ((t_journey['True_Value'] - sim_amt) / sim_amt) * 100
-                fig_comp.add_trace(go.Scatter(x=t_journey['Date'], y=t_journey['Total_Return_Pct'], mode='lines', name=t, line=dict(color=colors[idx % len(colors)], width=3)))
+                comp_lines.append((t, t_journey['Date'], t_journey['Total_Return_Pct'], colors[idx % len(colors)], False))
+                risk_journeys[t] = t_journey
                 
                 f_row = t_journey.iloc[-1]
                 data_row = {"Ticker": t, "Total Return": f_row['Total_Return_Pct'], "💚 Total Value": f_row['True_Value']}
                 if use_drip:
-                    data_row["📈 New Shares Added"] = f_row['Shares'] - initial_s
+                    data_row["📈 New Shares Added"] = f_row['Shares'] - initial_s[t]
                     data_row["Yield %"] = "N/A"
                 else:
                     data_row["💰 Cash Generated"] = f_row['Cash_Pocketed']
@@ -497,26 +853,29 @@ def authenticated_dashboard():
                 comp_data.append(data_row)
             
             if overlay_underlyings:
-                unique_und = {df_m[df_m['Ticker'] == t].iloc[0].get('Underlying', '-') for t in selected_tickers if not df_m[df_m['Ticker'] == t].empty}
-                unique_und.discard('-')
-                
                 overlay_colors = ['#00FFFF', '#FF69B4', '#00FF7F', '#87CEEB', '#FFA07A']
-                for idx, und in enumerate(unique_und):
-                    df_u_und, df_h_und = fetch_overlay_data(und, buy_date, end_date)
-                    if df_u_und is None: continue
-                    t_price_check = df_u_und[(df_u_und['Date'] >= buy_date) & (df_u_und['Date'] <= end_date)].sort_values('Date')
-                    if t_price_check.empty: continue
+                loaded = [fetched[('und', und)] for und in unique_und]
+                loaded = [(u, h) for u, h in (r for r in loaded if r is not None) if u is not None]
+                if loaded:
+                    und_prices = pd.concat([u for u, _ in loaded], ignore_index=True)
+                    und_history = pd.concat([h for _, h in loaded], ignore_index=True)
+                    und_shares = (sim_amt / entry_prices(und_prices, buy_date, end_date)).to_dict()
+                    und_journeys = memo_journeys(und_prices, und_history, "underlying", unique_und, buy_date, end_date, und_shares, use_drip)
+                else:
+                    und_journeys = {}
                     
-                    t_journey = calculate_journey(und, buy_date, end_date, sim_amt / t_price_check.iloc[0]['Closing Price'], use_drip, df_u_und, df_h_und)
-                    if t_journey.empty: continue
+                for idx, und in enumerate(unique_und):
+                    if und not in und_journeys: continue
+                    t_journey = und_journeys[und]
                     
                     t_journey['Total_Return_Pct'] = ((t_journey['True_Value'] - sim_amt) / sim_amt) * 100
-                    fig_comp.add_trace(go.Scatter(x=t_journey['Date'], y=t_journey['Total_Return_Pct'], mode='lines', name=und, line=dict(color=overlay_colors[idx % len(overlay_colors)], width=2, dash='dash')))
+                    comp_lines.append((und, t_journey['Date'], t_journey['Total_Return_Pct'], overlay_colors[idx % len(overlay_colors)], True))
+                    risk_journeys[und] = t_journey
                     
                     f_row = t_journey.iloc[-1]
                     data_row = {"Ticker": und, "Total Return": f_row['Total_Return_Pct'], "💚 Total Value": f_row['True_Value']}
                     if use_drip:
-                        data_row["📈 New Shares Added"] = f_row['Shares'] - (sim_amt / t_price_check.iloc[0]['Closing Price'])
+                        data_row["📈 New Shares Added"] = f_row['Shares'] - und_shares[und]
                         data_row["Yield %"] = "N/A"
                     else:
                         data_row["💰 Cash Generated"] = f_row['Cash_Pocketed']
@@ -524,20 +883,11 @@ def authenticated_dashboard():
                         data_row["📉 Share Value (Remaining)"] = f_row['Market_Value']
                     comp_data.append(data_row)
         
-        fig_comp.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5, annotation_text="Break Even")
-        fig_comp.update_layout(
-            template="plotly_dark", 
-            paper_bgcolor='rgba(0,0,0,0)', 
-            plot_bgcolor='rgba(0,0,0,0)', 
-            height=400, 
-            margin=dict(l=0, r=0, t=30, b=0), 
-            hovermode="x unified", 
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
-            yaxis_title="Total Return (%)", 
-            xaxis=dict(fixedrange=True), 
-            yaxis=dict(fixedrange=True)
-        )
-        st.plotly_chart(fig_comp, use_container_width=True, config={'displayModeBar': False})
+        with perf.phase("build_figure"):
+            fig_comp = comparison_figure(comp_lines)
+        with perf.phase("plotly_chart") as rec:
+            st.plotly_chart(fig_comp, use_container_width=True, config={'displayModeBar': False})
+            rec["rows"] = sum(len(tr.x) for tr in fig_comp.data if tr.x is not None)
         
         if comp_data:
             st.markdown(f"### 🏆 Leaderboard (${sim_amt:,.0f} Investment)")
@@ -552,12 +902,163 @@ def authenticated_dashboard():
                  df_comp['💰 Cash Generated'] = df_comp['💰 Cash Generated'].apply(lambda x: f"${x:,.2f}")
                  df_comp['📉 Share Value (Remaining)'] = df_comp['📉 Share Value (Remaining)'].apply(lambda x: f"${x:,.2f}")
                  st.dataframe(df_comp, column_order=["Ticker", "Total Return", "Yield %", "💰 Cash Generated", "📉 Share Value (Remaining)", "💚 Total Value"], hide_index=True, use_container_width=True)
+            
+            render_risk_panel(risk_journeys, {name: (color, dashed) for name, _, _, color, dashed in comp_lines})
+
+    # --- PORTFOLIO MODE ---
+    elif app_mode == "🧺 Portfolio":
+        st.markdown('<div style="margin-top: -10px; margin-bottom: 20px;"><h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">🧺 Portfolio <span style="color: #8AC7DE;">Simulator</span></h1></div>', unsafe_allow_html=True)
+        if not selected_tickers:
+            st.warning("Please select at least one holding in the sidebar.")
+            st.stop()
+        weights = dict(zip(weights_df["Ticker"], weights_df["Weight %"].fillna(0.0)))
+        if sum(weights.values()) <= 0:
+            st.warning("Give at least one holding a weight above zero.")
+            st.stop()
+        
+        with st.spinner("Fetching data for selected assets..."):
+            cache_keys = [("fetch_single_asset", t) for t in selected_tickers]
+            with perf.phase("fetch_concurrently", cache_keys=cache_keys, tickers=len(cache_keys)) as rec:
+                fetch_errors = {}
+                fetched = fetch_concurrently({t: partial(fetch_single_asset, t) for t in selected_tickers}, errors=fetch_errors)
+                rec["rows"] = sum(len(r[0]) for r in fetched.values() if r is not None)
+        loaded = {t: r for t, r in fetched.items() if r is not None and not r[0].empty}
+        failed = warn_fetch_errors(fetch_errors, note=" Left out of the portfolio for now.")
+        missing = [t for t in selected_tickers if t not in loaded and t not in failed]
+        if missing:
+            st.warning(f"No price data for {', '.join(missing)}; left out of the portfolio.")
+        if failed or missing:
+            weights = {t: w for t, w in weights.items() if t in loaded}
+        if not loaded or sum(weights.values()) <= 0:
+            st.error("No data for the selected holdings.")
+            st.stop()
+        
+        unified_df = pd.concat([p for p, _ in loaded.values()], ignore_index=True)
+        history_df = pd.concat([h for _, h in loaded.values() if not h.empty] or [pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])], ignore_index=True)
+        with perf.phase("simulate_portfolio", tickers=len(weights)) as rec:
+            journey, allocation, dropped = simulate_portfolio(unified_df, history_df, weights, buy_date, end_date, sim_amt, REBALANCE_FREQUENCIES[rebalance_label], dividend_policy)
+            rec["rows"] = allocation.size
+        if dropped and not journey.empty:
+            st.warning(f"No prices for {', '.join(dropped)} in this date range; left out of the portfolio and the other weights scaled up to fill it.")
+            weights = {t: w for t, w in weights.items() if t not in dropped}
+        if journey.empty:
+            st.error("No data for date range.")
+            st.stop()
+        
+        first, last = journey.iloc[0], journey.iloc[-1]
+        days_held = (last['Date'] - first['Date']).days
+        total_return_pct = (last['True_Value'] / sim_amt - 1) * 100
+        income_yield = last['Income'] / sim_amt * (365.25 / days_held) * 100 if days_held > 0 else 0
+        if first['Date'] > buy_date + pd.Timedelta(days=7):
+            st.info(f"Starts {first['Date'].date()}, the first day every holding has a price.")
+        
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Initial Capital", f"${sim_amt:,.2f}")
+        m2.metric("Holdings Value", f"${last['Market_Value']:,.2f}", f"{(last['Market_Value'] / sim_amt - 1) * 100:+.2f}%")
+        m3.metric("Distributions Received" if dividend_policy in ('cash', 'sweep') else "Distributions Reinvested", f"${last['Income']:,.2f}")
+        m4.metric("Annualized Yield", f"{income_yield:.2f}%")
+        m5.metric("True Total Value", f"${last['True_Value']:,.2f}", f"{total_return_pct:.2f}%")
+        
+        with perf.phase("build_figure"):
+            fig_port = portfolio_figure(journey, allocation, sim_amt)
+        with perf.phase("plotly_chart") as rec:
+            st.plotly_chart(fig_port, use_container_width=True, config={'displayModeBar': False})
+            rec["rows"] = sum(len(tr.x) for tr in fig_port.data if tr.x is not None)
+        
+        end_values = allocation.iloc[-1]
+        total_weight = sum(weights.values())
+        holdings = pd.DataFrame({
+            "Ticker": allocation.columns,
+            "Target Weight": [weights[t] / total_weight * 100 for t in allocation.columns],
+            "End Weight": (end_values / end_values.sum() * 100).to_numpy(),
+            "End Value": end_values.to_numpy(),
+        })
+        st.markdown(f"### 📋 Holdings ({rebalance_label.lower()} rebalancing, {journey['Rebalanced'].sum()} rebalances)")
+        st.dataframe(
+            holdings,
+            column_config={
+                "Target Weight": st.column_config.NumberColumn(format="%.2f%%"),
+                "End Weight": st.column_config.NumberColumn(format="%.2f%%"),
+                "End Value": st.column_config.NumberColumn(format="$%,.2f"),
+            },
+            hide_index=True, use_container_width=True,
+        )
+        with st.expander("View Data"): st.dataframe(journey.sort_values('Date', ascending=False), hide_index=True, use_container_width=True)
+
+    # --- EVERY ENTRY DATE MODE ---
+    elif app_mode == "🎯 Every Entry Date":
+        st.markdown(f'<div style="margin-top: -10px; margin-bottom: 20px;"><h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">🎯 Every Entry Date : <span style="color: #8AC7DE;">{selected_ticker}</span></h1></div>', unsafe_allow_html=True)
+        with st.spinner(f"Loading {selected_ticker}..."), perf.phase("fetch_single_asset", cache_keys=[("fetch_single_asset", selected_ticker)], ticker=selected_ticker) as rec:
+            try:
+                price_df, hist_df = fetch_single_asset(selected_ticker)
+            except FetchError as e:
+                st.error(fetch_failed_message([selected_ticker], e))
+                st.stop()
+            rec["rows"] = len(price_df)
+        if price_df.empty:
+            st.error("No data found on Yahoo Finance for this ticker.")
+            st.stop()
+        
+        with perf.phase("entry_date_outcomes", ticker=selected_ticker) as rec:
+            outcomes = entry_date_outcomes(price_df, hist_df, HOLDING_PERIODS[holding_label], use_drip)
+            rec["rows"] = len(outcomes)
+        if outcomes.empty:
+            st.warning(f"{selected_ticker} does not have {holding_label} of history yet.")
+            st.stop()
+        
+        returns = outcomes['Total Return %']
+        e1, e2, e3, e4, e5 = st.columns(5)
+        e1.metric("Entry Dates Tested", f"{len(outcomes):,}")
+        e2.metric("Profitable Entries", f"{(returns > 0).mean() * 100:.1f}%")
+        e3.metric("Worst Entry", f"{returns.min():+.2f}%", outcomes.loc[returns.idxmin(), 'Entry Date'].strftime('%Y-%m-%d'), delta_color="off")
+        e4.metric("Median Cash Yield", f"{outcomes['Cash Yield %'].median():.2f}%")
+        e5.metric("Median Total Return", f"{returns.median():+.2f}%")
+        
+        render_entry_chart(outcomes)
+        
+        pct = outcomes[["Total Return %", "Cash Yield %", "Price Return %"]].quantile([0.05, 0.25, 0.5, 0.75, 0.95])
+        pct.index = ["5th", "25th", "Median", "75th", "95th"]
+        st.markdown(f"### 📊 Outcome Percentiles ({holding_label} hold{', DRIP' if use_drip else ''})")
+        st.dataframe(pct.T.map(lambda x: f"{x:+.2f}%"), use_container_width=True)
+        with st.expander("View Data"): st.dataframe(outcomes.sort_values('Entry Date', ascending=False), hide_index=True, use_container_width=True)
+
+    # --- SCREENER MODE ---
+    else:
+        st.markdown('<div style="margin-top: -10px; margin-bottom: 20px;"><h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">🔎 Universe <span style="color: #8AC7DE;">Screener</span></h1></div>', unsafe_allow_html=True)
+        render_export(all_tickers, partial(load_asset_frames, pay_index=pay_index, store=get_price_store(), refresh=False))
+        age = snapshot_age()
+        if age is None:
+            st.info("The screener is being built in the background. Check back in a few minutes.")
+            st.stop()
+        
+        with perf.phase("load_screener_snapshot", cache_keys=[("load_screener_snapshot",)]) as rec:
+            table = load_screener_snapshot(os.path.getmtime(SNAPSHOT_PATH))
+            rec["rows"] = len(table)
+        render_screener_table(table, age)
 
 # ==========================================
 # 🛑 MAIN EXECUTION CONTROL
 # ==========================================
+def render_perf_panel(trace):
+    """Phase timings for this rerun; only shown with `?debug=1` in the URL."""
+    with st.expander("⏱️ Performance (this rerun)"):
+        st.caption(f"Rerun {trace.rerun_id} · {trace.total_ms:,.0f} ms total")
+        st.dataframe(pd.DataFrame(trace.phases, columns=["phase", "ticker", "tickers", "cache", "rows", "ms"]), hide_index=True, use_container_width=True)
+        warm = get_cache_warmer().snapshot()
+        hit_rate = "-" if warm["hit_rate"] is None else f"{warm['hit_rate'] * 100:.0f}%"
+        st.caption(f"Cache warmer: {hit_rate} warm hit rate over {warm.get('requests', 0)} requests · {warm.get('warmed', 0)} refreshed in background · {warm['queued']} queued · {warm['budget_left']} of this hour's budget left")
+        yahoo = get_price_store().scheduler.stats
+        st.caption(f"Yahoo requests: {yahoo['calls']} sent · {yahoo['merged']} merged into in-flight fetches · {yahoo['throttled']} throttled · {yahoo['failed']} gave up")
+
 def main():
-    authenticated_dashboard()
+    trace = perf.start_rerun()
+    try:
+        authenticated_dashboard()
+    finally:
+        # Runs on st.stop() too, so early exits are still logged
+        trace.finish()
+        if st.query_params.get("debug") == "1":
+            render_perf_panel(trace)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+"""Headless batch runner: simulate many tickers over date windows without a browser.
+
+    python batch.py --tickers MSTY YMAX --window 1Y --window 2024-01-01:2024-06-30 \
+        --drip both --amount 10000 --out results.parquet --processes 4
+
+Windows are either a relative label (1M, 3M, 6M, 1Y, inception) ending at
+--as-of, or an explicit START:END range. Output format follows the file
+extension (.parquet or .csv). Rows are streamed to the file ticker by ticker
+(CSV chunks / Parquet row groups) with only a few tickers in flight, so a
+universe-wide run, e.g. for a scheduled export, never collects its results:
+
+    python batch.py --window 1M --window 3M --window 6M --window 1Y --window inception \
+        --drip both --out exports/universe.parquet
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from engine import (
+    HISTORY_URL,
+    MASTER_URL,
+    align_pay_dates,
+    index_pay_sheet,
+    load_asset_frames,
+    load_base_sheets,
+)
+from export import map_ahead, result_frame, ticker_rows, write_results
+from price_store import DEFAULT_PATH, PriceStore
+from screener import WINDOWS
+
+DRIP_MODES = {'on': [True], 'off': [False], 'both': [False, True]}
+
+_worker = {}
+
+
+def parse_window(text, as_of):
+    """'1Y' / 'inception' / '2024-01-01:2024-06-30' -> (label, start, end); start None means inception."""
+    aliases = {k.lower(): k for k in WINDOWS}
+    aliases['inception'] = 'Since Inception'
+    key = aliases.get(text.strip().lower())
+    if key is not None:
+        offset = WINDOWS[key]
+        return key, (None if offset is None else as_of - offset), as_of
+    start, sep, end = text.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"unrecognised window {text!r}")
+    return text, pd.Timestamp(start), pd.Timestamp(end)
+
+
+def _init_worker(pay_index, store_path):
+    _worker.update(pay_index=pay_index, store=PriceStore(store_path))
+
+
+def run_ticker(ticker, windows, drip_modes, amount):
+    """All result rows for one ticker; a failure becomes a single row with an Error message."""
+    load_asset = partial(load_asset_frames, pay_index=_worker['pay_index'], store=_worker['store'])
+    return ticker_rows(ticker, load_asset, windows, drip_modes, amount)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickers', nargs='+', help="tickers to simulate (default: every ticker in the master sheet)")
+    parser.add_argument('--window', action='append', dest='windows', help="1M/3M/6M/1Y/inception or START:END; repeatable (default: 1Y)")
+    parser.add_argument('--as-of', default=None, help="end date for relative windows (default: today)")
+    parser.add_argument('--drip', choices=list(DRIP_MODES), default='both')
+    parser.add_argument('--amount', type=float, default=10000.0, help="dollars invested per ticker and window")
+    parser.add_argument('--out', required=True, help="output path ending in .csv or .parquet")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--store', default=DEFAULT_PATH, help="price store path")
+    parser.add_argument('--master-url', default=MASTER_URL)
+    parser.add_argument('--history-url', default=HISTORY_URL)
+    parser.add_argument('--pay-date-report', help="also write sheet pay dates no stored ex-date matched (CSV)")
+    args = parser.parse_args(argv)
+
+    as_of = pd.Timestamp(args.as_of) if args.as_of else pd.Timestamp('today').normalize()
+    windows = [parse_window(w, as_of) for w in (args.windows or ['1Y'])]
+    drip_modes = DRIP_MODES[args.drip]
+
+    df_m, df_h_sheet = load_base_sheets(args.master_url, args.history_url)
+    if df_m is None:
+        sys.exit("Master sheet has no Ticker column.")
+    tickers = [t.upper() for t in args.tickers] if args.tickers else sorted(df_m['Ticker'].unique())
+
+    init_args = (index_pay_sheet(df_h_sheet), args.store)
+    job = partial(run_ticker, windows=windows, drip_modes=drip_modes, amount=args.amount)
+    # Each ticker's rows are written as soon as they arrive instead of collected first
+    if args.processes > 1:
+        with ProcessPoolExecutor(max_workers=args.processes, initializer=_init_worker, initargs=init_args) as pool:
+            rows, failed = write_results((result_frame(c) for c in map_ahead(pool, job, tickers, 2 * args.processes)), args.out)
+    else:
+        _init_worker(*init_args)
+        rows, failed = write_results((result_frame(job(t)) for t in tickers), args.out)
+
+    if args.pay_date_report:
+        # One as-of join over every stored dividend in the universe
+        _, unmatched = align_pay_dates(PriceStore(args.store).dividends(), df_h_sheet)
+        unmatched.to_csv(args.pay_date_report, index=False)
+        print(f"{len(unmatched)} unmatched sheet pay dates written to {args.pay_date_report}")
+    print(f"{len(tickers)} tickers -> {rows - failed} rows ({failed} failed) written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""Benchmarks for the load -> align -> compound -> render pipeline.
+
+Runs entirely offline: synthetic price/dividend histories are served through a
+stand-in yfinance downloader and the Google Sheets CSVs through a local HTTP
+server. Each phase is timed (median of --repeat runs) and its peak traced
+memory recorded in a separate pass.
+
+    python benchmarks/bench_pipeline.py                    # run and compare to the saved baseline
+    python benchmarks/bench_pipeline.py --save-baseline    # record this machine's baseline
+    python benchmarks/bench_pipeline.py --quick            # smaller matrix for a smoke check
+
+Exits with status 1 when any case is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from charts import comparison_figure, single_asset_figure  # noqa: E402
+from engine import build_asset_frames, calculate_journey, calculate_journeys, index_pay_sheet, load_base_sheets  # noqa: E402
+from fetch_scheduler import FetchScheduler  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PAYOUT_FREQS = {'weekly': 'W-THU', 'monthly': 'BMS', 'quarterly': 'BQS'}
+H2H_TICKERS = 8
+
+
+# --- SYNTHETIC DATA ---
+def synthetic_history(ticker, years, freq, seed=0):
+    """yfinance-style daily history: eroding NAV with a distribution every `freq` period."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp('2025-06-30')
+    dates = pd.bdate_range(end - pd.DateOffset(years=years), end, tz='America/New_York')
+    close = 25 * np.exp(np.cumsum(rng.normal(-0.0004, 0.02, len(dates))))
+    dividends = np.zeros(len(dates))
+    ex_dates = pd.date_range(dates[0], dates[-1], freq=PAYOUT_FREQS[freq], tz='America/New_York')
+    pos = np.unique(dates.searchsorted(ex_dates).clip(0, len(dates) - 1))
+    dividends[pos] = close[pos] * rng.uniform(0.005, 0.03, len(pos))
+    return pd.DataFrame({
+        'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1_000,
+        'Dividends': dividends, 'Stock Splits': 0.0,
+    }, index=pd.Index(dates, name='Date'))
+
+
+def synthetic_universe(n_tickers, years, freq):
+    """{ticker: history} plus the master and pay-date sheets that describe them."""
+    histories = {f"T{i:03d}": synthetic_history(f"T{i:03d}", years, freq, seed=i) for i in range(n_tickers)}
+    master = pd.DataFrame({
+        'Ticker': list(histories),
+        'Fund Strategy': 'Option Income',
+        'Fund Name': 'Synthetic',
+        'Underlying': [f"U{i % 10}" for i in range(n_tickers)],
+    })
+    pay_rows = []
+    for t, h in histories.items():
+        ex = h.index[h['Dividends'] > 0].tz_localize(None)
+        pay_rows.append(pd.DataFrame({'Ticker': t, 'Pay Date': (ex + pd.offsets.BDay(1)).strftime('%m/%d/%Y')}))
+    return histories, master, pd.concat(pay_rows, ignore_index=True)
+
+
+class SheetServer:
+    """Serves the master/history CSVs over HTTP on localhost, like the published Google Sheets."""
+
+    def __init__(self, files):
+        self.dir = tempfile.mkdtemp(prefix="hyt-bench-")
+        for name, frame in files.items():
+            frame.to_csv(os.path.join(self.dir, name), index=False)
+        handler = functools.partial(_QuietHandler, directory=self.dir)
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/{name}"
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# --- MEASUREMENT ---
+def measure(fn, repeat):
+    """(median seconds, peak traced MiB) for `fn()`."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak / 2**20
+
+
+def run_case(years, freq, repeat, universe_size):
+    histories, master, pay_sheet = synthetic_universe(universe_size, years, freq)
+    server = SheetServer({'master.csv': master, 'history.csv': pay_sheet})
+    # The synthetic downloader is local, so the Yahoo rate limit would only measure the bucket
+    unlimited = FetchScheduler(rate=1e9, burst=10**9)
+    store = PriceStore(os.path.join(server.dir, 'prices.sqlite'), downloader=lambda t, start: histories[t], scheduler=unlimited)
+    try:
+        df_m, df_h_sheet = load_base_sheets(server.url('master.csv'), server.url('history.csv'))
+        tickers = list(histories)[:H2H_TICKERS]
+        for t in tickers:
+            store.refresh(t, force=True)
+        stored = {t: store.history(t) for t in tickers}
+        pay_index = index_pay_sheet(df_h_sheet)
+        frames = {t: build_asset_frames(t, stored[t], pay_index) for t in tickers}
+        unified = pd.concat([p for p, _ in frames.values()], ignore_index=True)
+        history = pd.concat([h for _, h in frames.values()], ignore_index=True)
+        lead = tickers[0]
+        prices, divs = frames[lead]
+        start, end = prices['Date'].iloc[0], prices['Date'].iloc[-1]
+        shares = {t: 1000 / frames[t][0]['Closing Price'].iloc[0] for t in tickers}
+        journey = calculate_journey(lead, start, end, shares[lead], False, prices, divs)
+        journeys = calculate_journeys(tickers, start, end, shares, False, unified, history)
+        n_rows, n_h2h = len(prices), len(unified)
+
+        phases = {
+            'load_base_sheets': (lambda: load_base_sheets(server.url('master.csv'), server.url('history.csv')), len(df_m) + len(df_h_sheet)),
+            'store_cold_fetch': (lambda: store.refresh(lead, force=True), n_rows),
+            'pay_index_build': (lambda: index_pay_sheet(df_h_sheet), len(df_h_sheet)),
+            'pay_date_match': (lambda: build_asset_frames(lead, stored[lead], pay_index), n_rows),
+            'journey_single': (lambda: calculate_journey(lead, start, end, shares[lead], True, prices, divs), n_rows),
+            'journey_h2h': (lambda: calculate_journeys(tickers, start, end, shares, True, unified, history), n_h2h),
+            'figure_single': (lambda: single_asset_figure(journey, 1000, journey['True_Value'].iloc[-1] - 1000, False).to_json(), n_rows),
+            'figure_h2h': (lambda: comparison_figure([(t, j['Date'], j['True_Value'] / 10 - 100, '#00C805', False) for t, j in journeys.items()]).to_json(), n_h2h),
+        }
+        results = {}
+        for phase, (fn, rows) in phases.items():
+            seconds, peak_mb = measure(fn, repeat)
+            results[f"{phase}[{years}y-{freq}]"] = {
+                'median_s': seconds,
+                'rows_per_s': rows / seconds if seconds > 0 else float('inf'),
+                'peak_mb': peak_mb,
+            }
+        return results
+    finally:
+        server.close()
+
+
+def compare(results, baseline, tolerance):
+    """Names of cases whose median time exceeds the baseline by more than `tolerance`."""
+    regressions = []
+    for case, r in results.items():
+        base = baseline.get(case)
+        if base and r['median_s'] > base['median_s'] * (1 + tolerance):
+            regressions.append(case)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks")
+    parser.add_argument('--quick', action='store_true', help="2y/10y weekly only, 3 repeats")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--universe', type=int, default=200, help="tickers in the synthetic master sheet")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument('--json', help="also write raw results to this path")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        matrix, repeat = [(2, 'weekly'), (10, 'weekly')], 3
+    else:
+        matrix, repeat = [(y, f) for y in (2, 10, 30) for f in PAYOUT_FREQS], args.repeat
+
+    results = {}
+    for years, freq in matrix:
+        results.update(run_case(years, freq, repeat, args.universe))
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = set(compare(results, baseline, args.tolerance))
+
+    print(f"{'case':<40}{'median ms':>12}{'rows/s':>14}{'peak MiB':>10}{'vs base':>10}")
+    for case, r in results.items():
+        base = baseline.get(case)
+        delta = f"{r['median_s'] / base['median_s'] - 1:+.0%}" if base else "-"
+        flag = "  REGRESSION" if case in regressions else ""
+        print(f"{case:<40}{r['median_s'] * 1e3:>12.2f}{r['rows_per_s']:>14,.0f}{r['peak_mb']:>10.1f}{delta:>10}{flag}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Plotly figure builders for the simulator views (no Streamlit dependency).
+
+Long histories are thinned to at most a min/max pair per pixel column before
+they are sent to the browser, and figures switch to WebGL traces once a trace
+still has more than `WEBGL_MIN_POINTS` points.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+CHART_WIDTH_PX = 1400     # widest the main column renders (desktop, sidebar pinned)
+WEBGL_MIN_POINTS = 1000
+
+
+def decimation_indices(ys, width_px=CHART_WIDTH_PX):
+    """Row positions that keep the min and max of every series in `ys` per pixel column.
+
+    All series must share one x axis. First and last rows are always kept, so
+    end values (and anything computed from them) are unchanged.
+    """
+    n = len(ys[0])
+    if n <= 2 * width_px:
+        return np.arange(n)
+    size = -(-n // width_px)
+    offsets = np.arange(width_px) * size
+    keep = [np.array([0, n - 1])]
+    for y in ys:
+        grid = np.full(width_px * size, np.nan)
+        grid[:n] = np.asarray(y, dtype=float)
+        grid = grid.reshape(width_px, size)
+        filled = ~np.isnan(grid).all(axis=1)
+        keep.append(np.nanargmin(grid[filled], axis=1) + offsets[filled])
+        keep.append(np.nanargmax(grid[filled], axis=1) + offsets[filled])
+    return np.unique(np.concatenate(keep))
+
+
+def _thin(x, ys, width_px=CHART_WIDTH_PX):
+    idx = decimation_indices(ys, width_px)
+    return _take(x, idx), [_take(y, idx) for y in ys]
+
+
+def _take(values, idx):
+    return values.iloc[idx] if hasattr(values, 'iloc') else np.asarray(values)[idx]
+
+
+def _scatter_type(*lengths):
+    """WebGL for the whole figure once any trace is long; fills only work between traces of one type."""
+    return go.Scattergl if max(lengths, default=0) > WEBGL_MIN_POINTS else go.Scatter
+
+
+def single_asset_figure(journey, initial_cap, total_pl, use_drip, overlay=None):
+    """Asset price vs True Value chart with the PROFIT/LOSS badge.
+
+    `overlay` is an optional (name, dates, values) underlying trace in dollars.
+    """
+    fig = go.Figure()
+    bottom_y = journey['Market_Value'] if not use_drip else journey['Base_Asset_Value']
+    price_color = '#8AC7DE' if journey.iloc[-1]['Closing Price'] >= journey.iloc[0]['Closing Price'] else '#FF4B4B'
+    
+    # Both lines share x so the fill between them stays aligned
+    x, (bottom_y, true_y) = _thin(journey['Date'], [bottom_y, journey['True_Value']])
+    if overlay is not None:
+        name, dates, values = overlay
+        dates, (values,) = _thin(dates, [values])
+    Trace = _scatter_type(len(x), len(dates) if overlay is not None else 0)
+    
+    fig.add_trace(Trace(x=x, y=bottom_y, mode='lines', name='Asset Price', line=dict(color=price_color, width=2)))
+    fig.add_trace(Trace(x=x, y=true_y, mode='lines', name='True Value', line=dict(color='#00C805', width=3), fill='tonexty', fillcolor='rgba(0, 200, 5, 0.1)'))
+    fig.add_hline(y=initial_cap, line_dash="dash", line_color="white", opacity=0.3)
+    
+    profit_bg = "#00C805" if total_pl >= 0 else "#FF4B4B"
+    fig.add_annotation(
+        x=0.02, y=0.95, xref="paper", yref="paper", text=f"PROFIT: +${total_pl:,.2f}" if total_pl >= 0 else f"LOSS: -${abs(total_pl):,.2f}", showarrow=False,
+        font=dict(family="Arial Black, sans-serif", size=16, color="white"), bgcolor=profit_bg, bordercolor=profit_bg, borderpad=8, opacity=0.9, align="left"
+    )
+    
+    if overlay is not None:
+        fig.add_trace(Trace(x=dates, y=values, mode='lines', name=name, line=dict(color='#FFD700', width=2, dash='dash')))
+                    
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=340, 
+        margin=dict(l=0, r=0, t=20, b=0), 
+        showlegend=False, 
+        hovermode="x unified", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def comparison_figure(lines):
+    """Head-to-Head total-return chart.
+
+    `lines` is a list of (name, dates, return_pct, color, dashed) tuples; dashed
+    lines are the underlying overlays.
+    """
+    fig = go.Figure()
+    thinned = [(name, *_thin(dates, [values]), color, dashed) for name, dates, values, color, dashed in lines]
+    Trace = _scatter_type(*(len(x) for _, x, _, _, _ in thinned))
+    for name, x, (y,), color, dashed in thinned:
+        line = dict(color=color, width=2, dash='dash') if dashed else dict(color=color, width=3)
+        fig.add_trace(Trace(x=x, y=y, mode='lines', name=name, line=line))
+    
+    fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5, annotation_text="Break Even")
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=400, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="Total Return (%)", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def entry_outcomes_figure(outcomes, metric='Total Return %', band_rows=63):
+    """Every-entry-date chart: each entry's outcome plus a rolling 10th-90th percentile band.
+
+    `band_rows` is the number of neighbouring entry dates (about a quarter of
+    trading days by default) the percentiles are taken over.
+    """
+    fig = go.Figure()
+    values = outcomes[metric]
+    rolling = values.rolling(band_rows, center=True, min_periods=1)
+    x, (y, p10, p50, p90) = _thin(outcomes['Entry Date'], [values, rolling.quantile(0.1), rolling.quantile(0.5), rolling.quantile(0.9)])
+    Trace = _scatter_type(len(x))
+
+    fig.add_trace(Trace(x=x, y=p10, mode='lines', name='10th pct', line=dict(color='#8AC7DE', width=0), showlegend=False))
+    fig.add_trace(Trace(x=x, y=p90, mode='lines', name='10th-90th pct', line=dict(color='#8AC7DE', width=0), fill='tonexty', fillcolor='rgba(138, 199, 222, 0.2)'))
+    fig.add_trace(Trace(x=x, y=p50, mode='lines', name='Rolling median', line=dict(color='#F59E0B', width=2)))
+    fig.add_trace(Trace(x=x, y=y, mode='lines', name='Entry outcome', line=dict(color='#00C805', width=1), opacity=0.6))
+
+    fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5, annotation_text="Break Even")
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=400, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        xaxis_title="Entry Date", 
+        yaxis_title=metric, 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def projection_figure(journey, fan):
+    """Historical True Value followed by the Monte Carlo fan (5-95 and 25-75 bands, median).
+
+    `fan` holds `Date` and dollar `Value pNN` columns from `project_unit_paths`.
+    """
+    fig = go.Figure()
+    x, (y,) = _thin(journey['Date'], [journey['True_Value']])
+    Trace = _scatter_type(len(x), len(fan))
+
+    fig.add_trace(Trace(x=x, y=y, mode='lines', name='True Value', line=dict(color='#00C805', width=3)))
+    for lo, hi, alpha in (('Value p5', 'Value p95', 0.15), ('Value p25', 'Value p75', 0.3)):
+        fig.add_trace(Trace(x=fan['Date'], y=fan[lo], mode='lines', line=dict(color='#8AC7DE', width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(Trace(x=fan['Date'], y=fan[hi], mode='lines', name=f"{lo.split()[1][1:]}th-{hi.split()[1][1:]}th pct", line=dict(color='#8AC7DE', width=0), fill='tonexty', fillcolor=f'rgba(138, 199, 222, {alpha})'))
+    fig.add_trace(Trace(x=fan['Date'], y=fan['Value p50'], mode='lines', name='Median Path', line=dict(color='#F59E0B', width=2, dash='dash')))
+
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=400, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="True Value ($)", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def portfolio_figure(journey, allocation, initial_cap):
+    """Stacked dollar value of each holding with the portfolio's True Value on top.
+
+    Stacked areas have no WebGL variant, so this figure always uses SVG traces;
+    decimation keeps it light.
+    """
+    fig = go.Figure()
+    series = [allocation[t] for t in allocation.columns] + [journey['True_Value']]
+    x, ys = _thin(journey['Date'], series)
+    colors = ['#00C805', '#F59E0B', '#8AC7DE', '#FF4B4B', '#A855F7', '#EC4899', '#EAB308']
+    for i, (ticker, y) in enumerate(zip(allocation.columns, ys[:-1])):
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=ticker, stackgroup='holdings', line=dict(color=colors[i % len(colors)], width=0.5)))
+    fig.add_trace(go.Scatter(x=x, y=ys[-1], mode='lines', name='True Value', line=dict(color='#FFFFFF', width=3)))
+    fig.add_hline(y=initial_cap, line_dash="dash", line_color="white", opacity=0.3)
+
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=400, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="Value ($)", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def drawdown_figure(drawdowns, styles):
+    """Underwater chart: each column of `drawdowns` (% below its running peak) as one line.
+
+    `styles` maps a column name to (color, dashed); dashed lines are the underlying overlays.
+    """
+    fig = go.Figure()
+    series = [drawdowns[name] for name in drawdowns.columns]
+    x, ys = _thin(drawdowns.index, series)
+    Trace = _scatter_type(len(x))
+    for name, y in zip(drawdowns.columns, ys):
+        color, dashed = styles.get(name, ('#8AC7DE', False))
+        line = dict(color=color, width=2, dash='dash') if dashed else dict(color=color, width=2)
+        fig.add_trace(Trace(x=x, y=y, mode='lines', name=name, line=line))
+
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=300, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="Drawdown (%)", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def correlation_figure(correlation):
+    """Heatmap of a name x name correlation matrix, annotated with the coefficients."""
+    fig = go.Figure(go.Heatmap(
+        z=correlation.to_numpy(), x=list(correlation.columns), y=list(correlation.index),
+        zmin=-1, zmax=1, colorscale=[[0, '#FF4B4B'], [0.5, '#1E293B'], [1, '#00C805']],
+        text=correlation.to_numpy(), texttemplate="%{text:.2f}", hovertemplate="%{y} vs %{x}: %{z:.2f}<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=300, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True, autorange='reversed')
+    )
+    return fig
+
+
+def distribution_yield_figure(rolling, events):
+    """Trailing-12-month and forward yield on price, over bars of each payout amount.
+
+    `rolling` comes from `DistributionIndex.rolling_yield` and `events` from
+    `DistributionIndex.events` for the same window.
+    """
+    fig = go.Figure()
+    x, (ttm, fwd) = _thin(rolling['Date'], [rolling['TTM Yield %'], rolling['Forward Yield %']])
+    Trace = _scatter_type(len(x))
+    fig.add_trace(go.Bar(x=events['Date of Pay'], y=events['Amount'], name='Payout ($/share)', marker_color='rgba(138, 199, 222, 0.35)', yaxis='y2'))
+    fig.add_trace(Trace(x=x, y=fwd, mode='lines', name='Forward Yield', line=dict(color='#F59E0B', width=2, dash='dot')))
+    fig.add_trace(Trace(x=x, y=ttm, mode='lines', name='TTM Yield', line=dict(color='#00C805', width=3)))
+
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=340, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="Yield on Price (%)", 
+        yaxis2=dict(overlaying='y', side='right', showgrid=False, fixedrange=True, title="Payout ($)"),
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def erosion_figure(erosion):
+    """Price change vs distributions paid since the window start, both in % of the starting price.
+
+    When the red area (price lost) is deeper than the green line (paid out) is high,
+    NAV erosion is outrunning the payouts.
+    """
+    fig = go.Figure()
+    x, ys = _thin(erosion['Date'], [erosion['Price Return %'], erosion['Distributions %'], erosion['Total Return %']])
+    price, paid, total = ys
+    Trace = _scatter_type(len(x))
+    fig.add_trace(Trace(x=x, y=price, mode='lines', name='Price Change', line=dict(color='#FF4B4B', width=2), fill='tozeroy', fillcolor='rgba(255, 75, 75, 0.15)'))
+    fig.add_trace(Trace(x=x, y=paid, mode='lines', name='Distributions Paid', line=dict(color='#00C805', width=2)))
+    fig.add_trace(Trace(x=x, y=total, mode='lines', name='Net (Total Return)', line=dict(color='#FFFFFF', width=2, dash='dash')))
+    fig.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5)
+
+    fig.update_layout(
+        template="plotly_dark", 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        height=340, 
+        margin=dict(l=0, r=0, t=30, b=0), 
+        hovermode="x unified", 
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")), 
+        yaxis_title="% of Starting Price", 
+        xaxis=dict(fixedrange=True), 
+        yaxis=dict(fixedrange=True)
+    )
+    return fig
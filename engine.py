@@ -0,0 +1,875 @@
+"""Headless data loading and compounding engine.
+
+Everything here runs without Streamlit or Plotly so batch jobs, benchmarks and
+the app share one implementation. `app.py` only adds caching and UI on top.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+HISTORY_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQe4koGj386xkUGn3XXhysM-54_DIbYawunKX49C2Kt6KH9i097JDNnhbKQpRVn7WH05noFpgY3p1_e/pub?gid=970184313&single=true&output=csv"
+MASTER_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQe4koGj386xkUGn3XXhysM-54_DIbYawunKX49C2Kt6KH9i097JDNnhbKQpRVn7WH05noFpgY3p1_e/pub?gid=618318322&single=true&output=csv"
+
+# Issuer / section header rows that leak into the master sheet's Ticker column
+BAD_HEADERS = [
+    'DEFIANCE',
+    'YIELDMAX',
+    'ROUNDHILL',
+    'KURV',
+    'PROSHARES',
+    'GLOBALX',
+    'REX',
+    'TIDAL',
+    'ELEVATE',
+    'SIMPLIFY',
+    'ISHARES',
+    'VANGUARD',
+    'VANECK',
+    'INVESCO',
+    'COMPANY',
+    'STRATEGY',
+    'CALAMOS',
+    'GRAYSCALE',
+    'INVESCO',
+    'KRANESHARES',
+    'VISTASHARES',
+]
+
+META_COLUMNS = ['Strategy', 'Company', 'Issuer', 'Underlying']
+EMPTY_META = dict.fromkeys(META_COLUMNS, '-')
+EMPTY_HISTORY_COLUMNS = ['Date of Pay', 'Amount', 'Ticker']
+EMPTY_PAY_SHEET = pd.DataFrame({'Ticker': pd.Series(dtype=str), 'Date of Pay': pd.Series(dtype='datetime64[ns]')})
+PAY_DATE_TOLERANCE = pd.Timedelta(days=21)  # longest ex-date -> pay-date gap we accept as a match
+TRADING_DAYS = 252
+TTM = pd.Timedelta(days=365)
+PAYOUT_FREQUENCIES = [    # (longest median gap in days, label, payouts per year)
+    (10, 'Weekly', 52),
+    (45, 'Monthly', 12),
+    (120, 'Quarterly', 4),
+    (250, 'Semi-Annual', 2),
+    (np.inf, 'Annual', 1),
+]
+SHARE_SCALED_COLUMNS = ('Shares', 'Cash_Pocketed', 'Market_Value', 'Base_Asset_Value', 'True_Value')
+HOLDING_PERIODS = {
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    '2Y': pd.DateOffset(years=2),
+    '3Y': pd.DateOffset(years=3),
+}
+REBALANCE_FREQUENCIES = {'Never': None, 'Monthly': 'M', 'Quarterly': 'Q', 'Annually': 'Y'}
+DIVIDEND_POLICIES = ('cash', 'same', 'portfolio', 'sweep')
+PROJECTION_PERCENTILES = (5, 25, 50, 75, 95)
+PROJECTION_BLOCK_DAYS = 21       # bootstrap block length; keeps a month of return autocorrelation and payout cadence
+PROJECTION_CHUNK_PATHS = 2000    # paths compounded per array pass (bounds memory at ~20 MB per array)
+PROJECTION_POOL_MIN_PATHS = 20000  # below this, shipping chunks to worker processes costs more than it saves
+
+
+# --- SHEETS ---
+def load_base_sheets(m_url=MASTER_URL, h_url=HISTORY_URL):
+    """Loads and cleans the master and pay-date history sheets.
+
+    Returns (df_m, df_h_sheet), or (None, None) when the master sheet has no
+    Ticker column. Network and parse errors propagate to the caller.
+    """
+    df_m = pd.read_csv(m_url)
+    df_h_sheet = pd.read_csv(h_url)
+
+    # 1. Clean invisible spaces off column headers
+    df_m.columns = df_m.columns.str.strip()
+    df_h_sheet.columns = df_h_sheet.columns.str.strip()
+
+    # 2. Rename mapped columns
+    m_rename_map = {'Fund Strategy': 'Strategy', 'Asset Class': 'Strategy', 'Fund Name': 'Company', 'Name': 'Company', 'Fund Family': 'Issuer', 'Fund Issuer': 'Issuer'}
+    df_m = df_m.rename(columns=m_rename_map)
+    df_h_sheet = df_h_sheet.rename(columns={'Pay Date': 'Date of Pay', 'Payment Date': 'Date of Pay', 'Payout Date': 'Date of Pay', 'Date': 'Date of Pay'})
+
+    if 'Ticker' not in df_m.columns:
+        return None, None
+
+    # 3. Clean Ticker Data & Explicit Denylist
+    df_m['Ticker'] = df_m['Ticker'].astype(str).str.strip().str.upper()
+
+    # Remove explicit bad headers
+    df_m = df_m[~df_m['Ticker'].isin(BAD_HEADERS)]
+    # Remove any entry containing a space
+    df_m = df_m[~df_m['Ticker'].str.contains(' ', na=False)]
+    df_m['Issuer'] = fund_issuers(df_m)
+
+    # 4. Clean History Dates
+    if 'Date of Pay' in df_h_sheet.columns and 'Ticker' in df_h_sheet.columns:
+        df_h_sheet['Date of Pay'] = pd.to_datetime(df_h_sheet['Date of Pay']).dt.tz_localize(None)
+        df_h_sheet['Ticker'] = df_h_sheet['Ticker'].astype(str).str.strip().str.upper()
+        df_h_sheet = df_h_sheet.sort_values(['Ticker', 'Date of Pay'])
+    else:
+        df_h_sheet = pd.DataFrame(columns=['Date of Pay', 'Ticker'])
+
+    return df_m, df_h_sheet
+
+
+def fund_issuers(df_m):
+    """Normalized issuer per master row ('YIELDMAX', 'KURV', ...), so every fund of a family compares equal.
+
+    Uses the sheet's issuer column where it has one and falls back to the fund
+    family, the first word of the fund name ('YieldMax MSTR Option Income ETF').
+    """
+    family = pd.Series(np.nan, index=df_m.index, dtype=object)
+    if 'Company' in df_m.columns:
+        family = df_m['Company'].astype(object).str.split().str[0]
+    issuer = family
+    if 'Issuer' in df_m.columns:
+        issuer = df_m['Issuer'].astype(object).where(df_m['Issuer'].notna(), family)
+    return issuer.str.upper().str.replace(r'[^A-Z0-9]', '', regex=True).replace('', np.nan)
+
+
+# --- PAY-DATE ALIGNMENT ---
+def index_metadata(df_m):
+    """{ticker: {Strategy, Company, Issuer, Underlying}} from each ticker's first master row; blanks become '-'."""
+    first = df_m.drop_duplicates('Ticker').set_index('Ticker').reindex(columns=META_COLUMNS)
+
+    def clean(val):
+        if pd.isna(val) or str(val).strip() == '' or str(val).lower() == 'nan':
+            return '-'
+        return val
+
+    return {t: {col: clean(val) for col, val in row.items()} for t, row in first.iterrows()}
+
+def index_underlyings(meta):
+    """{underlying: [funds]} reverse index over `index_metadata`, in master-sheet order."""
+    funds = {}
+    for ticker, row in meta.items():
+        if row['Underlying'] != '-':
+            funds.setdefault(row['Underlying'], []).append(ticker)
+    return funds
+
+def index_pay_sheet(df_h_sheet):
+    """Splits the pay-date sheet into {ticker: sorted pay dates} once per sheet load."""
+    if df_h_sheet.empty:
+        return {}
+    rows = df_h_sheet[['Ticker', 'Date of Pay']].dropna().drop_duplicates()
+    rows = rows.sort_values(['Ticker', 'Date of Pay'], kind='stable')
+    return {t: g.reset_index(drop=True) for t, g in rows.groupby('Ticker', sort=False)}
+
+def payout_frequency(pay_dates):
+    """(label, payouts per year) from the median gap between pay dates; ('-', nan) with fewer than two."""
+    pay_dates = np.sort(np.asarray(pay_dates, dtype='datetime64[ns]'))
+    if len(pay_dates) < 2:
+        return '-', np.nan
+    gap = np.median(np.diff(pay_dates)) / np.timedelta64(1, 'D')
+    return next((label, per_year) for limit, label, per_year in PAYOUT_FREQUENCIES if gap <= limit)
+
+def index_pay_frequencies(pay_index):
+    """{ticker: (label, payouts per year)} from the sheet's pay schedule, once per sheet load."""
+    return {t: payout_frequency(g['Date of Pay'].to_numpy()) for t, g in pay_index.items()}
+
+def align_pay_dates(ex_divs, pay_sheet, tolerance=PAY_DATE_TOLERANCE):
+    """As-of join of Yahoo ex-dates onto sheet pay dates, for any number of tickers at once.
+
+    Each ex-date takes the first sheet pay date on or after it within `tolerance`;
+    a pay date claimed by several ex-dates goes to the latest of them. Ex-dates
+    left without a pay date fall back to themselves, so a missing or extra sheet
+    row only affects its own payout.
+
+    Returns (aligned, unmatched): `aligned` has Date of Pay, Ticker, Amount,
+    Ex Date and Matched; `unmatched` lists sheet rows no ex-date claimed, for
+    the tickers present in `ex_divs`.
+    """
+    left = ex_divs[['Ticker', 'Ex Date', 'Amount']].sort_values('Ex Date', kind='stable')
+    right = pay_sheet[['Ticker', 'Date of Pay']].dropna().drop_duplicates()
+    right = right[right['Ticker'].isin(left['Ticker'].unique())]
+    right = right.astype({'Date of Pay': left['Ex Date'].dtype, 'Ticker': left['Ticker'].dtype}).sort_values('Date of Pay', kind='stable')
+
+    aligned = pd.merge_asof(left, right, left_on='Ex Date', right_on='Date of Pay', by='Ticker', direction='forward', tolerance=tolerance)
+    contested = aligned['Date of Pay'].notna() & aligned.duplicated(['Ticker', 'Date of Pay'], keep='last')
+    aligned.loc[contested, 'Date of Pay'] = pd.NaT
+    aligned['Matched'] = aligned['Date of Pay'].notna()
+    aligned['Date of Pay'] = aligned['Date of Pay'].fillna(aligned['Ex Date'])
+    aligned = aligned.sort_values(['Ticker', 'Ex Date'], kind='stable').reset_index(drop=True)
+
+    claimed = aligned.loc[aligned['Matched'], ['Ticker', 'Date of Pay']].assign(_claimed=True)
+    unmatched = right.merge(claimed, on=['Ticker', 'Date of Pay'], how='left')
+    unmatched = unmatched[unmatched['_claimed'].isna()].drop(columns='_claimed').reset_index(drop=True)
+    return aligned[['Date of Pay', 'Ticker', 'Amount', 'Ex Date', 'Matched']], unmatched
+
+
+# --- ASSETS ---
+def build_asset_frames(ticker, hist, pay_index):
+    """Turns stored bars into the (prices, pay-dated dividends) pair the engine consumes.
+
+    Prices carry only Date, Closing Price and Ticker; metadata lives in `index_metadata`.
+    """
+    if hist.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # Build Prices
+    prices = hist[['Date', 'Close']].copy().rename(columns={'Close': 'Closing Price'})
+    prices['Ticker'] = ticker
+    prices['Closing Price'] = pd.to_numeric(prices['Closing Price'], errors='coerce').fillna(0.0)
+
+    # Build Dividends (Matching YF Amount to Sheet Pay Date)
+    if 'Dividends' in hist.columns:
+        divs = hist.loc[hist['Dividends'] > 0, ['Date', 'Dividends']].rename(columns={'Date': 'Ex Date', 'Dividends': 'Amount'})
+        divs['Ticker'] = ticker
+        df_h_single, _ = align_pay_dates(divs, pay_index.get(ticker, EMPTY_PAY_SHEET))
+    else:
+        df_h_single = pd.DataFrame(columns=EMPTY_HISTORY_COLUMNS)
+
+    return prices, df_h_single
+
+def load_asset_frames(ticker, pay_index, store, refresh=True):
+    """Store-backed loader shared by `fetch_single_asset`, the screener job and batch runs.
+
+    `refresh=False` serves only the bars already stored and never touches the network.
+    """
+    return build_asset_frames(ticker, store.load(ticker) if refresh else store.history(ticker), pay_index)
+
+def build_overlay_frames(ticker, hist):
+    """Stored bars of an underlying -> (prices, dividends on their ex-dates), or (None, None)."""
+    if hist.empty:
+        return None, None
+    df_u = hist[['Date', 'Close']].rename(columns={'Close': 'Closing Price'}).reset_index(drop=True)
+    df_u['Ticker'] = ticker
+    divs = hist[hist['Dividends'] > 0][['Date', 'Dividends']]
+    if not divs.empty:
+        df_h = divs.rename(columns={'Date': 'Date of Pay', 'Dividends': 'Amount'}).reset_index(drop=True)
+        df_h['Ticker'] = ticker
+    else:
+        df_h = pd.DataFrame(columns=EMPTY_HISTORY_COLUMNS)
+    return df_u, df_h
+
+
+class AssetSeries:
+    """Compact, read-only arrays for one ticker's prices and payouts.
+
+    The ticker is stored once, dates as datetime64 and amounts as float64, so a
+    cached series costs a fraction of the equivalent frames. `frames()` hands out
+    the (prices, history) pair as shallow copies of frames built once over the
+    arrays (categorical Ticker column). The arrays are marked read-only and
+    pandas 3 always copies on write, so a caller's edits never reach them.
+    `distributions` is the ticker's `DistributionIndex`, built with the series.
+    """
+    __slots__ = ('ticker', 'dates', 'close', 'pay_dates', 'amounts', 'ex_dates', 'matched', 'distributions', '_frames')
+
+    def __init__(self, ticker, dates, close, pay_dates, amounts, ex_dates=None, matched=None, frequency=None):
+        self.ticker = ticker
+        self.dates = _frozen(dates, 'datetime64[ns]')
+        self.close = _frozen(close, np.float64)
+        self.pay_dates = _frozen(pay_dates, 'datetime64[ns]')
+        self.amounts = _frozen(amounts, np.float64)
+        self.ex_dates = None if ex_dates is None else _frozen(ex_dates, 'datetime64[ns]')
+        self.matched = None if matched is None else _frozen(matched, bool)
+        self.distributions = DistributionIndex(self.dates, self.close, self.pay_dates, self.amounts, frequency)
+        self._frames = None
+
+    @classmethod
+    def from_frames(cls, ticker, prices, history, frequency=None):
+        """From a `build_asset_frames` / `build_overlay_frames` pair (history may lack Ex Date/Matched).
+
+        `frequency` is the sheet's (label, payouts per year), if known; otherwise it is inferred from the payouts.
+        """
+        has_ex = 'Ex Date' in history.columns
+        return cls(
+            ticker,
+            prices['Date'].to_numpy(),
+            prices['Closing Price'].to_numpy(),
+            history['Date of Pay'].to_numpy() if len(history) else [],
+            history['Amount'].to_numpy() if len(history) else [],
+            history['Ex Date'].to_numpy() if has_ex else None,
+            history['Matched'].to_numpy() if has_ex else None,
+            frequency,
+        )
+
+    @property
+    def nbytes(self):
+        arrays = (self.dates, self.close, self.pay_dates, self.amounts, self.ex_dates, self.matched)
+        return sum(a.nbytes for a in arrays if a is not None) + self.distributions.nbytes
+
+    def frames(self):
+        """(prices, history) frames in the same layout the loaders build, without copying the arrays."""
+        if self._frames is None:
+            self._frames = self._build_frames()
+        prices, history = self._frames
+        return prices.copy(deep=False), history.copy(deep=False)
+
+    def _build_frames(self):
+        prices = pd.DataFrame({
+            'Date': self.dates,
+            'Closing Price': self.close,
+            'Ticker': self._ticker_column(len(self.dates)),
+        }, copy=False)
+        if self.ex_dates is None:
+            history = pd.DataFrame({'Date of Pay': self.pay_dates, 'Amount': self.amounts, 'Ticker': self._ticker_column(len(self.pay_dates))}, copy=False)
+        else:
+            history = pd.DataFrame({
+                'Date of Pay': self.pay_dates,
+                'Ticker': self._ticker_column(len(self.pay_dates)),
+                'Amount': self.amounts,
+                'Ex Date': self.ex_dates,
+                'Matched': self.matched,
+            }, copy=False)
+        return prices, history
+
+    def _ticker_column(self, n):
+        return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[self.ticker])
+
+class DistributionIndex:
+    """One ticker's distribution events, precomputed once, with prefix sums for range lookups.
+
+    Per payout (pay-date order): `pay_dates`, `amounts`, `prices` (close on or
+    before the pay date), `ttm` (amounts paid in the 365 days up to and
+    including it) and `streak` (+n for the n-th raise in a row, -n for cuts,
+    0 when flat). `cum_amounts` is the running total with a leading zero, so
+    the amount paid over any date range, or trailing year at any set of dates,
+    is two `searchsorted` lookups instead of a rescan.
+    """
+    __slots__ = ('frequency', 'per_year', 'dates', 'close', 'pay_dates', 'amounts', 'prices', 'ttm', 'streak', 'cum_amounts')
+
+    def __init__(self, dates, close, pay_dates, amounts, frequency=None):
+        order = np.argsort(pay_dates, kind='stable')
+        self.dates, self.close = dates, close
+        self.pay_dates = _frozen(np.asarray(pay_dates)[order], 'datetime64[ns]')
+        self.amounts = _frozen(np.asarray(amounts)[order], np.float64)
+        self.frequency, self.per_year = frequency if frequency is not None and frequency[0] != '-' else payout_frequency(self.pay_dates)
+
+        pos = dates.searchsorted(self.pay_dates, side='right') - 1
+        self.prices = _frozen(np.r_[np.nan, close][pos + 1], np.float64)
+        self.cum_amounts = _frozen(np.concatenate([[0.0], np.cumsum(self.amounts)]), np.float64)
+        self.ttm = _frozen(self.paid_trailing(self.pay_dates), np.float64)
+
+        # Signed run lengths of consecutive raises / cuts
+        sign = np.zeros(len(self.amounts))
+        sign[1:] = np.sign(np.round(np.diff(self.amounts), 6))
+        run_start = np.maximum.accumulate(np.where(np.r_[True, sign[1:] != sign[:-1]], np.arange(len(sign)), 0))
+        self.streak = _frozen(sign * (np.arange(len(sign)) - run_start + 1), np.int64)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.pay_dates, self.amounts, self.prices, self.ttm, self.streak, self.cum_amounts))
+
+    def paid_between(self, start, end):
+        """Total paid with pay dates in [start, end]; `end` may be an array of dates."""
+        lo = self.pay_dates.searchsorted(np.datetime64(start, 'ns'), side='left')
+        hi = self.pay_dates.searchsorted(np.asarray(end, dtype='datetime64[ns]'), side='right')
+        return self.cum_amounts[hi] - self.cum_amounts[lo]
+
+    def paid_trailing(self, when):
+        """Amount paid in the 365 days up to and including each date in `when`."""
+        when = np.asarray(when, dtype='datetime64[ns]')
+        hi = self.pay_dates.searchsorted(when, side='right')
+        lo = self.pay_dates.searchsorted(when - TTM.to_timedelta64(), side='right')
+        return self.cum_amounts[hi] - self.cum_amounts[lo]
+
+    def events(self, start=None, end=None):
+        """Payout table for pay dates in [start, end]: amount, price and yield at payout, TTM figures and streak."""
+        lo = 0 if start is None else self.pay_dates.searchsorted(np.datetime64(start, 'ns'), side='left')
+        hi = len(self) if end is None else self.pay_dates.searchsorted(np.datetime64(end, 'ns'), side='right')
+        sl = slice(lo, hi)
+        prev = np.r_[np.nan, self.amounts[:-1]][sl]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.DataFrame({
+                'Date of Pay': self.pay_dates[sl],
+                'Amount': self.amounts[sl],
+                'Change %': (self.amounts[sl] / prev - 1) * 100,
+                'Streak': self.streak[sl],
+                'Price at Payout': self.prices[sl],
+                'Yield at Payout %': self.amounts[sl] / self.prices[sl] * 100,
+                'TTM Amount': self.ttm[sl],
+                'TTM Yield %': self.ttm[sl] / self.prices[sl] * 100,
+            })
+
+    def rolling_yield(self, start, end):
+        """Per trading day in [start, end]: trailing-12-month and forward (last payout x frequency) yield on price.
+
+        TTM Yield % is left blank until the payouts cover a full year.
+        """
+        lo = self.dates.searchsorted(np.datetime64(start, 'ns'), side='left')
+        hi = self.dates.searchsorted(np.datetime64(end, 'ns'), side='right')
+        dates, close = self.dates[lo:hi], self.close[lo:hi]
+        last = self.pay_dates.searchsorted(dates, side='right') - 1
+        full_year = len(self) > 0 and dates >= self.pay_dates[0] + TTM.to_timedelta64()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.DataFrame({
+                'Date': dates,
+                'Closing Price': close,
+                'TTM Yield %': np.where(full_year, self.paid_trailing(dates) / close * 100, np.nan),
+                'Forward Yield %': np.r_[np.nan, self.amounts][last + 1] * self.per_year / close * 100,
+            })
+
+    def erosion(self, start, end):
+        """Per trading day in [start, end], in % of the first close: price change, distributions paid since, and their sum."""
+        lo = self.dates.searchsorted(np.datetime64(start, 'ns'), side='left')
+        hi = self.dates.searchsorted(np.datetime64(end, 'ns'), side='right')
+        dates, close = self.dates[lo:hi], self.close[lo:hi]
+        if len(dates) == 0 or close[0] <= 0:
+            return pd.DataFrame(columns=['Date', 'Price Return %', 'Distributions %', 'Total Return %'])
+        price = (close / close[0] - 1) * 100
+        paid = self.paid_between(dates[0], dates) / close[0] * 100
+        return pd.DataFrame({'Date': dates, 'Price Return %': price, 'Distributions %': paid, 'Total Return %': price + paid})
+
+def _frozen(values, dtype):
+    arr = np.array(values, dtype=dtype)
+    arr.flags.writeable = False
+    return arr
+
+
+# --- COMPOUNDING ENGINE ---
+def calculate_journeys(tickers, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
+    """Simulates every ticker in one vectorized pass.
+
+    `initial_shares` is either a single share count or a {ticker: shares} mapping.
+    Returns {ticker: journey} for every ticker with prices in the window.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    prices = unified_df[unified_df['Ticker'].isin(tickers) & (unified_df['Date'] >= start_date) & (unified_df['Date'] <= end_date)]
+    if prices.empty: return {}
+    prices = prices.sort_values(['Ticker', 'Date'], kind='stable').reset_index(drop=True)
+
+    # Line each payout up with the close on its pay date (payouts on non-trading days are skipped)
+    divs = history_df[history_df['Ticker'].isin(tickers) & (history_df['Date of Pay'] >= start_date) & (history_df['Date of Pay'] <= end_date)]
+    divs = divs[['Ticker', 'Date of Pay', 'Amount']].rename(columns={'Date of Pay': 'Date'})
+    events = divs.merge(prices[['Ticker', 'Date', 'Closing Price']].reset_index(), on=['Ticker', 'Date'])
+
+    if isinstance(initial_shares, dict):
+        start_shares = prices['Ticker'].map(initial_shares).astype(float).to_numpy()
+    else:
+        start_shares = np.full(len(prices), float(initial_shares))
+
+    growth = np.ones(len(prices))
+    cash_per_share = np.zeros(len(prices))
+    if not events.empty:
+        if drip_enabled:
+            # Each payout buys (amount / close) new shares per share held
+            price = events['Closing Price'].to_numpy(dtype=float)
+            amount = events['Amount'].to_numpy(dtype=float)
+            factor = np.ones(len(events))
+            np.divide(amount, price, out=factor, where=price > 0)
+            factor = np.where(price > 0, 1.0 + factor, 1.0)
+            np.multiply.at(growth, events['index'].to_numpy(), factor)
+        else:
+            np.add.at(cash_per_share, events['index'].to_numpy(), events['Amount'].to_numpy(dtype=float))
+
+    by_ticker = pd.Series(growth).groupby(prices['Ticker'].to_numpy())
+    prices['Shares'] = start_shares * by_ticker.cumprod().to_numpy()
+    prices['Cash_Pocketed'] = start_shares * pd.Series(cash_per_share).groupby(prices['Ticker'].to_numpy()).cumsum().to_numpy()
+    prices['Market_Value'] = prices['Closing Price'] * prices['Shares']
+    prices['Base_Asset_Value'] = prices['Closing Price'] * start_shares
+    prices['True_Value'] = prices['Market_Value'] if drip_enabled else prices['Market_Value'] + prices['Cash_Pocketed']
+
+    return {t: j.reset_index(drop=True) for t, j in prices.groupby('Ticker', sort=False)}
+
+def scale_journey(unit_journey, shares):
+    """A journey run for one share, rescaled to `shares`; every position column is linear in the share count."""
+    journey = unit_journey.copy()
+    journey[list(SHARE_SCALED_COLUMNS)] = journey[list(SHARE_SCALED_COLUMNS)] * shares
+    return journey
+
+def slice_window(df, start_date, end_date, col='Date'):
+    """Rows of a date-sorted frame inside [start_date, end_date], found by binary search."""
+    lo = df[col].searchsorted(start_date, side='left')
+    hi = df[col].searchsorted(end_date, side='right')
+    return df.iloc[lo:hi]
+
+def entry_prices(unified_df, start_date, end_date):
+    """First close inside the window for every ticker in `unified_df`."""
+    window = unified_df[(unified_df['Date'] >= start_date) & (unified_df['Date'] <= end_date)]
+    return window.sort_values('Date', kind='stable').groupby('Ticker')['Closing Price'].first()
+
+def calculate_journey(ticker, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
+    """Single-ticker wrapper around `calculate_journeys`."""
+    journeys = calculate_journeys([ticker], start_date, end_date, initial_shares, drip_enabled, unified_df, history_df)
+    return journeys.get(ticker, pd.DataFrame())
+
+def summarize_journey(journey, initial_shares, drip_enabled):
+    """End-of-window figures for one journey (yield annualized over first-to-last trading day)."""
+    first, last = journey.iloc[0], journey.iloc[-1]
+    initial_cap = first['Closing Price'] * initial_shares
+    days_held = (last['Date'] - first['Date']).days
+    cash = last['Cash_Pocketed']
+    return {
+        'Ticker': first['Ticker'],
+        'Start': first['Date'],
+        'End': last['Date'],
+        'DRIP': bool(drip_enabled),
+        'Initial Capital': initial_cap,
+        'Initial Shares': initial_shares,
+        'Final Shares': last['Shares'],
+        'Cash Pocketed': cash,
+        'Market Value': last['Market_Value'],
+        'True Value': last['True_Value'],
+        'Total Return %': (last['True_Value'] - initial_cap) / initial_cap * 100 if initial_cap > 0 else np.nan,
+        'Annualized Yield %': cash / initial_cap * (365.25 / days_held) * 100 if days_held > 0 and initial_cap > 0 else 0.0,
+    }
+
+def simulate_windows(prices, history, windows, drip_modes, amount):
+    """Summary rows for one ticker over every (label, start, end) window and DRIP mode.
+
+    `start=None` means inception. Windows with no prices are skipped.
+    """
+    rows = []
+    if prices.empty:
+        return rows
+    ticker = prices['Ticker'].iloc[0]
+    for label, start, end in windows:
+        start = prices['Date'].iloc[0] if start is None else start
+        window = slice_window(prices, start, end)
+        if window.empty or window['Closing Price'].iloc[0] <= 0:
+            continue
+        shares = amount / window['Closing Price'].iloc[0]
+        for drip in drip_modes:
+            journey = calculate_journey(ticker, start, end, shares, drip, prices, history)
+            if not journey.empty:
+                rows.append({'Window': label, **summarize_journey(journey, shares, drip)})
+    return rows
+
+
+# --- PANELS ---
+def build_panel(prices, history):
+    """Long price/dividend frames -> aligned (dates, tickers, close, cash, log_growth) arrays.
+
+    `cash` holds dividends per share on their pay date and `log_growth` the DRIP
+    factor log(1 + amount / close). Payouts on non-trading days are skipped, the
+    same as `calculate_journeys`.
+    """
+    close = prices.pivot_table(index='Date', columns='Ticker', values='Closing Price', aggfunc='last').sort_index()
+    dates, tickers = close.index, close.columns
+    close_arr = close.to_numpy(dtype=float)
+
+    cash = np.zeros_like(close_arr)
+    log_growth = np.zeros_like(close_arr)
+    if not history.empty:
+        rows = dates.get_indexer(history['Date of Pay'])
+        cols = tickers.get_indexer(history['Ticker'])
+        ok = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[ok], cols[ok]
+        amount = history['Amount'].to_numpy(dtype=float)[ok]
+        px = close_arr[rows, cols]
+        traded = np.isfinite(px)
+        np.add.at(cash, (rows[traded], cols[traded]), amount[traded])
+        ratio = np.zeros(len(px))
+        np.divide(amount, px, out=ratio, where=traded & (px > 0))
+        np.add.at(log_growth, (rows, cols), np.log1p(ratio))
+    return dates, tickers, close_arr, cash, log_growth
+
+
+# --- RISK ---
+def risk_panel(journeys, risk_free_rate=0.0):
+    """Risk figures for every journey from one aligned value matrix.
+
+    `journeys` is {name: journey} (funds and overlays alike, any share count).
+    Their True Values are pivoted onto the union of their dates once; every
+    figure is then a column-wise array operation and the correlations a single
+    `corrcoef` over the days all of them traded. `risk_free_rate` is annual,
+    as a fraction. Returns (metrics, correlation, drawdowns):
+
+    * metrics, indexed by name: Max Drawdown %, Recovery Days (calendar days
+      from the deepest trough back to the prior peak, NaN if not yet),
+      Volatility %, Sharpe, Sortino, Yield on Cost % (annualized distributions,
+      cash or reinvested, over the starting value) and YoC Drift (second half
+      of the window minus the first, in percentage points);
+    * correlation: name x name matrix of daily total returns;
+    * drawdowns: Date-indexed frame of each name's % below its running peak.
+    """
+    names = list(journeys)
+    if not names:
+        empty = pd.DataFrame()
+        return empty, empty, empty
+    long = pd.concat([j[['Date', 'True_Value', 'Cash_Pocketed', 'Shares', 'Closing Price']] for j in journeys.values()], keys=names, names=['Name', None])
+    long = long.reset_index(level='Name')
+    by_name = long.groupby('Name', sort=False)
+    # Distributions received each day in dollars, whether pocketed or reinvested
+    long['Income'] = by_name['Cash_Pocketed'].diff().fillna(0.0) + by_name['Shares'].diff().fillna(0.0) * long['Closing Price']
+    wide = long.pivot(index='Date', columns='Name', values=['True_Value', 'Income']).sort_index()
+    dates = wide.index
+    value = wide['True_Value'].reindex(columns=names).to_numpy(dtype=float)
+    income = wide['Income'].reindex(columns=names).fillna(0.0).to_numpy(dtype=float)
+    rows, cols = np.arange(len(dates))[:, None], np.arange(len(names))
+
+    # Drawdowns and recovery
+    peak = np.fmax.accumulate(value, axis=0)
+    drawdown = value / peak - 1
+    trough = np.where(np.isnan(drawdown), np.inf, drawdown).argmin(axis=0)
+    max_dd = drawdown[trough, cols]
+    recovered = (value >= peak[trough, cols]) & (rows > trough)
+    recovery_row = recovered.argmax(axis=0)
+    recovery_days = np.where(recovered.any(axis=0), (dates[recovery_row] - dates[trough]).days, np.nan)
+    recovery_days = np.where(max_dd == 0, 0, recovery_days)
+
+    # Return statistics; a name with fewer than two daily returns (a journey of a day or two) gets NaN
+    returns = value[1:] / value[:-1] - 1
+    enough = np.isfinite(returns).sum(axis=0) >= 2
+    mean, vol, downside = np.full((3, len(names)), np.nan)
+    r = returns[:, enough]
+    mean[enough] = np.nanmean(r, axis=0)
+    vol[enough] = np.nanstd(r, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    downside[enough] = np.sqrt(np.nanmean(np.minimum(r - risk_free_rate / TRADING_DAYS, 0.0) ** 2, axis=0)) * np.sqrt(TRADING_DAYS)
+    excess = mean * TRADING_DAYS - risk_free_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(vol > 0, excess / vol, np.nan)
+        sortino = np.where(downside > 0, excess / downside, np.nan)
+
+    # Yield on cost: distributions over the starting value, whole window and each half
+    valid = ~np.isnan(value)
+    first = valid.argmax(axis=0)
+    last = len(dates) - 1 - valid[::-1].argmax(axis=0)
+    mid = (first + last) // 2
+    cum_income = np.cumsum(income, axis=0)
+    cost = value[first, cols]
+
+    def annual_yield(a, b):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(b > a, (cum_income[b, cols] - cum_income[a, cols]) / cost * TRADING_DAYS / (b - a) * 100, np.nan)
+
+    metrics = pd.DataFrame({
+        'Max Drawdown %': max_dd * 100,
+        'Recovery Days': recovery_days,
+        'Volatility %': vol * 100,
+        'Sharpe': sharpe,
+        'Sortino': sortino,
+        'Yield on Cost %': annual_yield(first, last),
+        'YoC Drift': annual_yield(mid, last) - annual_yield(first, mid),
+    }, index=pd.Index(names, name='Ticker'))
+
+    common = np.isfinite(returns).all(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # A flat series has no variance, so its correlations come out NaN
+        corr = np.atleast_2d(np.corrcoef(returns[common], rowvar=False)) if common.sum() > 2 else np.full((len(names), len(names)), np.nan)
+    correlation = pd.DataFrame(corr, index=names, columns=names)
+    drawdowns = pd.DataFrame(drawdown * 100, index=dates, columns=names)
+    return metrics, correlation, drawdowns
+
+
+# --- ENTRY-DATE ANALYSIS ---
+def entry_date_outcomes(prices, history, holding, drip_enabled):
+    """Outcome of buying on every trading day and holding for `holding` (a DateOffset).
+
+    Equivalent to one `calculate_journey` per entry date, but computed from
+    prefix sums of cash per share and of log DRIP factors, so any window is
+    two lookups. Exits are the last trading day on or before entry + holding;
+    entries whose holding period runs past the last bar are left out.
+    Returns Entry Date, Exit Date, Entry Price, Total Return %, Cash Yield %
+    and Price Return %.
+    """
+    columns = ['Entry Date', 'Exit Date', 'Entry Price', 'Total Return %', 'Cash Yield %', 'Price Return %']
+    if prices.empty:
+        return pd.DataFrame(columns=columns)
+    prices = prices.sort_values('Date', kind='stable').drop_duplicates('Date', keep='last')
+    dates = pd.DatetimeIndex(prices['Date'])
+    close = prices['Closing Price'].to_numpy(dtype=float)
+
+    cash, log_growth = _daily_payouts(dates, close, history)
+    cum_cash = np.concatenate([[0.0], np.cumsum(cash)])
+    cum_growth = np.concatenate([[0.0], np.cumsum(log_growth)])
+
+    exit_target = dates + holding
+    end = dates.searchsorted(exit_target, side='right') - 1
+    start = np.arange(len(close))
+    ok = (exit_target <= dates[-1]) & (close > 0)
+    start, end = start[ok], end[ok]
+
+    p0, p1 = close[start], close[end]
+    paid = cum_cash[end + 1] - cum_cash[start]
+    if drip_enabled:
+        total = p1 * np.exp(cum_growth[end + 1] - cum_growth[start]) / p0 - 1
+    else:
+        total = (p1 + paid) / p0 - 1
+    return pd.DataFrame({
+        'Entry Date': dates[start],
+        'Exit Date': dates[end],
+        'Entry Price': p0,
+        'Total Return %': total * 100,
+        'Cash Yield %': paid / p0 * 100,
+        'Price Return %': (p1 / p0 - 1) * 100,
+    })
+
+def _daily_payouts(dates, close, history):
+    """Cash per share and log DRIP factor per trading row, lined up the same way as `calculate_journeys`."""
+    cash = np.zeros(len(close))
+    log_growth = np.zeros(len(close))
+    if not history.empty:
+        rows = dates.get_indexer(history['Date of Pay'])
+        ok = rows >= 0
+        rows = rows[ok]
+        amount = history['Amount'].to_numpy(dtype=float)[ok]
+        px = close[rows]
+        np.add.at(cash, rows, amount)
+        ratio = np.zeros(len(rows))
+        np.divide(amount, px, out=ratio, where=px > 0)
+        np.add.at(log_growth, rows, np.log1p(ratio))
+    return cash, log_growth
+
+
+# --- PROJECTION ---
+def project_unit_paths(prices, history, horizon_days, drip_enabled, n_paths=10000, block_days=PROJECTION_BLOCK_DAYS, step=5, seed=0, pool=None):
+    """Block-bootstrap projection of value and income for $1 of the position today.
+
+    Daily price returns and payout yields are resampled together in blocks of
+    `block_days` consecutive trading days from the ticker's own history, then
+    compounded as (paths x days) arrays. Returns percentile fans every `step`
+    trading days: Day, Date and `Value pNN` / `Income pNN` columns for each of
+    `PROJECTION_PERCENTILES`. Value includes income in cash mode; with DRIP the
+    income is what got reinvested. `pool` (a long-lived `projection_pool()`)
+    spreads path chunks over worker processes; every chunk has its own seed,
+    so the fan is the same with or without it.
+    """
+    prices = prices.sort_values('Date', kind='stable').drop_duplicates('Date', keep='last')
+    prices = prices[prices['Closing Price'] > 0]
+    if len(prices) < 2 or horizon_days < 1:
+        return pd.DataFrame()
+    dates = pd.DatetimeIndex(prices['Date'])
+    close = prices['Closing Price'].to_numpy(dtype=float)
+    cash, _ = _daily_payouts(dates, close, history)
+    returns = close[1:] / close[:-1]
+    yields = cash[1:] / close[1:]
+    block_days = max(1, min(block_days, len(returns)))
+
+    sample_at = np.unique(np.r_[np.arange(step - 1, horizon_days, step), horizon_days - 1])
+    sizes = [min(PROJECTION_CHUNK_PATHS, n_paths - i) for i in range(0, n_paths, PROJECTION_CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(returns, yields, horizon_days, size, block_days, drip_enabled, sample_at, s) for size, s in zip(sizes, seeds)]
+    if pool is not None and len(jobs) > 1:
+        chunks = list(pool.map(_project_chunk, *zip(*jobs)))
+    else:
+        chunks = [_project_chunk(*job) for job in jobs]
+    value = np.concatenate([v for v, _ in chunks])
+    income = np.concatenate([i for _, i in chunks])
+
+    fan = pd.DataFrame({
+        'Day': sample_at + 1,
+        'Date': pd.bdate_range(dates[-1], periods=horizon_days + 1)[1:][sample_at],
+    })
+    for name, paths in (('Value', value), ('Income', income)):
+        for q, row in zip(PROJECTION_PERCENTILES, np.percentile(paths, PROJECTION_PERCENTILES, axis=0)):
+            fan[f'{name} p{q}'] = row
+    return fan
+
+def projection_pool(processes=None):
+    """Worker processes for `project_unit_paths`, meant to be created once and reused.
+
+    Spawned, not forked: forking the Streamlit server while its other threads
+    hold locks can deadlock a child. Each worker imports numpy once, up front.
+    """
+    return ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+
+def _project_chunk(returns, yields, horizon_days, n_paths, block_days, drip_enabled, sample_at, seed):
+    """Compounds one chunk of bootstrap paths; returns (value, income) sampled at `sample_at`."""
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-horizon_days // block_days)
+    starts = rng.integers(0, len(returns) - block_days + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_days)).reshape(n_paths, -1)[:, :horizon_days]
+
+    price = np.cumprod(returns[idx], axis=1)
+    y = yields[idx]
+    if drip_enabled:
+        # Payouts buy (amount / close) new shares; income is what the shares held before the payout received
+        shares = np.cumprod(1.0 + y, axis=1)
+        income = np.cumsum(price * shares / (1.0 + y) * y, axis=1)
+        value = price * shares
+    else:
+        income = np.cumsum(price * y, axis=1)
+        value = price + income
+    return value[:, sample_at].astype(np.float32), income[:, sample_at].astype(np.float32)
+
+
+# --- PORTFOLIO ---
+def simulate_portfolio(prices, history, weights, start_date, end_date, initial_capital, rebalance=None, dividends='cash'):
+    """Simulates a weighted basket on one date-aligned price/dividend panel.
+
+    `weights` maps ticker -> weight (normalized here). `rebalance` is a pandas
+    period code ('M', 'Q', 'Y') or None; holdings are reset to target weights at
+    the close of the first trading day of each new period. `dividends` is one of
+    `DIVIDEND_POLICIES`:
+
+    - 'cash': payouts are pocketed
+    - 'same': reinvested in the fund that paid them
+    - 'portfolio': reinvested across the basket at target weights
+    - 'sweep': held as cash and swept back in at the next rebalance
+
+    The basket starts on the first day every holding has a price. Holdings with
+    no price in the window are left out and the other weights rescaled. Returns
+    (journey, allocation, dropped): journey has Date, Market_Value, Cash, Income
+    (cumulative payouts received), True_Value and Rebalanced; allocation is the
+    dollar value of each holding by date; dropped lists the holdings left out.
+    journey and allocation are empty if no holding has data.
+    """
+    weights = {t: w for t, w in weights.items() if w > 0}
+    prices = prices[prices['Ticker'].isin(list(weights)) & (prices['Date'] >= start_date) & (prices['Date'] <= end_date)]
+    present = set(prices['Ticker'].unique())
+    dropped = [t for t in weights if t not in present]
+    if prices.empty:
+        return pd.DataFrame(columns=['Date', 'Market_Value', 'Cash', 'Income', 'True_Value', 'Rebalanced']), pd.DataFrame(), dropped
+    history = history[history['Ticker'].isin(list(weights)) & (history['Date of Pay'] >= start_date) & (history['Date of Pay'] <= end_date)]
+    dates, tickers, close, cash, log_growth = build_panel(prices, history)
+
+    # Start once every holding trades; fill the odd missing bar with the last close
+    first = np.isfinite(close).argmax(axis=0).max()
+    dates, close, cash, log_growth = dates[first:], close[first:], cash[first:], log_growth[first:]
+    close = pd.DataFrame(close).ffill().to_numpy()
+    w = np.array([weights[t] for t in tickers], dtype=float)
+    w /= w.sum()
+
+    n_days = len(dates)
+    starts = [0]
+    if rebalance is not None:
+        periods = dates.to_period(rebalance)
+        starts += list(np.flatnonzero(periods[1:] != periods[:-1]) + 1)
+    bounds = list(zip(starts, starts[1:] + [n_days]))
+
+    shares = np.empty_like(close)
+    income = np.zeros(n_days)
+    balance = np.zeros(n_days)
+    carried = 0.0
+    for a, b in bounds:
+        if a == 0:
+            value = float(initial_capital)
+        else:
+            value = shares[a - 1] @ close[a]
+            if dividends == 'sweep':
+                value += carried
+                carried = 0.0
+        seg_shares, seg_income = _compound_segment(w * value / close[a], close[a:b], cash[a:b], log_growth[a:b], w, dividends)
+        shares[a:b] = seg_shares
+        income[a:b] = seg_income
+        if dividends in ('cash', 'sweep'):
+            balance[a:b] = carried + np.cumsum(seg_income)
+            carried = balance[b - 1]
+
+    allocation = pd.DataFrame(shares * close, index=dates, columns=tickers)
+    market_value = allocation.to_numpy().sum(axis=1)
+    rebalanced = np.zeros(n_days, dtype=bool)
+    rebalanced[starts[1:]] = True
+    journey = pd.DataFrame({
+        'Date': dates,
+        'Market_Value': market_value,
+        'Cash': balance,
+        'Income': np.cumsum(income),
+        'True_Value': market_value + balance,
+        'Rebalanced': rebalanced,
+    })
+    return journey, allocation, dropped
+
+def _compound_segment(start_shares, close, cash, log_growth, weights, dividends):
+    """Shares held and payouts received on each day of one rebalance segment."""
+    if dividends == 'same':
+        growth = np.exp(log_growth)
+        shares = start_shares * np.exp(np.cumsum(log_growth, axis=0))
+        return shares, (shares / growth * cash).sum(axis=1)
+    if dividends == 'portfolio':
+        # Payout days couple the holdings, so step through them; shares stay flat in between
+        shares = np.empty_like(close)
+        income = np.zeros(len(close))
+        held, last = start_shares.copy(), 0
+        for r in np.flatnonzero(cash.any(axis=1)):
+            shares[last:r] = held
+            income[r] = held @ cash[r]
+            held = held + weights * income[r] / close[r]
+            last = r
+        shares[last:] = held
+        return shares, income
+    shares = np.broadcast_to(start_shares, close.shape)
+    return shares, (shares * cash).sum(axis=1)
@@ -0,0 +1,121 @@
+"""Bulk result export: every fund over every window, cash and DRIP, streamed to CSV or Parquet.
+
+Each ticker's rows are written as soon as its turn comes (a CSV chunk or a
+Parquet row group), and only a few tickers are loaded ahead of the writer, so
+the results are never collected into one frame. Where the file goes is up to
+the caller: the app's download button still holds the finished file in memory.
+
+    frames = iter_results(tickers, load_asset, export_windows(as_of), [False, True], 10000)
+    rows, failed = write_results(frames, "results.parquet")
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from engine import simulate_windows
+from screener import WINDOWS
+
+FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+TEXT_COLUMNS = ['Window', 'Ticker', 'Error']
+DATE_COLUMNS = ['Start', 'End']
+FLOAT_COLUMNS = [
+    'Initial Capital', 'Initial Shares', 'Final Shares', 'Cash Pocketed',
+    'Market Value', 'True Value', 'Total Return %', 'Annualized Yield %',
+]
+EXPORT_COLUMNS = ['Window', 'Ticker', 'Start', 'End', 'DRIP'] + FLOAT_COLUMNS + ['Error']
+
+
+def export_windows(as_of, labels=WINDOWS):
+    """(label, start, end) for each relative window ending at `as_of`; start None means inception."""
+    return [(label, None if WINDOWS[label] is None else as_of - WINDOWS[label], as_of) for label in labels]
+
+
+def ticker_rows(ticker, load_asset, windows, drip_modes, amount):
+    """Summary rows for one ticker; a failure becomes a single row with an Error message."""
+    try:
+        prices, history = load_asset(ticker)
+        if prices.empty:
+            return [{'Ticker': ticker, 'Error': 'no price data'}]
+        return simulate_windows(prices, history, windows, drip_modes, amount)
+    except Exception as e:
+        return [{'Ticker': ticker, 'Error': str(e)}]
+
+
+def result_frame(rows):
+    """Rows -> a frame with every `EXPORT_COLUMNS` column and fixed dtypes, so chunks share one schema."""
+    frame = pd.DataFrame(rows).reindex(columns=EXPORT_COLUMNS)
+    frame[TEXT_COLUMNS] = frame[TEXT_COLUMNS].astype(object)
+    for col in DATE_COLUMNS:
+        frame[col] = pd.to_datetime(frame[col]).astype('datetime64[ns]')
+    frame['DRIP'] = frame['DRIP'].astype('boolean')
+    frame[FLOAT_COLUMNS] = frame[FLOAT_COLUMNS].astype(float)
+    return frame
+
+
+def map_ahead(pool, fn, items, ahead):
+    """`pool.map(fn, items)` in order, but with at most `ahead` calls submitted and not yet consumed.
+
+    `Executor.map` submits every item up front, so a slow consumer lets finished
+    results pile up and every load start at once.
+    """
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_results(tickers, load_asset, windows, drip_modes, amount, max_workers=4):
+    """Yields one `result_frame` per ticker, in ticker order.
+
+    `load_asset(ticker)` returns (prices, history). Tickers load on a small
+    thread pool, at most two per worker ahead of the frame being consumed.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for rows in map_ahead(pool, lambda t: ticker_rows(t, load_asset, windows, drip_modes, amount), tickers, 2 * max_workers):
+            yield result_frame(rows)
+
+
+def write_results(frames, sink, fmt=None):
+    """Streams `frames` to a path or binary file object. Returns (rows written, error rows).
+
+    `fmt` is 'csv' or 'parquet'; by default it follows the path's extension.
+    """
+    if fmt is None:
+        fmt = 'parquet' if str(sink).endswith('.parquet') else 'csv'
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if isinstance(sink, str):
+        with open(sink, 'wb') as f:
+            return write_results(frames, f, fmt)
+    return _write_parquet(frames, sink) if fmt == 'parquet' else _write_csv(frames, sink)
+
+
+def _write_csv(frames, sink):
+    sink.write(result_frame([]).to_csv(index=False).encode())
+    rows = failed = 0
+    for frame in frames:
+        sink.write(frame.to_csv(header=False, index=False).encode())
+        rows += len(frame)
+        failed += int(frame['Error'].notna().sum())
+    return rows, failed
+
+
+def _write_parquet(frames, sink):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {**dict.fromkeys(TEXT_COLUMNS, pa.string()), **dict.fromkeys(DATE_COLUMNS, pa.timestamp('ns')), 'DRIP': pa.bool_()}
+    schema = pa.schema([(col, types.get(col, pa.float64())) for col in EXPORT_COLUMNS])
+    rows = failed = 0
+    with pq.ParquetWriter(sink, schema) as writer:
+        for frame in frames:
+            if frame.empty:
+                continue
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            rows += len(frame)
+            failed += int(frame['Error'].notna().sum())
+    return rows, failed
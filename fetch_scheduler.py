@@ -0,0 +1,146 @@
+"""Process-wide scheduler for Yahoo requests: single-flight, token-bucket rate limit, jittered retries.
+
+Every network fetch in the process goes through one `FetchScheduler`:
+
+* `run(key, fn)` merges concurrent calls for the same key into one in-flight
+  call; everyone waiting gets its result (or its exception).
+* `call(fn, ...)` takes a token from a shared bucket before each attempt and
+  retries failures with full-jitter exponential backoff. A throttled response
+  also pauses the bucket, so a burst backs off as a whole instead of per caller.
+
+A fetch that gives up raises `FetchError`, so callers can tell "Yahoo has no
+data for this ticker" (an empty result) apart from "we could not ask".
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+RATE = float(os.environ.get("HYT_FETCH_RATE", 2.0))   # requests per second, process-wide
+BURST = int(os.environ.get("HYT_FETCH_BURST", 5))      # requests allowed back to back
+RETRIES = 3
+BACKOFF_BASE = 1.0      # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0
+THROTTLE_PAUSE = 10.0   # seconds the whole bucket pauses after a 429
+
+
+class FetchError(Exception):
+    """A fetch that failed or stayed throttled after every retry (not an empty result)."""
+
+    def __init__(self, message, throttled=False):
+        super().__init__(message)
+        self.throttled = throttled
+
+
+def is_throttled(exc):
+    """Yahoo's rate-limit error, or any HTTP 429, without importing yfinance here."""
+    return type(exc).__name__ == "YFRateLimitError" or getattr(exc, "code", None) == 429 or "Too Many Requests" in str(exc)
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate=RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    delay = self._paused_until - now
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Stops handing out tokens for `seconds` and empties the bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class FetchScheduler:
+    """Single-flight merging plus rate-limited, retried calls. Thread-safe; share one per process."""
+
+    def __init__(self, rate=RATE, burst=BURST, retries=RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.stats = {"calls": 0, "merged": 0, "errors": 0, "throttled": 0, "failed": 0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn):
+        """`fn()`, unless a call for `key` is already running, in which case its outcome is shared."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["merged"] += 1
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def call(self, fn, *args, **kwargs):
+        """`fn(*args, **kwargs)` behind the rate limit, retried with jittered backoff.
+
+        Raises `FetchError` (chained to the last error) once the retries run out.
+        """
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self._lock:
+                self.stats["calls"] += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                last, throttled = e, is_throttled(e)
+                with self._lock:
+                    self.stats["throttled" if throttled else "errors"] += 1
+                if throttled:
+                    self.bucket.pause(THROTTLE_PAUSE)
+            if attempt < self.retries:
+                self.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        with self._lock:
+            self.stats["failed"] += 1
+        raise FetchError(f"{'throttled' if throttled else 'failed'} after {self.retries + 1} attempts: {last}", throttled=throttled) from last
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler():
+    """The process-wide scheduler every `PriceStore` shares unless given its own."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = FetchScheduler()
+        return _default
@@ -0,0 +1,111 @@
+"""Per-rerun performance tracing: wall time, cache hit/miss and row counts per phase.
+
+A `RerunTrace` is bound to the running script through a context variable.
+Cached functions call `record_miss(...)` in their body (which only runs on a
+cache miss), and the phase that wraps the call reports hit or miss from that.
+Every finished phase is emitted as one JSON line, so p50/p95 per phase fall
+straight out of the logs.
+
+    trace = perf.start_rerun(mode="single")
+    with perf.phase("fetch_single_asset", cache_keys=[("fetch_single_asset", t)]) as rec:
+        prices, divs = fetch_single_asset(t)
+        rec["rows"] = len(prices)
+    trace.finish()
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+LOG_PATH = os.environ.get("HYT_PERF_LOG")  # JSON-lines file; unset logs to stderr via the "hyt.perf" logger
+
+logger = logging.getLogger("hyt.perf")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("hyt_rerun_trace", default=None)
+_file_lock = threading.Lock()
+
+
+class RerunTrace:
+    """Phase records for one script run."""
+
+    def __init__(self, **context):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.context = context
+        self.started = time.time()
+        self.phases = []
+        self._t0 = time.perf_counter()
+        self._misses = set()
+        self._lock = threading.Lock()
+        self.total_ms = None
+
+    def record_miss(self, key):
+        with self._lock:
+            self._misses.add(key)
+
+    @contextmanager
+    def phase(self, name, cache_keys=(), **fields):
+        """Times the block; `cache_keys` are the keys the wrapped cached calls report misses under."""
+        rec = {"phase": name, **fields}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            cache_keys = list(cache_keys)
+            if cache_keys:
+                with self._lock:
+                    misses = sum(k in self._misses for k in cache_keys)
+                rec["cache"] = "hit" if misses == 0 else "miss" if misses == len(cache_keys) else f"{misses}/{len(cache_keys)} miss"
+            with self._lock:
+                self.phases.append(rec)
+
+    def finish(self):
+        """Closes the trace and writes one JSON line per phase (plus a `rerun` total)."""
+        if self.total_ms is not None:
+            return
+        self.total_ms = round((time.perf_counter() - self._t0) * 1000, 2)
+        base = {"ts": self.started, "rerun_id": self.rerun_id, **self.context}
+        lines = [json.dumps({**base, **rec}, default=str) for rec in self.phases]
+        lines.append(json.dumps({**base, "phase": "rerun", "ms": self.total_ms}, default=str))
+        if LOG_PATH:
+            with _file_lock, open(LOG_PATH, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        else:
+            for line in lines:
+                logger.info(line)
+
+
+def start_rerun(**context):
+    """Starts a trace for the current script run and makes it the active one."""
+    trace = RerunTrace(**context)
+    _current.set(trace)
+    return trace
+
+
+def current():
+    return _current.get()
+
+
+def phase(name, cache_keys=(), **fields):
+    """`RerunTrace.phase` on the active trace, or a no-op record when nothing is tracing."""
+    trace = _current.get()
+    if trace is None:
+        return nullcontext({})
+    return trace.phase(name, cache_keys=cache_keys, **fields)
+
+
+def record_miss(*key):
+    """Called from inside a cached function body, i.e. only when the cache missed."""
+    trace = _current.get()
+    if trace is not None:
+        trace.record_miss(key)
@@ -0,0 +1,223 @@
+"""On-disk price/dividend store shared by every Streamlit worker on the host.
+
+Closes and dividends live in one SQLite file (WAL mode, so several processes
+can read while one writes). A refresh only asks Yahoo for bars after the last
+stored date; a full re-download happens only for new tickers or when history
+was restated (splits / adjusted closes). Downloads go through the shared
+`FetchScheduler`, so concurrent refreshes of one ticker make a single request
+and every request in the process respects one rate limit.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from fetch_scheduler import default_scheduler
+
+DEFAULT_PATH = os.environ.get(
+    "HYT_PRICE_STORE",
+    os.path.join(os.path.expanduser("~"), ".cache", "high-yield-terminal", "prices.sqlite"),
+)
+REFRESH_TTL = 900       # seconds before a ticker is checked for new bars again
+OVERLAP_DAYS = 7        # re-fetch this many days before the last stored bar
+RESTATE_TOLERANCE = 1e-4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL,
+    dividend REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    last_date TEXT,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+def yf_download(ticker, start=None):
+    """Default downloader: Yahoo daily bars (with actions) from `start`, or the full history.
+
+    Yahoo saying there is no data comes back as an empty frame; throttling and
+    network failures raise, so the scheduler can retry them.
+    """
+    import yfinance as yf
+    from yfinance.exceptions import YFPricesMissingError, YFTickerMissingError, YFTzMissingError
+    t = yf.Ticker(ticker)
+    try:
+        if start is None:
+            return t.history(period="max", auto_adjust=False, raise_errors=True)
+        return t.history(start=start, auto_adjust=False, raise_errors=True)
+    except (YFPricesMissingError, YFTickerMissingError, YFTzMissingError):
+        return pd.DataFrame()
+
+
+class PriceStore:
+    """Per-ticker closes and dividends with incremental refresh.
+
+    `downloader(ticker, start)` must return a yfinance-style history frame
+    (DatetimeIndex, `Close`, `Dividends`, optional `Stock Splits`); pass a
+    local stand-in to run without the network. It should return an empty
+    frame when there is no data and raise when the request itself failed.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, downloader=yf_download, refresh_ttl=REFRESH_TTL, scheduler=None):
+        self.path = path
+        self.downloader = downloader
+        self.refresh_ttl = refresh_ttl
+        self.scheduler = scheduler or default_scheduler()
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- READS ---
+    def history(self, ticker):
+        """Stored bars for `ticker` as a frame with `Date`, `Close`, `Dividends` (oldest first)."""
+        rows = self._conn().execute(
+            "SELECT date, close, dividend FROM bars WHERE ticker = ? ORDER BY date", (ticker,)
+        ).fetchall()
+        df = pd.DataFrame(rows, columns=["Date", "Close", "Dividends"])
+        df["Date"] = pd.to_datetime(df["Date"])
+        df["Close"] = df["Close"].astype(float)
+        df["Dividends"] = df["Dividends"].astype(float)
+        return df
+
+    def dividends(self):
+        """Every stored dividend across all tickers as `Ticker`, `Ex Date`, `Amount` (one query)."""
+        rows = self._conn().execute(
+            "SELECT ticker, date, dividend FROM bars WHERE dividend > 0 ORDER BY ticker, date"
+        ).fetchall()
+        df = pd.DataFrame(rows, columns=["Ticker", "Ex Date", "Amount"])
+        df["Ex Date"] = pd.to_datetime(df["Ex Date"])
+        df["Amount"] = df["Amount"].astype(float)
+        return df
+
+    def status(self, ticker):
+        """(last_date, refreshed_at) for `ticker`, or (None, None) if it was never fetched."""
+        row = self._conn().execute(
+            "SELECT last_date, refreshed_at FROM tickers WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def is_fresh(self, ticker):
+        _, refreshed_at = self.status(ticker)
+        return refreshed_at is not None and time.time() - refreshed_at < self.refresh_ttl
+
+    # --- WRITES ---
+    def refresh(self, ticker, force=False):
+        """Pulls any bars newer than what is stored. Returns True if the network was hit.
+
+        Concurrent calls for the same ticker share one refresh, forced or not. Raises
+        `FetchError` when Yahoo stayed unreachable or throttled through every retry.
+        """
+        key = (self.path, ticker)
+        refreshed = self.scheduler.run(key, lambda: self._refresh(ticker, force))
+        if force and not refreshed:
+            # Joined a normal refresh that found the ticker fresh; a forced one still asks Yahoo
+            refreshed = self.scheduler.run(key, lambda: self._refresh(ticker, True))
+        return refreshed
+
+    def _refresh(self, ticker, force):
+        last_date, refreshed_at = self.status(ticker)
+        if not force and refreshed_at is not None and time.time() - refreshed_at < self.refresh_ttl:
+            return False
+
+        if last_date is None:
+            self._replace(ticker, self._download(ticker, None))
+            return True
+
+        start = (pd.Timestamp(last_date) - pd.Timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        bars = _normalize(self._download(ticker, start))
+        if self._restated(ticker, bars, last_date):
+            self._replace(ticker, self._download(ticker, None))
+        else:
+            self._upsert(ticker, bars)
+        return True
+
+    def load(self, ticker):
+        """Refreshes `ticker` if it is due and returns its stored history.
+
+        A failed refresh falls back to whatever is already on disk; it only
+        raises (`FetchError`) when there is nothing stored to serve. An empty
+        frame means Yahoo has no data for the ticker.
+        """
+        try:
+            self.refresh(ticker)
+        except Exception:
+            if self.status(ticker)[0] is None:
+                raise
+        return self.history(ticker)
+
+    def _download(self, ticker, start):
+        return self.scheduler.call(self.downloader, ticker, start)
+
+    def _restated(self, ticker, bars, last_date):
+        """True when the overlap window disagrees with stored closes (split or re-adjustment)."""
+        if bars.empty:
+            return False
+        if (bars.loc[bars["date"] > last_date, "splits"] != 0).any():
+            return True
+        # The last stored bar may have been an intraday snapshot, so leave it out of the check
+        overlap = bars[bars["date"] < last_date]
+        if overlap.empty:
+            return False
+        stored = dict(self._conn().execute(
+            "SELECT date, close FROM bars WHERE ticker = ? AND date >= ? AND date < ?",
+            (ticker, overlap["date"].iloc[0], last_date),
+        ).fetchall())
+        for d, close in zip(overlap["date"], overlap["close"]):
+            old = stored.get(d)
+            if old is not None and abs(close - old) > RESTATE_TOLERANCE * max(abs(old), 1e-9):
+                return True
+        return False
+
+    def _replace(self, ticker, hist):
+        self._upsert(ticker, _normalize(hist), replace=True)
+
+    def _upsert(self, ticker, bars, replace=False):
+        conn = self._conn()
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            if not bars.empty:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO bars (ticker, date, close, dividend) VALUES (?, ?, ?, ?)",
+                    [(ticker, d, c, v) for d, c, v in zip(bars["date"], bars["close"], bars["dividend"])],
+                )
+            last_date = conn.execute("SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO tickers (ticker, last_date, refreshed_at) VALUES (?, ?, ?)",
+                (ticker, last_date, time.time()),
+            )
+
+
+def _normalize(hist):
+    """yfinance history -> plain rows keyed by ISO trading date."""
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=["date", "close", "dividend", "splits"])
+    idx = pd.DatetimeIndex(hist.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    out = pd.DataFrame({
+        "date": idx.strftime("%Y-%m-%d"),
+        "close": pd.to_numeric(hist["Close"], errors="coerce").to_numpy(),
+        "dividend": pd.to_numeric(hist["Dividends"], errors="coerce").fillna(0.0).to_numpy() if "Dividends" in hist.columns else 0.0,
+        "splits": pd.to_numeric(hist["Stock Splits"], errors="coerce").fillna(0.0).to_numpy() if "Stock Splits" in hist.columns else 0.0,
+    })
+    return out.drop_duplicates("date", keep="last")
@@ -0,0 +1,173 @@
+"""Universe-wide screener: one vectorized pass over the price panel, stored as a Parquet snapshot.
+
+The table is rebuilt by `ScreenerJob` on a background thread from the bars
+already in the price store; the page only reads the latest snapshot from disk.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine import build_panel
+
+SNAPSHOT_PATH = os.environ.get(
+    "HYT_SCREENER_SNAPSHOT",
+    os.path.join(os.path.expanduser("~"), ".cache", "high-yield-terminal", "screener.parquet"),
+)
+REBUILD_INTERVAL = 3600  # seconds between rebuilds (shared by every worker through the snapshot mtime)
+
+WINDOWS = {
+    '1M': pd.DateOffset(months=1),
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    'Since Inception': None,
+}
+METRICS = ['Total Return %', 'Cash Yield %', 'NAV Erosion %', 'DRIP vs Cash Spread']
+
+
+def compute_screener(prices, history, as_of=None):
+    """Ranks every ticker over every window in `WINDOWS`.
+
+    Returns a long frame: Ticker, Window, Start, End and the `METRICS` columns
+    (percentages; the spread is in percentage points, DRIP minus cash).
+    """
+    dates, tickers, close, cash, log_growth = build_panel(prices, history)
+    if len(tickers) == 0:
+        return pd.DataFrame(columns=['Ticker', 'Window', 'Start', 'End'] + METRICS)
+    as_of = dates[-1] if as_of is None else pd.Timestamp(as_of)
+
+    valid = np.isfinite(close) & (close > 0)
+    cum_cash = np.cumsum(cash, axis=0)
+    cum_growth = np.cumsum(log_growth, axis=0)
+    cols = np.arange(len(tickers))
+
+    # Last trading row on or before as_of, per ticker
+    in_range = valid & (dates <= as_of)[:, None]
+    has_end = in_range.any(axis=0)
+    end = len(dates) - 1 - np.argmax(in_range[::-1], axis=0)
+
+    frames = []
+    for label, offset in WINDOWS.items():
+        start_date = dates[0] if offset is None else as_of - offset
+        eligible = in_range & (dates >= start_date)[:, None]
+        has_start = eligible.any(axis=0)
+        start = np.argmax(eligible, axis=0)
+        ok = has_end & has_start & (start <= end)
+
+        p0, p1 = close[start, cols], close[end, cols]
+        paid = cum_cash[end, cols] - cum_cash[start, cols] + cash[start, cols]
+        growth = np.exp(cum_growth[end, cols] - cum_growth[start, cols] + log_growth[start, cols])
+        cash_return = (p1 + paid) / p0 - 1
+        drip_return = p1 * growth / p0 - 1
+
+        frames.append(pd.DataFrame({
+            'Ticker': tickers[ok],
+            'Window': label,
+            'Start': dates[start[ok]],
+            'End': dates[end[ok]],
+            'Total Return %': cash_return[ok] * 100,
+            'Cash Yield %': (paid / p0)[ok] * 100,
+            'NAV Erosion %': (p1 / p0 - 1)[ok] * 100,
+            'DRIP vs Cash Spread': (drip_return - cash_return)[ok] * 100,
+        }))
+    table = pd.concat(frames, ignore_index=True)
+    table['Window'] = pd.Categorical(table['Window'], categories=list(WINDOWS))
+    table[METRICS] = table[METRICS].astype('float32')
+    return table
+
+
+def write_snapshot(table, path=SNAPSHOT_PATH):
+    """Atomically replaces the snapshot so readers never see a half-written file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    table.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    return pd.read_parquet(path)
+
+
+def snapshot_age(path=SNAPSHOT_PATH):
+    """Seconds since the snapshot was written, or None if there is none yet."""
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class ScreenerJob:
+    """Background thread that rebuilds the snapshot whenever it is older than `interval`.
+
+    `load_asset(ticker)` must return the same (prices, history) pair as
+    `fetch_single_asset`, but from stored bars only: a rebuild never asks Yahoo,
+    so it cannot crowd interactive fetches out of the shared rate limit. Tickers
+    with nothing stored are left out of the table and handed to `prefetch`
+    (e.g. `CacheWarmer.prefetch`, which refreshes within its hourly budget).
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, interval=REBUILD_INTERVAL, max_workers=8):
+        self.path = path
+        self.interval = interval
+        self.max_workers = max_workers
+        self.universe = []
+        self.load_asset = None
+        self.prefetch = None
+        self.last_error = None
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def update(self, universe, load_asset, prefetch=None):
+        """Points the job at the current ticker list and loader, starting it on first use."""
+        with self._lock:
+            self.universe = list(universe)
+            self.load_asset = load_asset
+            self.prefetch = prefetch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="screener-job", daemon=True)
+                self._thread.start()
+
+    def trigger(self):
+        """Rebuild now instead of waiting for the snapshot to age out."""
+        self._wake.set()
+
+    def _run(self):
+        force = False
+        while True:
+            age = snapshot_age(self.path)
+            if force or age is None or age >= self.interval:
+                try:
+                    self.rebuild()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+            force = self._wake.wait(timeout=60)
+            self._wake.clear()
+
+    def rebuild(self):
+        with self._lock:
+            universe, load_asset, prefetch = list(self.universe), self.load_asset, self.prefetch
+
+        def load(ticker):
+            try:
+                return load_asset(ticker)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = dict(zip(universe, pool.map(load, universe)))
+        loaded = [r for r in results.values() if r is not None and not r[0].empty]
+        missing = [t for t, r in results.items() if r is None or r[0].empty]
+        if missing and prefetch is not None:
+            prefetch(missing)
+        if not loaded:
+            return
+        prices = pd.concat([p[['Date', 'Ticker', 'Closing Price']] for p, _ in loaded], ignore_index=True)
+        histories = [h for _, h in loaded if not h.empty]
+        history = pd.concat(histories, ignore_index=True) if histories else pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])
+        write_snapshot(compute_screener(prices, history), self.path)
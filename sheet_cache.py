@@ -0,0 +1,173 @@
+"""Stale-while-revalidate disk cache for the published Google Sheets CSVs.
+
+The last good copy of each sheet lives on local disk and is served right away.
+Once it is older than `REFRESH_INTERVAL`, a background thread re-requests every
+sheet in parallel with conditional headers (ETag / Last-Modified), so an
+unchanged sheet costs a 304 and a slow or failing Google never blocks a page.
+Only a sheet with no snapshot at all is fetched in the foreground. A body that
+does not parse as the expected CSV (an HTML error or sign-in page) never
+replaces a snapshot.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+DEFAULT_DIR = os.environ.get(
+    "HYT_SHEET_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "high-yield-terminal", "sheets"),
+)
+REFRESH_INTERVAL = 3600   # seconds before a snapshot is revalidated
+TIMEOUT = 30
+
+
+class SheetCache:
+    """Local snapshots of CSV URLs with background conditional refresh.
+
+    Point it at any HTTP server (e.g. a local `http.server`) to run without
+    Google; `opener` is the `urllib.request.urlopen` stand-in used for requests.
+    `required_columns` maps a URL to the header columns its CSV must have.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, refresh_interval=REFRESH_INTERVAL, timeout=TIMEOUT, opener=urllib.request.urlopen, required_columns=None):
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.opener = opener
+        self.required_columns = required_columns or {}
+        self.last_error = None
+        self._refreshing = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest()[:16] + ".csv")
+
+    def paths(self, urls):
+        """Local snapshot paths for `urls`, revalidating in the background when they are due.
+
+        Blocks only for URLs never fetched before; raises if one of those fails.
+        """
+        missing = [u for u in urls if not os.path.exists(self.path(u))]
+        if missing:
+            self.refresh(missing, raise_errors=True)
+        if any(self.is_due(u) for u in urls):
+            self.refresh_async(urls)
+        return [self.path(u) for u in urls]
+
+    def version(self, urls):
+        """Snapshot mtimes; they only change when a sheet's content did, so they make a cache key."""
+        return tuple(os.path.getmtime(self.path(u)) for u in urls)
+
+    def checked_at(self, url):
+        return self._meta(url).get("checked_at")
+
+    def is_due(self, url):
+        checked_at = self.checked_at(url)
+        return checked_at is None or time.time() - checked_at >= self.refresh_interval
+
+    def refresh_async(self, urls):
+        """Starts a background refresh unless one is already running."""
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh(urls)
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="sheet-refresh", daemon=True).start()
+
+    def refresh(self, urls, raise_errors=False):
+        """Conditionally re-fetches every URL in parallel. Returns {url: True if the content changed}.
+
+        Failures keep the old snapshot and are kept in `last_error`.
+        """
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            futures = {u: pool.submit(self._fetch, u) for u in urls}
+        changed, errors = {}, []
+        for url, future in futures.items():
+            try:
+                changed[url] = future.result()
+            except Exception as e:
+                errors.append(e)
+        self.last_error = errors[0] if errors else None
+        if errors and raise_errors:
+            raise errors[0]
+        return changed
+
+    def _fetch(self, url):
+        meta = self._meta(url)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        if not os.path.exists(self.path(url)):
+            headers = {}
+        try:
+            with self.opener(urllib.request.Request(url, headers=headers), timeout=self.timeout) as resp:
+                body = resp.read()
+                etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            self._write_meta(url, {**meta, "checked_at": time.time()})
+            return False
+
+        _check_csv(url, body, self.required_columns.get(url, ()))
+        # Servers that ignore conditional headers still leave an unchanged snapshot (and its mtime) alone
+        changed = _read(self.path(url)) != body
+        if changed:
+            _atomic_write(self.path(url), body)
+        self._write_meta(url, {"etag": etag, "last_modified": last_modified, "checked_at": time.time()})
+        return changed
+
+    def _meta(self, url):
+        try:
+            with open(self.path(url) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, url, meta):
+        _atomic_write(self.path(url) + ".json", json.dumps(meta).encode())
+
+
+def _check_csv(url, body, required):
+    """Raises ValueError unless `body` parses as a CSV with a header holding every `required` column."""
+    if not body.strip():
+        raise ValueError(f"empty response from {url}")
+    if body.lstrip()[:1] == b"<":
+        raise ValueError(f"HTML instead of CSV from {url}")
+    try:
+        columns = pd.read_csv(io.BytesIO(body)).columns.astype(str).str.strip()
+    except Exception as e:
+        raise ValueError(f"unreadable CSV from {url}: {e}") from e
+    if columns.str.startswith("Unnamed:").all():
+        raise ValueError(f"no header row in CSV from {url}")
+    missing = [col for col in required if col not in columns]
+    if missing:
+        raise ValueError(f"CSV from {url} is missing {', '.join(missing)}")
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
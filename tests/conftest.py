@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The stores read their locations at import; point them at a scratch directory before any test imports them
+_CACHE_DIR = tempfile.mkdtemp(prefix="hyt-tests-")
+os.environ["HYT_PRICE_STORE"] = os.path.join(_CACHE_DIR, "prices.sqlite")
+os.environ["HYT_SHEET_CACHE"] = os.path.join(_CACHE_DIR, "sheets")
+os.environ["HYT_SCREENER_SNAPSHOT"] = os.path.join(_CACHE_DIR, "screener.parquet")
@@ -0,0 +1,136 @@
+"""End-to-end reruns of `app.py` with local sheet snapshots and a stand-in yfinance."""
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+import yfinance
+from streamlit.testing.v1 import AppTest
+
+import fetch_scheduler
+from engine import HISTORY_URL, MASTER_URL
+from sheet_cache import SheetCache
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+MASTER = pd.DataFrame({
+    'Ticker': ['AAPY', 'MSTY', 'TSLY'],
+    'Fund Strategy': ['Option Income'] * 3,
+    'Fund Name': ['Kurv Yield Premium Strategy Apple ETF', 'YieldMax MSTR Option Income Strategy ETF', 'YieldMax TSLA Option Income Strategy ETF'],
+    'Underlying': ['AAPL', 'MSTR', 'TSLA'],
+})
+
+
+def history(ticker):
+    """Deterministic daily bars with a weekly payout, seeded by the ticker."""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    dates = pd.bdate_range('2022-01-03', pd.Timestamp('today').normalize(), tz='America/New_York')
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    dividends = np.zeros(len(dates))
+    dividends[::5] = close[::5] * 0.01
+    return pd.DataFrame({'Close': close, 'Dividends': dividends, 'Stock Splits': 0.0}, index=pd.Index(dates, name='Date'))
+
+
+class FakeTicker:
+    failing = set()
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period=None, start=None, **kwargs):
+        if self.ticker in self.failing:
+            raise ConnectionError("connection reset by peer")
+        bars = history(self.ticker)
+        return bars if start is None else bars[bars.index.tz_localize(None) >= pd.Timestamp(start)]
+
+
+def pay_dates(days_after_ex=1):
+    """The pay sheet: every payout `days_after_ex` calendar days after its ex-date."""
+    return pd.concat([
+        pd.DataFrame({'Ticker': t, 'Pay Date': (history(t).index[::5].tz_localize(None) + pd.Timedelta(days=days_after_ex)).strftime('%m/%d/%Y')})
+        for t in MASTER['Ticker']
+    ])
+
+
+def write_snapshot(url, frame):
+    """A fresh sheet snapshot, as a background refresh would leave it, so the sheet cache never goes to Google."""
+    sheets = SheetCache()
+    frame.to_csv(sheets.path(url), index=False)
+    with open(sheets.path(url) + ".json", "w") as f:
+        json.dump({"checked_at": time.time()}, f)
+
+
+@pytest.fixture
+def start_app(monkeypatch):
+    """Returns `start(failing=())`, which runs the app with `failing` tickers unreachable from the first rerun."""
+    write_snapshot(MASTER_URL, MASTER)
+    write_snapshot(HISTORY_URL, pay_dates())
+
+    monkeypatch.setattr(yfinance, "Ticker", FakeTicker)
+    # No retries or backoff sleeps: a failing ticker fails on its first attempt
+    monkeypatch.setattr(fetch_scheduler, "_default", fetch_scheduler.FetchScheduler(rate=1e9, burst=10**9, retries=0, sleep=lambda s: None))
+
+    def start(failing=()):
+        # Before the first rerun, or the cache warmer would store the tickers while they still load
+        monkeypatch.setattr(FakeTicker, "failing", set(failing))
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        return AppTest.from_file(APP, default_timeout=60).run()
+
+    return start
+
+
+def head_to_head(at, tickers, overlay=False):
+    at.sidebar.radio[0].set_value("⚔️ Head-to-Head").run()
+    at.sidebar.multiselect[0].set_value(tickers)
+    if overlay:
+        next(c for c in at.sidebar.checkbox if c.label.startswith("📊")).check()
+    return at.run()
+
+
+def test_head_to_head_charts_the_rest_when_one_ticker_fails(start_app):
+    at = head_to_head(start_app(failing={'TSLY', 'TSLA'}), ['AAPY', 'MSTY', 'TSLY'], overlay=True)
+
+    assert not at.exception
+    assert any('TSLY' in w.value and 'TSLA' in w.value for w in at.warning)
+    leaderboard = at.dataframe[0].value
+    assert set(leaderboard['Ticker']) == {'AAPY', 'MSTY', 'AAPL', 'MSTR'}
+
+
+def test_portfolio_leaves_out_a_failing_holding(start_app):
+    at = start_app(failing={'TSLY'})
+    at.sidebar.radio[0].set_value("🧺 Portfolio").run()
+    at.sidebar.multiselect[0].set_value(['AAPY', 'MSTY', 'TSLY']).run()
+
+    assert not at.exception
+    assert not at.error
+    assert any('TSLY' in w.value and 'Left out of the portfolio' in w.value for w in at.warning)
+
+
+def test_head_to_head_picks_up_a_ticker_once_its_fetch_recovers(start_app, monkeypatch):
+    at = head_to_head(start_app(failing={'TSLY'}), ['AAPY', 'MSTY', 'TSLY'])
+    assert set(at.dataframe[0].value['Ticker']) == {'AAPY', 'MSTY'}
+
+    monkeypatch.setattr(FakeTicker, "failing", set())
+    at.run()
+    assert not at.warning
+    assert set(at.dataframe[0].value['Ticker']) == {'AAPY', 'MSTY', 'TSLY'}
+
+
+def test_single_asset_picks_up_a_refreshed_pay_sheet(start_app):
+    def payout_dates(at):
+        events = next(df.value for df in at.dataframe if 'Price at Payout' in df.value.columns)
+        return sorted(events['Date of Pay'])
+
+    at = start_app()
+    before = payout_dates(at)
+    assert before
+
+    # The sheet moved every pay date a day later; the cached series must not keep the old ones
+    write_snapshot(HISTORY_URL, pay_dates(days_after_ex=2))
+    at.run()
+    assert not at.exception
+    assert payout_dates(at) == [d + pd.Timedelta(days=1) for d in before]
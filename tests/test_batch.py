@@ -0,0 +1,79 @@
+"""The batch CLI end to end: local sheet CSVs, a pre-filled price store, CSV and Parquet output."""
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance
+
+import fetch_scheduler
+from batch import main, parse_window
+from price_store import PriceStore
+
+DATES = pd.bdate_range('2023-01-02', '2024-06-28')
+AS_OF = '2024-06-28'
+
+
+class Unreachable:
+    def __init__(self, ticker):
+        pass
+
+    def history(self, *args, **kwargs):
+        raise ConnectionError("connection reset by peer")
+
+
+def bars(seed):
+    close = 20 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, len(DATES))))
+    dividends = np.where(np.arange(len(DATES)) % 21 == 20, 0.2, 0.0)
+    return pd.DataFrame({'Close': close, 'Dividends': dividends}, index=DATES)
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    """Sheets as local CSVs and AAA/BBB already stored and fresh, so only CCC would need Yahoo."""
+    master, history = tmp_path / 'master.csv', tmp_path / 'history.csv'
+    pd.DataFrame({'Ticker': ['AAA', 'BBB', 'CCC'], 'Fund Name': ['Alpha', 'Beta', 'Gamma']}).to_csv(master, index=False)
+    pd.DataFrame({'Ticker': 'AAA', 'Pay Date': (DATES[20::21] + pd.Timedelta(days=1)).strftime('%m/%d/%Y')}).to_csv(history, index=False)
+    store_path = str(tmp_path / 'prices.sqlite')
+    frames = {'AAA': bars(1), 'BBB': bars(2)}
+    store = PriceStore(store_path, downloader=lambda t, start=None: frames[t])
+    for ticker in frames:
+        store.refresh(ticker)
+
+    monkeypatch.setattr(yfinance, 'Ticker', Unreachable)
+    monkeypatch.setattr(fetch_scheduler, '_default', fetch_scheduler.FetchScheduler(rate=1e9, burst=10**9, retries=0, sleep=lambda s: None))
+    return ['--store', store_path, '--master-url', str(master), '--history-url', str(history), '--as-of', AS_OF]
+
+
+def test_parse_window():
+    as_of = pd.Timestamp(AS_OF)
+    assert parse_window('1y', as_of) == ('1Y', as_of - pd.DateOffset(years=1), as_of)
+    assert parse_window('inception', as_of) == ('Since Inception', None, as_of)
+    assert parse_window('2024-01-01:2024-03-31', as_of) == ('2024-01-01:2024-03-31', pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-31'))
+    with pytest.raises(Exception):
+        parse_window('sometime', as_of)
+
+
+@pytest.mark.parametrize('ext', ['csv', 'parquet'])
+def test_batch_writes_every_ticker_window_and_mode(tmp_path, setup, capsys, ext):
+    out = tmp_path / f'results.{ext}'
+    main(setup + ['--window', '1Y', '--window', '2024-01-01:2024-03-31', '--drip', 'both', '--amount', '5000', '--out', str(out)])
+
+    frame = pd.read_csv(out, parse_dates=['Start', 'End']) if ext == 'csv' else pd.read_parquet(out)
+    ok = frame[frame['Error'].isna()]
+    assert sorted(zip(ok['Ticker'], ok['Window'], ok['DRIP'])) == sorted(
+        (t, w, d) for t in ('AAA', 'BBB') for w in ('1Y', '2024-01-01:2024-03-31') for d in (False, True)
+    )
+    assert (ok['Initial Capital'] == 5000).all()
+    assert (ok['End'] <= pd.Timestamp(AS_OF)).all()
+    cash = ok[~ok['DRIP'].astype(bool)].set_index(['Ticker', 'Window'])['Cash Pocketed']
+    assert (cash > 0).all()
+    failed = frame[frame['Error'].notna()]
+    assert list(failed['Ticker']) == ['CCC']
+    assert '8 rows (1 failed)' in capsys.readouterr().out
+
+
+def test_batch_process_pool_matches_single_process(tmp_path, setup):
+    single, pooled = tmp_path / 'single.csv', tmp_path / 'pooled.csv'
+    args = setup + ['--tickers', 'AAA', 'BBB', '--window', '1Y', '--window', 'inception']
+    main(args + ['--out', str(single)])
+    main(args + ['--out', str(pooled), '--processes', '2'])
+    pd.testing.assert_frame_equal(pd.read_csv(single), pd.read_csv(pooled))
@@ -0,0 +1,484 @@
+"""Engine results checked against plain per-row reference loops and hand-worked cases."""
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import (
+    TTM,
+    TRADING_DAYS,
+    AssetSeries,
+    align_pay_dates,
+    calculate_journeys,
+    entry_date_outcomes,
+    project_unit_paths,
+    projection_pool,
+    risk_panel,
+    simulate_portfolio,
+    simulate_windows,
+)
+
+DATES = pd.bdate_range('2024-01-01', periods=80)
+
+
+def price_frame(ticker, start=10.0, drift=0.002, dates=DATES):
+    rng = np.random.default_rng(len(ticker) * 7 + ord(ticker[0]))
+    close = start * np.exp(np.cumsum(rng.normal(drift, 0.02, len(dates))))
+    return pd.DataFrame({'Date': dates, 'Closing Price': close, 'Ticker': ticker})
+
+
+def pay_frame(ticker, dates, amounts):
+    return pd.DataFrame({'Date of Pay': pd.to_datetime(dates), 'Amount': amounts, 'Ticker': ticker})
+
+
+def reference_journey(ticker, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
+    """The original row-by-row loop the vectorized engine replaced, kept as the reference."""
+    t_price = unified_df[unified_df['Ticker'] == ticker].sort_values('Date')
+    journey = t_price[(t_price['Date'] >= start_date) & (t_price['Date'] <= end_date)].copy()
+    if journey.empty:
+        return journey
+    t_divs = history_df[history_df['Ticker'] == ticker].sort_values('Date of Pay')
+    relevant_divs = t_divs[(t_divs['Date of Pay'] >= start_date) & (t_divs['Date of Pay'] <= end_date)]
+    journey = journey.set_index('Date')
+    journey['Shares'] = initial_shares
+    journey['Cash_Pocketed'] = 0.0
+    current_shares, cum_cash = initial_shares, 0.0
+    for _, row in relevant_divs.iterrows():
+        d_date, d_amt = row['Date of Pay'], row['Amount']
+        if d_date in journey.index:
+            payout = current_shares * d_amt
+            if drip_enabled:
+                reinvest_price = journey.loc[d_date, 'Closing Price']
+                if reinvest_price > 0:
+                    current_shares += payout / reinvest_price
+                journey.loc[d_date:, 'Shares'] = current_shares
+            else:
+                cum_cash += payout
+                journey.loc[d_date:, 'Cash_Pocketed'] = cum_cash
+    journey = journey.reset_index()
+    journey['Market_Value'] = journey['Closing Price'] * journey['Shares']
+    journey['Base_Asset_Value'] = journey['Closing Price'] * initial_shares
+    journey['True_Value'] = journey['Market_Value'] if drip_enabled else journey['Market_Value'] + journey['Cash_Pocketed']
+    return journey
+
+
+@pytest.fixture
+def universe():
+    prices = pd.concat([price_frame('AAA'), price_frame('BBB', start=25.0)], ignore_index=True)
+    history = pd.concat([
+        # Two payouts on one trading day, a Saturday payout, and one past the last bar
+        pay_frame('AAA', ['2024-01-10', '2024-01-10', '2024-01-20', '2024-02-07', '2024-03-06', '2024-06-01'], [0.20, 0.05, 0.30, 0.15, 0.25, 0.40]),
+        pay_frame('BBB', ['2024-01-05', '2024-02-02', '2024-02-03', '2024-03-01'], [0.50, 0.45, 0.10, 0.55]),
+    ], ignore_index=True)
+    return prices, history
+
+
+@pytest.mark.parametrize('drip', [False, True])
+@pytest.mark.parametrize('start, end', [
+    ('2024-01-01', '2024-04-19'),   # whole history
+    ('2024-01-10', '2024-03-06'),   # starts and ends on a pay date
+    ('2024-01-11', '2024-02-07'),   # starts the day after one, ends on one
+    ('2024-01-20', '2024-02-06'),   # starts on a non-trading pay date
+])
+def test_calculate_journeys_matches_reference_loop(universe, drip, start, end):
+    prices, history = universe
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    shares = {'AAA': 100.0, 'BBB': 37.5}
+    journeys = calculate_journeys(['AAA', 'BBB'], start, end, shares, drip, prices, history)
+
+    assert set(journeys) == {'AAA', 'BBB'}
+    for ticker, journey in journeys.items():
+        expected = reference_journey(ticker, start, end, shares[ticker], drip, prices, history)
+        assert list(journey['Date']) == list(expected['Date'])
+        for col in ('Shares', 'Cash_Pocketed', 'Market_Value', 'Base_Asset_Value', 'True_Value'):
+            np.testing.assert_allclose(journey[col], expected[col], rtol=1e-12, atol=1e-9, err_msg=f'{ticker} {col}')
+
+
+def test_calculate_journeys_pays_both_same_day_payouts(universe):
+    prices, history = universe
+    day = pd.Timestamp('2024-01-10')
+    cash = calculate_journeys(['AAA'], day, day, 10.0, False, prices, history)['AAA']
+    assert cash['Cash_Pocketed'].iloc[0] == pytest.approx(10.0 * 0.25)
+
+    close = prices.loc[(prices['Ticker'] == 'AAA') & (prices['Date'] == day), 'Closing Price'].iloc[0]
+    drip = calculate_journeys(['AAA'], day, day, 10.0, True, prices, history)['AAA']
+    assert drip['Shares'].iloc[0] == pytest.approx(10.0 * (1 + 0.20 / close) * (1 + 0.05 / close))
+
+
+def test_calculate_journeys_empty_window(universe):
+    prices, history = universe
+    assert calculate_journeys(['AAA'], pd.Timestamp('2030-01-01'), pd.Timestamp('2030-02-01'), 1.0, False, prices, history) == {}
+
+
+def asset_series():
+    dates = pd.bdate_range('2024-01-01', periods=60)
+    prices = pd.DataFrame({'Date': dates, 'Closing Price': np.linspace(10.0, 12.0, 60), 'Ticker': 'AAA'})
+    history = pd.DataFrame({'Date of Pay': dates[4::20], 'Amount': [0.1, 0.2, 0.3], 'Ticker': 'AAA'})
+    return AssetSeries.from_frames('AAA', prices, history)
+
+
+def test_asset_series_arrays_are_read_only():
+    series = asset_series()
+    for arr in (series.dates, series.close, series.pay_dates, series.amounts):
+        assert not arr.flags.writeable
+
+
+def test_edits_to_asset_frames_never_reach_the_cached_arrays():
+    series = asset_series()
+    close, amounts = series.close.copy(), series.amounts.copy()
+
+    prices, history = series.frames()
+    prices.loc[0, 'Closing Price'] = -1.0
+    prices['Closing Price'] *= 2
+    history.iloc[0, history.columns.get_loc('Amount')] = 99.0
+    history.sort_values('Amount', ascending=False, inplace=True)
+
+    np.testing.assert_array_equal(series.close, close)
+    np.testing.assert_array_equal(series.amounts, amounts)
+    again, _ = series.frames()
+    np.testing.assert_array_equal(again['Closing Price'].to_numpy(), close)
+
+
+def test_simulate_windows_rows_per_window_and_mode(universe):
+    prices, history = universe
+    prices = prices[prices['Ticker'] == 'AAA'].reset_index(drop=True)
+    history = history[history['Ticker'] == 'AAA']
+    windows = [
+        ('All', None, DATES[-1]),
+        ('Feb', pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29')),
+        ('Future', pd.Timestamp('2030-01-01'), pd.Timestamp('2030-12-31')),
+    ]
+    rows = simulate_windows(prices, history, windows, [False, True], 1000.0)
+
+    assert [(r['Window'], r['DRIP']) for r in rows] == [('All', False), ('All', True), ('Feb', False), ('Feb', True)]
+    full_cash = rows[0]
+    assert full_cash['Start'] == DATES[0]
+    assert full_cash['Initial Capital'] == pytest.approx(1000.0)
+    expected = reference_journey('AAA', DATES[0], DATES[-1], full_cash['Initial Shares'], False, prices, history).iloc[-1]
+    assert full_cash['True Value'] == pytest.approx(expected['True_Value'])
+    assert full_cash['Cash Pocketed'] == pytest.approx(expected['Cash_Pocketed'])
+    assert full_cash['Total Return %'] == pytest.approx((expected['True_Value'] / 1000.0 - 1) * 100)
+    assert rows[1]['Cash Pocketed'] == 0.0
+    assert rows[1]['Final Shares'] > rows[1]['Initial Shares']
+
+
+def test_simulate_windows_without_prices():
+    assert simulate_windows(pd.DataFrame(), pd.DataFrame(), [('All', None, DATES[-1])], [False], 1000.0) == []
+
+
+def ex_frame(ticker, dates, amounts):
+    return pd.DataFrame({'Ticker': ticker, 'Ex Date': pd.to_datetime(dates), 'Amount': amounts})
+
+
+def sheet_frame(rows):
+    return pd.DataFrame(rows, columns=['Ticker', 'Date of Pay']).astype({'Date of Pay': 'datetime64[ns]'})
+
+
+def test_align_pay_dates_takes_next_pay_date_within_tolerance():
+    ex = ex_frame('AAA', ['2024-01-04', '2024-02-01', '2024-03-01'], [0.1, 0.2, 0.3])
+    sheet = sheet_frame([('AAA', '2024-01-05'), ('AAA', '2024-02-01'), ('AAA', '2024-04-15')])
+    aligned, unmatched = align_pay_dates(ex, sheet)
+
+    assert list(aligned['Date of Pay']) == list(pd.to_datetime(['2024-01-05', '2024-02-01', '2024-03-01']))
+    assert list(aligned['Matched']) == [True, True, False]   # 45 days out is past the tolerance
+    assert list(aligned['Amount']) == [0.1, 0.2, 0.3]
+    assert list(unmatched['Date of Pay']) == [pd.Timestamp('2024-04-15')]
+
+
+def test_align_pay_dates_contested_pay_date_goes_to_latest_ex_date():
+    ex = ex_frame('AAA', ['2024-01-02', '2024-01-09'], [0.1, 0.2])
+    sheet = sheet_frame([('AAA', '2024-01-10')])
+    aligned, unmatched = align_pay_dates(ex, sheet)
+
+    assert list(aligned['Date of Pay']) == list(pd.to_datetime(['2024-01-02', '2024-01-10']))
+    assert list(aligned['Matched']) == [False, True]
+    assert unmatched.empty
+
+
+def test_align_pay_dates_matches_within_each_ticker_only():
+    ex = pd.concat([ex_frame('AAA', ['2024-01-04'], [0.1]), ex_frame('BBB', ['2024-01-08'], [0.5])])
+    sheet = sheet_frame([('AAA', '2024-01-09'), ('BBB', '2024-01-05'), ('BBB', '2024-01-10'), ('ZZZ', '2024-01-09')])
+    aligned, unmatched = align_pay_dates(ex, sheet)
+
+    by_ticker = aligned.set_index('Ticker')
+    assert by_ticker.loc['AAA', 'Date of Pay'] == pd.Timestamp('2024-01-09')
+    assert by_ticker.loc['BBB', 'Date of Pay'] == pd.Timestamp('2024-01-10')
+    # Unmatched rows are reported only for tickers that have ex-dates
+    assert list(zip(unmatched['Ticker'], unmatched['Date of Pay'])) == [('BBB', pd.Timestamp('2024-01-05'))]
+
+
+def test_align_pay_dates_missing_sheet_row_only_affects_its_payout():
+    ex = ex_frame('AAA', ['2024-01-04', '2024-02-01', '2024-03-01'], [0.1, 0.2, 0.3])
+    sheet = sheet_frame([('AAA', '2024-01-05'), ('AAA', '2024-03-04')])
+    aligned, _ = align_pay_dates(ex, sheet)
+
+    assert list(aligned['Date of Pay']) == list(pd.to_datetime(['2024-01-05', '2024-02-01', '2024-03-04']))
+    assert list(aligned['Matched']) == [True, False, True]
+
+
+def test_align_pay_dates_with_empty_sheet():
+    ex = ex_frame('AAA', ['2024-01-04'], [0.1])
+    aligned, unmatched = align_pay_dates(ex, sheet_frame([]))
+    assert list(aligned['Date of Pay']) == [pd.Timestamp('2024-01-04')]
+    assert not aligned['Matched'].any()
+    assert unmatched.empty
+
+
+@pytest.mark.parametrize('drip', [False, True])
+def test_entry_date_outcomes_match_one_journey_per_entry(universe, drip):
+    prices, history = universe
+    prices = prices[prices['Ticker'] == 'AAA'].reset_index(drop=True)
+    history = history[history['Ticker'] == 'AAA']
+    holding = pd.DateOffset(months=1)
+    outcomes = entry_date_outcomes(prices, history, holding, drip)
+
+    # Every entry whose month fits inside the history, and no other
+    fits = DATES[DATES + holding <= DATES[-1]]
+    assert list(outcomes['Entry Date']) == list(fits)
+    for _, row in outcomes.iterrows():
+        target = row['Entry Date'] + holding
+        assert row['Exit Date'] == DATES[DATES <= target][-1]
+        journey = reference_journey('AAA', row['Entry Date'], row['Exit Date'], 1.0, drip, prices, history)
+        p0, last = journey['Closing Price'].iloc[0], journey.iloc[-1]
+        assert row['Entry Price'] == pytest.approx(p0)
+        assert row['Total Return %'] == pytest.approx((last['True_Value'] / p0 - 1) * 100, abs=1e-9)
+        assert row['Price Return %'] == pytest.approx((last['Closing Price'] / p0 - 1) * 100, abs=1e-9)
+        if not drip:
+            assert row['Cash Yield %'] == pytest.approx(last['Cash_Pocketed'] / p0 * 100, abs=1e-9)
+
+
+def test_entry_date_outcomes_holding_longer_than_history(universe):
+    prices, history = universe
+    assert entry_date_outcomes(prices[prices['Ticker'] == 'AAA'], history, pd.DateOffset(years=1), False).empty
+    assert list(entry_date_outcomes(pd.DataFrame(), history, pd.DateOffset(months=1), False).columns) == [
+        'Entry Date', 'Exit Date', 'Entry Price', 'Total Return %', 'Cash Yield %', 'Price Return %',
+    ]
+
+
+def test_projection_pool_matches_single_process():
+    prices = price_frame('AAA', dates=pd.bdate_range('2022-01-03', periods=500))
+    history = pay_frame('AAA', prices['Date'].iloc[::21], 0.2)
+    args = (prices, history, 252, True)
+    single = project_unit_paths(*args, n_paths=6000, seed=7)
+    pool = projection_pool(2)
+    try:
+        pooled = project_unit_paths(*args, n_paths=6000, seed=7, pool=pool)
+        again = project_unit_paths(*args, n_paths=6000, seed=7, pool=pool)
+    finally:
+        pool.shutdown()
+    pd.testing.assert_frame_equal(pooled, single)
+    pd.testing.assert_frame_equal(again, single)
+
+
+def reference_portfolio(prices, history, weights, start, end, capital, rebalance, dividends):
+    """Day-by-day basket: rebalance at the close of a new period's first day, then take that day's payouts."""
+    window = prices[(prices['Date'] >= start) & (prices['Date'] <= end)]
+    close = window.pivot_table(index='Date', columns='Ticker', values='Closing Price').sort_index().ffill().dropna()
+    tickers = list(close.columns)
+    w = np.array([weights[t] for t in tickers], dtype=float)
+    w /= w.sum()
+    paid = history.groupby(['Date of Pay', 'Ticker'])['Amount'].sum()
+
+    shares = w * capital / close.iloc[0].to_numpy()
+    cash = income = 0.0
+    period, rows = None, []
+    for i, (day, px) in enumerate(close.iterrows()):
+        px = px.to_numpy()
+        rebalanced = rebalance is not None and i > 0 and day.to_period(rebalance) != period
+        if rebalanced:
+            value = shares @ px
+            if dividends == 'sweep':
+                value, cash = value + cash, 0.0
+            shares = w * value / px
+        period = day.to_period(rebalance) if rebalance else None
+        amounts = np.array([paid.get((day, t), 0.0) for t in tickers])
+        payout = shares @ amounts
+        income += payout
+        if dividends == 'same':
+            for j, t in enumerate(tickers):
+                for amount in history.loc[(history['Date of Pay'] == day) & (history['Ticker'] == t), 'Amount']:
+                    shares[j] *= 1 + amount / px[j]
+        elif dividends == 'portfolio':
+            shares = shares + w * payout / px
+        else:
+            cash += payout
+        rows.append((day, shares @ px, cash, income, shares @ px + cash, rebalanced))
+    return pd.DataFrame(rows, columns=['Date', 'Market_Value', 'Cash', 'Income', 'True_Value', 'Rebalanced'])
+
+
+@pytest.mark.parametrize('dividends', ['cash', 'same', 'portfolio', 'sweep'])
+@pytest.mark.parametrize('rebalance', [None, 'M', 'Q'])
+def test_simulate_portfolio_matches_day_by_day_loop(universe, rebalance, dividends):
+    prices, history = universe
+    start, end = pd.Timestamp('2024-01-03'), pd.Timestamp('2024-04-10')
+    weights = {'AAA': 3.0, 'BBB': 1.0}
+    journey, allocation, dropped = simulate_portfolio(prices, history, weights, start, end, 10_000.0, rebalance, dividends)
+
+    expected = reference_portfolio(prices, history, weights, start, end, 10_000.0, rebalance, dividends)
+    assert dropped == []
+    assert list(journey['Date']) == list(expected['Date'])
+    assert list(journey['Rebalanced']) == list(expected['Rebalanced'])
+    for col in ('Market_Value', 'Cash', 'Income', 'True_Value'):
+        np.testing.assert_allclose(journey[col], expected[col], rtol=1e-12, atol=1e-9, err_msg=col)
+    np.testing.assert_allclose(allocation.sum(axis=1), journey['Market_Value'], rtol=1e-12)
+
+
+def test_simulate_portfolio_reports_holdings_without_prices(universe):
+    prices, history = universe
+    start, end = DATES[0], DATES[-1]
+    journey, allocation, dropped = simulate_portfolio(prices, history, {'AAA': 1.0, 'ZZZ': 1.0, 'BBB': 2.0}, start, end, 1_000.0, 'M', 'cash')
+    assert dropped == ['ZZZ']
+    assert list(allocation.columns) == ['AAA', 'BBB']
+
+    # The rest of the basket is the same as if the holding had never been picked
+    without, _, _ = simulate_portfolio(prices, history, {'AAA': 1.0, 'BBB': 2.0}, start, end, 1_000.0, 'M', 'cash')
+    pd.testing.assert_frame_equal(journey, without)
+
+
+def test_simulate_portfolio_without_prices_in_window(universe):
+    prices, history = universe
+    journey, allocation, dropped = simulate_portfolio(prices, history, {'AAA': 1.0, 'BBB': 1.0}, pd.Timestamp('2030-01-01'), pd.Timestamp('2030-06-01'), 1_000.0)
+    assert journey.empty and allocation.empty
+    assert dropped == ['AAA', 'BBB']
+
+
+def value_journey(values, dates=DATES):
+    """A no-payout journey of one share whose True Value is `values`."""
+    values = np.asarray(values, dtype=float)
+    return pd.DataFrame({'Date': dates[:len(values)], 'True_Value': values, 'Cash_Pocketed': 0.0, 'Shares': 1.0, 'Closing Price': values})
+
+
+def test_risk_panel_matches_hand_worked_journey():
+    values = [100.0, 110.0, 88.0, 99.0, 121.0, 115.0]
+    metrics, _, drawdowns = risk_panel({'AAA': value_journey(values)}, risk_free_rate=0.04)
+    row = metrics.loc['AAA']
+
+    # Deepest trough is 88 against the 110 peak, recovered three trading days later
+    assert row['Max Drawdown %'] == pytest.approx(-20.0)
+    assert row['Recovery Days'] == (DATES[4] - DATES[2]).days
+    np.testing.assert_allclose(drawdowns['AAA'], [0.0, 0.0, -20.0, -10.0, 0.0, (115 / 121 - 1) * 100])
+
+    returns = np.diff(values) / values[:-1]
+    vol = returns.std(ddof=1) * np.sqrt(TRADING_DAYS)
+    excess = returns.mean() * TRADING_DAYS - 0.04
+    downside = np.sqrt(np.mean(np.minimum(returns - 0.04 / TRADING_DAYS, 0.0) ** 2) * TRADING_DAYS)
+    assert row['Volatility %'] == pytest.approx(vol * 100)
+    assert row['Sharpe'] == pytest.approx(excess / vol)
+    assert row['Sortino'] == pytest.approx(excess / downside)
+
+
+def test_risk_panel_unrecovered_drawdown_and_correlation():
+    rising = value_journey(np.linspace(100.0, 130.0, 20))
+    falling = value_journey(np.linspace(100.0, 70.0, 20))
+    tripled = value_journey(np.linspace(300.0, 390.0, 20))
+    metrics, correlation, _ = risk_panel({'UP': rising, 'UP x3': tripled, 'DOWN': falling})
+
+    assert metrics.loc['UP', 'Max Drawdown %'] == 0 and metrics.loc['UP', 'Recovery Days'] == 0
+    assert metrics.loc['DOWN', 'Max Drawdown %'] == pytest.approx(-30.0)
+    assert np.isnan(metrics.loc['DOWN', 'Recovery Days'])
+    # The share count doesn't change returns
+    assert correlation.loc['UP', 'UP x3'] == pytest.approx(1.0)
+    assert metrics.loc['UP', 'Volatility %'] == pytest.approx(metrics.loc['UP x3', 'Volatility %'])
+
+
+def test_risk_panel_short_journeys_get_nan_without_warnings():
+    journeys = {'ONE DAY': value_journey([100.0]), 'TWO DAYS': value_journey([100.0, 101.0]), 'LONG': value_journey(np.linspace(100.0, 90.0, 30) + np.sin(np.arange(30)))}
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        metrics, correlation, drawdowns = risk_panel(journeys)
+        alone, _, _ = risk_panel({'ONE DAY': journeys['ONE DAY']})
+
+    for name in ('ONE DAY', 'TWO DAYS'):
+        assert metrics.loc[name, ['Volatility %', 'Sharpe', 'Sortino']].isna().all()
+        assert metrics.loc[name, 'Max Drawdown %'] == 0
+    assert metrics.loc['LONG', ['Volatility %', 'Sharpe', 'Sortino']].notna().all()
+    assert correlation.isna().all().all()
+    assert len(drawdowns) == 30
+    assert alone.loc['ONE DAY'].drop(['Max Drawdown %', 'Recovery Days']).isna().all()
+
+
+def distribution_index(pay_dates, amounts, dates=pd.bdate_range('2023-01-02', periods=420)):
+    """The `DistributionIndex` an `AssetSeries` builds, over a wavy price and payouts given in any order."""
+    prices = pd.DataFrame({'Date': dates, 'Closing Price': 20 + 3 * np.sin(np.arange(len(dates)) / 15), 'Ticker': 'AAA'})
+    history = pd.DataFrame({'Date of Pay': pd.to_datetime(pay_dates), 'Amount': amounts, 'Ticker': 'AAA'})
+    return AssetSeries.from_frames('AAA', prices, history).distributions, prices
+
+
+@pytest.fixture
+def monthly():
+    # The 15th of each month, some on weekends and the first before the first bar; given newest first
+    pay_dates = pd.date_range('2022-12-01', '2024-07-01', freq='MS') + pd.Timedelta(days=14)
+    # Two raises, a flat month, two cuts, a flat month, a jump: streaks of +2 and -2
+    amounts = np.resize([0.10, 0.11, 0.12, 0.12, 0.11, 0.10, 0.10, 0.13], len(pay_dates))
+    index, prices = distribution_index(pay_dates[::-1], amounts[::-1])
+    return index, prices, pd.Series(amounts, index=pay_dates)
+
+
+def test_distribution_events_match_brute_force(monthly):
+    index, prices, paid = monthly
+    events = index.events()
+    assert list(events['Date of Pay']) == list(paid.index)
+    assert index.frequency == 'Monthly' and index.per_year == 12
+
+    streak = 0
+    for i, (day, row) in enumerate(events.set_index('Date of Pay').iterrows()):
+        before = prices[prices['Date'] <= day]
+        price = before['Closing Price'].iloc[-1] if len(before) else np.nan
+        ttm = paid[(paid.index > day - TTM) & (paid.index <= day)].sum()
+        step = 0 if i == 0 else np.sign(round(paid.iloc[i] - paid.iloc[i - 1], 6))
+        streak = 0 if step == 0 else streak + step if np.sign(streak) == step else step
+        np.testing.assert_allclose(
+            [row['Amount'], row['Price at Payout'], row['TTM Amount'], row['TTM Yield %']],
+            [paid.iloc[i], price, ttm, ttm / price * 100], rtol=1e-12, err_msg=str(day.date()))
+        assert row['Streak'] == streak
+    assert np.isnan(events['Price at Payout'].iloc[0])
+    assert list(events['Streak'][:8]) == [0, 1, 2, 0, -1, -2, 0, 1]
+
+    window = index.events('2024-01-01', '2024-03-31')
+    assert list(window['Date of Pay']) == list(paid['2024-01-01':'2024-03-31'].index)
+
+
+def test_distribution_paid_between_and_trailing(monthly):
+    index, _, paid = monthly
+    for start, end in [('2023-03-15', '2023-06-15'), ('2023-03-16', '2023-06-14'), ('2024-08-01', '2024-09-01')]:
+        assert index.paid_between(start, end) == pytest.approx(paid[start:end].sum())
+    ends = pd.to_datetime(['2023-05-01', '2023-12-31', '2024-07-15'])
+    np.testing.assert_allclose(index.paid_between('2023-01-01', ends), [paid['2023-01-01':e].sum() for e in ends])
+    np.testing.assert_allclose(index.paid_trailing(ends), [paid[(paid.index > e - TTM) & (paid.index <= e)].sum() for e in ends])
+
+
+def test_distribution_rolling_yield_and_erosion(monthly):
+    index, prices, paid = monthly
+    rolling = index.rolling_yield('2023-06-01', '2024-06-30')
+    window = prices[(prices['Date'] >= '2023-06-01') & (prices['Date'] <= '2024-06-30')]
+    assert list(rolling['Date']) == list(window['Date'])
+    for _, row in rolling.iterrows():
+        day, close = row['Date'], row['Closing Price']
+        if day >= paid.index[0] + TTM:
+            assert row['TTM Yield %'] == pytest.approx(paid[(paid.index > day - TTM) & (paid.index <= day)].sum() / close * 100)
+        else:
+            assert np.isnan(row['TTM Yield %'])
+        assert row['Forward Yield %'] == pytest.approx(paid[:day].iloc[-1] * 12 / close * 100)
+
+    erosion = index.erosion('2023-06-01', '2024-06-30')
+    first = window['Closing Price'].iloc[0]
+    expected_paid = [paid['2023-06-01':d].sum() / first * 100 for d in window['Date']]
+    np.testing.assert_allclose(erosion['Price Return %'], (window['Closing Price'] / first - 1) * 100)
+    np.testing.assert_allclose(erosion['Distributions %'], expected_paid)
+    np.testing.assert_allclose(erosion['Total Return %'], erosion['Price Return %'] + erosion['Distributions %'])
+    assert index.erosion('2030-01-01', '2030-12-31').empty
+
+
+def test_distribution_index_without_payouts():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        index, _ = distribution_index([], [])
+        rolling = index.rolling_yield('2023-06-01', '2023-12-31')
+        erosion = index.erosion('2023-06-01', '2023-12-31')
+
+    assert len(index) == 0 and index.frequency == '-'
+    assert index.events().empty
+    assert index.paid_between('2023-01-01', '2024-12-31') == 0
+    assert rolling[['TTM Yield %', 'Forward Yield %']].isna().all().all()
+    assert (erosion['Distributions %'] == 0).all()
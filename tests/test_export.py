@@ -0,0 +1,107 @@
+"""Bulk export: per-ticker rows, one shared schema, streamed writers and the bounded read-ahead."""
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from export import (
+    EXPORT_COLUMNS,
+    export_windows,
+    iter_results,
+    map_ahead,
+    result_frame,
+    ticker_rows,
+    write_results,
+)
+from screener import WINDOWS
+
+DATES = pd.bdate_range('2023-01-02', '2024-06-28')
+AS_OF = pd.Timestamp('2024-06-28')
+
+
+def load_asset(ticker):
+    """Prices for AAA and BBB, none for EMPTY, and a load error for anything else."""
+    if ticker == 'EMPTY':
+        return pd.DataFrame(columns=['Date', 'Closing Price', 'Ticker']), pd.DataFrame(columns=['Date of Pay', 'Amount', 'Ticker'])
+    if ticker not in ('AAA', 'BBB'):
+        raise ValueError(f"{ticker} is not stored")
+    close = 20 * np.exp(np.cumsum(np.random.default_rng(len(ticker) + ord(ticker[0])).normal(0, 0.01, len(DATES))))
+    prices = pd.DataFrame({'Date': DATES, 'Closing Price': close, 'Ticker': ticker})
+    history = pd.DataFrame({'Date of Pay': DATES[20::21], 'Amount': 0.2, 'Ticker': ticker})
+    return prices, history
+
+
+def test_export_windows_end_at_as_of():
+    windows = export_windows(AS_OF)
+    assert [label for label, _, _ in windows] == list(WINDOWS)
+    assert all(end == AS_OF for _, _, end in windows)
+    starts = {label: start for label, start, _ in windows}
+    assert starts['1Y'] == AS_OF - pd.DateOffset(years=1)
+    assert starts['Since Inception'] is None
+
+
+def test_ticker_rows_turn_failures_into_error_rows():
+    assert ticker_rows('EMPTY', load_asset, export_windows(AS_OF), [False], 1000) == [{'Ticker': 'EMPTY', 'Error': 'no price data'}]
+    assert ticker_rows('ZZZ', load_asset, export_windows(AS_OF), [False], 1000) == [{'Ticker': 'ZZZ', 'Error': 'ZZZ is not stored'}]
+
+    rows = ticker_rows('AAA', load_asset, export_windows(AS_OF), [False, True], 1000)
+    assert len(rows) == 2 * len(WINDOWS)
+
+
+def test_result_frames_share_one_schema():
+    good = result_frame(ticker_rows('AAA', load_asset, export_windows(AS_OF), [False, True], 1000))
+    failed = result_frame([{'Ticker': 'ZZZ', 'Error': 'ZZZ is not stored'}])
+    empty = result_frame([])
+    for frame in (good, failed, empty):
+        assert list(frame.columns) == EXPORT_COLUMNS
+    assert list(failed.dtypes) == list(good.dtypes) == list(empty.dtypes)
+    assert good['Error'].isna().all()
+
+
+def test_iter_results_in_ticker_order():
+    tickers = ['BBB', 'ZZZ', 'AAA', 'EMPTY']
+    frames = list(iter_results(tickers, load_asset, export_windows(AS_OF), [False], 1000, max_workers=2))
+    assert [f['Ticker'].iloc[0] for f in frames] == tickers
+    assert [f['Error'].notna().all() for f in frames] == [False, True, False, True]
+
+
+def test_map_ahead_submits_only_a_window_ahead_of_the_consumer():
+    started = []
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            started.append(i)
+        return i * i
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = map_ahead(pool, work, range(50), ahead=4)
+        assert next(results) == 0
+        # Give the workers time to run everything that was submitted
+        time.sleep(0.1)
+        assert sorted(started) == [0, 1, 2, 3]
+        assert list(results) == [i * i for i in range(1, 50)]
+    assert sorted(started) == list(range(50))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_write_results_counts_rows_and_failures(fmt):
+    tickers = ['AAA', 'ZZZ', 'BBB']
+    sink = io.BytesIO()
+    rows, failed = write_results(iter_results(tickers, load_asset, export_windows(AS_OF), [False, True], 1000), sink, fmt)
+    assert (rows, failed) == (4 * len(WINDOWS) + 1, 1)
+
+    sink.seek(0)
+    frame = pd.read_csv(sink) if fmt == 'csv' else pd.read_parquet(sink)
+    assert list(frame.columns) == EXPORT_COLUMNS
+    assert len(frame) == rows
+    assert list(frame['Ticker'].drop_duplicates()) == tickers
+
+
+def test_write_results_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        write_results(iter([]), io.BytesIO(), 'xlsx')
@@ -0,0 +1,163 @@
+"""`PriceStore` against a stand-in downloader and a throwaway SQLite file."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fetch_scheduler import FetchError, FetchScheduler
+from price_store import OVERLAP_DAYS, PriceStore
+
+
+def bars(dates, closes, dividends=0.0, splits=0.0):
+    """A yfinance-style history frame: tz-aware DatetimeIndex with Close / Dividends / Stock Splits."""
+    idx = pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize("America/New_York")
+    return pd.DataFrame({"Close": closes, "Dividends": dividends, "Stock Splits": splits}, index=pd.Index(idx, name="Date"))
+
+
+class FakeYahoo:
+    """Serves `self.frames[ticker]` from `start` on and records every (ticker, start) request."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+        self.error = None
+
+    def __call__(self, ticker, start=None):
+        self.calls.append((ticker, start))
+        if self.error is not None:
+            raise self.error
+        frame = self.frames.get(ticker, pd.DataFrame())
+        if start is not None and not frame.empty:
+            frame = frame[frame.index.tz_localize(None) >= pd.Timestamp(start)]
+        return frame
+
+
+@pytest.fixture
+def yahoo():
+    dates = pd.bdate_range("2024-01-01", periods=30)
+    closes = np.linspace(10.0, 12.9, 30)
+    dividends = np.where(np.arange(30) % 10 == 9, 0.25, 0.0)
+    return FakeYahoo({"AAA": bars(dates, closes, dividends)})
+
+
+@pytest.fixture
+def store(tmp_path, yahoo):
+    # No rate limit, no retries and no backoff sleeps, so failures surface at once
+    scheduler = FetchScheduler(rate=1e9, burst=10**9, retries=0, sleep=lambda s: None)
+    return PriceStore(str(tmp_path / "prices.sqlite"), downloader=yahoo, refresh_ttl=0, scheduler=scheduler)
+
+
+def test_first_refresh_downloads_full_history(store, yahoo):
+    assert store.refresh("AAA") is True
+    assert yahoo.calls == [("AAA", None)]
+
+    hist = store.history("AAA")
+    source = yahoo.frames["AAA"]
+    assert list(hist["Date"]) == list(source.index.tz_localize(None))
+    assert np.allclose(hist["Close"], source["Close"])
+    assert np.allclose(hist["Dividends"], source["Dividends"])
+    assert store.status("AAA")[0] == "2024-02-09"
+
+
+def test_refresh_fetches_only_from_overlap_window(store, yahoo):
+    store.refresh("AAA")
+    last_date = store.status("AAA")[0]
+    new = bars(pd.bdate_range("2024-02-12", periods=3), [13.0, 13.1, 13.2], [0.0, 0.0, 0.3])
+    yahoo.frames["AAA"] = pd.concat([yahoo.frames["AAA"], new])
+
+    store.refresh("AAA")
+    start = (pd.Timestamp(last_date) - pd.Timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+    assert yahoo.calls[1:] == [("AAA", start)]
+
+    hist = store.history("AAA")
+    assert len(hist) == 33
+    assert hist["Close"].iloc[-1] == pytest.approx(13.2)
+    assert hist["Dividends"].iloc[-1] == pytest.approx(0.3)
+    assert store.status("AAA")[0] == "2024-02-14"
+
+
+def test_restated_overlap_reloads_full_history(store, yahoo):
+    store.refresh("AAA")
+    # Yahoo re-adjusted every close (e.g. a distribution restatement), so the overlap disagrees
+    restated = yahoo.frames["AAA"].copy()
+    restated["Close"] *= 0.9
+    yahoo.frames["AAA"] = restated
+
+    store.refresh("AAA")
+    # The incremental request saw the mismatch, then a full reload replaced the history
+    assert len(yahoo.calls) == 3
+    assert yahoo.calls[1][1] is not None
+    assert yahoo.calls[2] == ("AAA", None)
+    assert np.allclose(store.history("AAA")["Close"], restated["Close"])
+
+
+def test_split_after_last_bar_reloads_full_history(store, yahoo):
+    store.refresh("AAA")
+    # A 2:1 split: Yahoo back-adjusts the whole history and flags the split day
+    split = yahoo.frames["AAA"].copy()
+    split["Close"] /= 2
+    new = bars(["2024-02-12"], [6.5], splits=2.0)
+    yahoo.frames["AAA"] = pd.concat([split, new])
+
+    store.refresh("AAA")
+    assert yahoo.calls[-1] == ("AAA", None)
+    hist = store.history("AAA")
+    assert len(hist) == 31
+    assert np.allclose(hist["Close"], yahoo.frames["AAA"]["Close"])
+
+
+def test_load_serves_stored_bars_when_refresh_fails(store, yahoo):
+    stored = store.load("AAA")
+    yahoo.error = ConnectionError("connection reset by peer")
+
+    served = store.load("AAA")
+    assert len(yahoo.calls) == 2
+    pd.testing.assert_frame_equal(served, stored)
+
+
+def test_load_raises_when_nothing_is_stored(store, yahoo):
+    yahoo.error = ConnectionError("connection reset by peer")
+    with pytest.raises(FetchError):
+        store.load("AAA")
+    assert store.status("AAA") == (None, None)
+
+
+def test_missing_ticker_is_empty_not_an_error(store, yahoo):
+    assert store.load("NOPE").empty
+    assert yahoo.calls == [("NOPE", None)]
+
+
+def test_forced_and_normal_refresh_share_one_download(tmp_path, yahoo):
+    release, started = threading.Event(), threading.Event()
+
+    def slow_yahoo(ticker, start=None):
+        started.set()
+        release.wait(5)
+        return yahoo(ticker, start)
+
+    scheduler = FetchScheduler(rate=1e9, burst=10**9, retries=0, sleep=lambda s: None)
+    store = PriceStore(str(tmp_path / "prices.sqlite"), downloader=slow_yahoo, scheduler=scheduler)
+    results = {}
+    forced = threading.Thread(target=lambda: results.update(forced=store.refresh("AAA", force=True)))
+    forced.start()
+    assert started.wait(5)
+    normal = threading.Thread(target=lambda: results.update(normal=store.refresh("AAA")))
+    normal.start()
+    while scheduler.stats["merged"] == 0:
+        time.sleep(0.01)
+    release.set()
+    forced.join(5)
+    normal.join(5)
+
+    assert results == {"forced": True, "normal": True}
+    assert yahoo.calls == [("AAA", None)]
+
+
+def test_forced_refresh_ignores_the_ttl(store, yahoo):
+    store.refresh("AAA")
+    store.refresh_ttl = 3600
+    assert store.refresh("AAA") is False
+    assert store.refresh("AAA", force=True) is True
+    assert len(yahoo.calls) == 2
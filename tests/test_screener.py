@@ -0,0 +1,98 @@
+"""`compute_screener` against per-window journeys, the snapshot files and the store-only rebuild."""
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import calculate_journey, load_asset_frames
+from fetch_scheduler import FetchScheduler
+from price_store import PriceStore
+from screener import WINDOWS, ScreenerJob, compute_screener, read_snapshot, snapshot_age, write_snapshot
+
+DATES = pd.bdate_range('2023-01-02', '2024-06-28')
+
+
+def prices_for(ticker, start):
+    rng = np.random.default_rng(start)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.015, len(DATES))))
+    return pd.DataFrame({'Date': DATES, 'Closing Price': close, 'Ticker': ticker})
+
+
+@pytest.fixture
+def universe():
+    # BBB lists in 2024, so its 1Y and inception windows start at its first bar
+    prices = pd.concat([prices_for('AAA', 20), prices_for('BBB', 50).iloc[300:]], ignore_index=True)
+    history = pd.concat([
+        pd.DataFrame({'Date of Pay': DATES[::21], 'Amount': 0.3, 'Ticker': 'AAA'}),
+        pd.DataFrame({'Date of Pay': DATES[310::21], 'Amount': 1.1, 'Ticker': 'BBB'}),
+    ], ignore_index=True)
+    return prices, history
+
+
+def test_screener_matches_journeys_for_every_window(universe):
+    prices, history = universe
+    table = compute_screener(prices, history)
+    assert len(table) == 2 * len(WINDOWS)
+
+    for _, row in table.iterrows():
+        cash = calculate_journey(row['Ticker'], row['Start'], row['End'], 1.0, False, prices, history)
+        drip = calculate_journey(row['Ticker'], row['Start'], row['End'], 1.0, True, prices, history)
+        p0 = cash['Closing Price'].iloc[0]
+        cash_return = (cash['True_Value'].iloc[-1] / p0 - 1) * 100
+        drip_return = (drip['True_Value'].iloc[-1] / p0 - 1) * 100
+        assert row['End'] == DATES[-1]
+        assert row['Total Return %'] == pytest.approx(cash_return, abs=1e-3)
+        assert row['Cash Yield %'] == pytest.approx(cash['Cash_Pocketed'].iloc[-1] / p0 * 100, abs=1e-3)
+        assert row['NAV Erosion %'] == pytest.approx((cash['Closing Price'].iloc[-1] / p0 - 1) * 100, abs=1e-3)
+        assert row['DRIP vs Cash Spread'] == pytest.approx(drip_return - cash_return, abs=1e-3)
+
+
+def test_screener_since_inception_starts_at_each_tickers_first_bar(universe):
+    prices, history = universe
+    table = compute_screener(prices, history).astype({'Window': str}).set_index(['Ticker', 'Window'])
+    assert table.loc[('AAA', 'Since Inception'), 'Start'] == DATES[0]
+    assert table.loc[('BBB', 'Since Inception'), 'Start'] == DATES[300]
+    assert table.loc[('BBB', '1Y'), 'Start'] == DATES[300]
+
+
+def test_screener_as_of_cuts_the_panel(universe):
+    prices, history = universe
+    as_of = pd.Timestamp('2024-01-31')
+    table = compute_screener(prices, history, as_of=as_of)
+    assert (table['End'] == as_of).all()
+
+
+def test_snapshot_round_trip(tmp_path, universe):
+    path = str(tmp_path / 'screener.parquet')
+    assert snapshot_age(path) is None
+    table = compute_screener(*universe)
+    write_snapshot(table, path)
+
+    pd.testing.assert_frame_equal(read_snapshot(path), table)
+    assert 0 <= snapshot_age(path) < 60
+    assert os.listdir(tmp_path) == ['screener.parquet']
+
+
+def test_rebuild_reads_stored_bars_without_asking_yahoo(tmp_path):
+    calls = []
+
+    def downloader(ticker, start=None):
+        calls.append(ticker)
+        hist = prices_for(ticker, 20).set_index('Date')
+        return pd.DataFrame({'Close': hist['Closing Price'], 'Dividends': 0.0})
+
+    scheduler = FetchScheduler(rate=1e9, burst=10**9, retries=0, sleep=lambda s: None)
+    store = PriceStore(str(tmp_path / 'prices.sqlite'), downloader=downloader, refresh_ttl=0, scheduler=scheduler)
+    store.refresh('AAA')
+    prefetched = []
+    job = ScreenerJob(path=str(tmp_path / 'screener.parquet'))
+    job.universe = ['AAA', 'BBB']
+    job.load_asset = partial(load_asset_frames, pay_index={}, store=store, refresh=False)
+    job.prefetch = prefetched.extend
+
+    job.rebuild()
+    assert calls == ['AAA']
+    assert set(read_snapshot(job.path)['Ticker']) == {'AAA'}
+    assert prefetched == ['BBB']
@@ -0,0 +1,124 @@
+"""`SheetCache` against a local `http.server` standing in for Google Sheets."""
+import http.server
+import os
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from sheet_cache import SheetCache
+
+MASTER = b"Ticker,Fund Name,Underlying\nAAPY,Kurv,AAPL\nMSTY,YieldMax,MSTR\n"
+
+
+class FakeSheets(http.server.ThreadingHTTPServer):
+    """Serves `body` with `etag` (304 when the client already has it), or `status` when it is set."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SheetHandler)
+        self.body, self.etag, self.status = MASTER, '"v1"', None
+        self.requests = []
+
+
+class SheetHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status is not None:
+            self.send_error(server.status)
+        elif self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = FakeSheets()
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def url(server):
+    return f"http://127.0.0.1:{server.server_port}/master.csv"
+
+
+@pytest.fixture
+def cache(tmp_path, url):
+    return SheetCache(str(tmp_path), required_columns={url: ["Ticker"]})
+
+
+def snapshot(cache, url):
+    with open(cache.path(url), "rb") as f:
+        return f.read()
+
+
+def test_first_load_fetches_in_foreground(cache, url, server):
+    assert cache.paths([url]) == [cache.path(url)]
+    assert snapshot(cache, url) == MASTER
+    assert not cache.is_due(url)
+    assert "If-None-Match" not in server.requests[0]
+
+
+def test_unchanged_sheet_costs_a_304(cache, url, server):
+    cache.refresh([url])
+    version = cache.version([url])
+
+    assert cache.refresh([url]) == {url: False}
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert snapshot(cache, url) == MASTER
+    assert cache.version([url]) == version
+    assert cache.last_error is None
+
+
+def test_changed_sheet_replaces_snapshot(cache, url, server):
+    cache.refresh([url])
+    os.utime(cache.path(url), (time.time() - 60, time.time() - 60))
+    version = cache.version([url])
+    server.body, server.etag = MASTER + b"TSLY,YieldMax,TSLA\n", '"v2"'
+
+    assert cache.refresh([url]) == {url: True}
+    assert snapshot(cache, url) == server.body
+    assert cache.version([url]) != version
+
+
+def test_outage_keeps_last_good_snapshot(cache, url, server):
+    cache.refresh([url])
+    server.status = 500
+
+    assert cache.refresh([url]) == {}
+    assert snapshot(cache, url) == MASTER
+    assert "500" in str(cache.last_error)
+
+
+def test_outage_with_no_snapshot_raises(cache, url, server):
+    server.status = 503
+    with pytest.raises(urllib.error.HTTPError):
+        cache.paths([url])
+    assert not os.path.exists(cache.path(url))
+
+
+@pytest.mark.parametrize("body", [
+    b"<!DOCTYPE html><html><body>Sign in to continue</body></html>",
+    b"Fund Name,Underlying\nKurv,AAPL\n",
+    b"\n\n\n",
+])
+def test_bad_body_keeps_last_good_snapshot(cache, url, server, body):
+    cache.refresh([url])
+    server.body, server.etag = body, '"v2"'
+
+    assert cache.refresh([url]) == {}
+    assert snapshot(cache, url) == MASTER
+    assert isinstance(cache.last_error, ValueError)
@@ -0,0 +1,77 @@
+"""`CacheWarmer.related` over metadata built the way the app builds it from the master sheet."""
+import pandas as pd
+
+from engine import index_metadata, load_base_sheets
+from warmer import CacheWarmer
+
+MASTER = pd.DataFrame({
+    'Ticker': ['YIELDMAX', 'MSTY', 'TSLY', 'NVDY', 'KURV', 'AAPY', 'QDTE'],
+    'Fund Strategy': ['', 'Option Income', 'Option Income', 'Option Income', '', 'Option Income', '0DTE'],
+    'Fund Name': [
+        '',
+        'YieldMax MSTR Option Income Strategy ETF',
+        'YieldMax TSLA Option Income Strategy ETF',
+        'YieldMax NVDA Option Income Strategy ETF',
+        '',
+        'Kurv Yield Premium Strategy Apple ETF',
+        'Roundhill Innovation-100 0DTE Covered Call Strategy ETF',
+    ],
+    'Underlying': ['', 'MSTR', 'TSLA', 'NVDA', '', 'AAPL', 'QQQ'],
+})
+
+
+def metadata(tmp_path, master=MASTER):
+    master_path, history_path = tmp_path / 'master.csv', tmp_path / 'history.csv'
+    master.to_csv(master_path, index=False)
+    pd.DataFrame({'Ticker': ['MSTY'], 'Pay Date': ['01/05/2024']}).to_csv(history_path, index=False)
+    df_m, _ = load_base_sheets(str(master_path), str(history_path))
+    return index_metadata(df_m)
+
+
+def warmer(meta):
+    w = CacheWarmer(store=None)
+    w.meta = meta
+    return w
+
+
+def test_funds_of_one_family_share_an_issuer(tmp_path):
+    meta = metadata(tmp_path)
+    assert {t: meta[t]['Issuer'] for t in meta} == {
+        'MSTY': 'YIELDMAX', 'TSLY': 'YIELDMAX', 'NVDY': 'YIELDMAX', 'AAPY': 'KURV', 'QDTE': 'ROUNDHILL',
+    }
+
+
+def test_issuer_column_wins_over_fund_name(tmp_path):
+    master = MASTER.assign(**{'Fund Family': ['', 'Tidal', 'Tidal', None, '', None, None]})
+    meta = metadata(tmp_path, master)
+    assert meta['MSTY']['Issuer'] == 'TIDAL'
+    assert meta['NVDY']['Issuer'] == 'YIELDMAX'
+
+
+def test_related_reaches_the_issuers_other_funds(tmp_path):
+    meta = metadata(tmp_path)
+    # Every fund gets its own strategy, so only the issuer links the YieldMax funds
+    for t in meta:
+        meta[t]['Strategy'] = t
+    assert warmer(meta).related('TSLY') == ['TSLA', 'MSTY', 'NVDY']
+    assert warmer(meta).related('AAPY') == ['AAPL']
+
+
+def test_related_orders_underlying_then_strategy_then_issuer(tmp_path):
+    meta = metadata(tmp_path)
+    meta['NVDY']['Strategy'] = 'Covered Call'
+    assert warmer(meta).related('MSTY', limit=10) == ['MSTR', 'TSLY', 'AAPY', 'NVDY']
+
+
+def test_hit_rate_is_the_share_of_requests_that_loaded_warm():
+    w = warmer({})
+    assert w.snapshot()["hit_rate"] is None
+
+    # Four loads of MSTY's series; only the first found the store stale
+    for _ in range(4):
+        w.record_request('MSTY')
+    w.record_cold_load('MSTY')
+    w.record_demand('MSTY')
+    snap = w.snapshot()
+    assert (snap["requests"], snap["cold_loads"], snap["hit_rate"]) == (4, 1, 0.75)
+    assert snap["top"] == ['MSTY']
@@ -0,0 +1,167 @@
+"""Background cache warmer: keeps popular and related tickers fresh in the price store.
+
+The cold cost of `fetch_single_asset` is the Yahoo refresh inside
+`PriceStore.load`. `CacheWarmer` counts which tickers users ask for, and on a
+background thread re-fetches the most requested ones (plus their underlyings)
+shortly before their store entry goes stale, along with tickers related to the
+current selection. Network refreshes are capped by a worker count and an hourly
+request budget.
+"""
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TOP_K = int(os.environ.get("HYT_WARM_TOP_K", 20))             # most-requested tickers kept warm
+MAX_WORKERS = int(os.environ.get("HYT_WARM_WORKERS", 2))       # concurrent refreshes
+REQUEST_BUDGET = int(os.environ.get("HYT_WARM_BUDGET", 600))   # network refreshes per rolling hour
+RELATED_LIMIT = 6
+LEAD_SECONDS = 120        # refresh this long before the store TTL runs out
+INTERVAL = 60
+
+
+class CacheWarmer:
+    """Request counting, hit-rate stats and the background refresh loop.
+
+    Streamlit-free; the app reports requests and cold loads, and points it at
+    the current universe and metadata indexes with `update`.
+    """
+
+    def __init__(self, store, top_k=TOP_K, max_workers=MAX_WORKERS, budget=REQUEST_BUDGET, interval=INTERVAL):
+        self.store = store
+        self.top_k = top_k
+        self.max_workers = max_workers
+        self.budget = budget
+        self.interval = interval
+        self.universe = set()
+        self.meta = {}
+        self.funds_by_underlying = {}
+        self.counts = collections.Counter()
+        self.stats = collections.Counter()
+        self._spent = collections.deque()   # timestamps of network refreshes in the last hour
+        self._queue = collections.OrderedDict()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def update(self, universe, meta, funds_by_underlying):
+        """Points the warmer at the current universe and metadata, starting it on first use."""
+        with self._lock:
+            self.universe = set(universe)
+            self.meta = meta
+            self.funds_by_underlying = funds_by_underlying
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+                self._thread.start()
+
+    # --- DEMAND ---
+    def record_demand(self, ticker):
+        """A user picked `ticker`; the most picked ones are kept warm."""
+        with self._lock:
+            self.counts[ticker] += 1
+
+    def record_request(self, ticker):
+        """A user load of `ticker`'s series, whether the app's cache had it or not."""
+        with self._lock:
+            self.stats["requests"] += 1
+
+    def record_cold_load(self, ticker):
+        """One of those requests that had to wait on the network."""
+        with self._lock:
+            self.stats["cold_loads"] += 1
+
+    def snapshot(self):
+        """Counters plus `hit_rate`: the share of requests that never waited on Yahoo (None before any)."""
+        with self._lock:
+            self._expire_budget(time.time())
+            return {
+                **self.stats,
+                "hit_rate": None if self.stats["requests"] == 0 else 1 - self.stats["cold_loads"] / self.stats["requests"],
+                "budget_left": self.budget - len(self._spent),
+                "queued": len(self._queue),
+                "top": [t for t, _ in self.counts.most_common(self.top_k)],
+            }
+
+    # --- PREFETCH ---
+    def related(self, ticker, limit=RELATED_LIMIT):
+        """Tickers worth warming next to `ticker`: its underlying, siblings on it, then same strategy / issuer."""
+        with self._lock:
+            meta, funds = self.meta, self.funds_by_underlying
+        row = meta.get(ticker)
+        if row is None:
+            return []
+        picks = []
+        if row['Underlying'] != '-':
+            picks.append(row['Underlying'])
+            picks += funds.get(row['Underlying'], [])
+        for col in ('Strategy', 'Issuer'):
+            if row[col] != '-':
+                picks += [t for t, r in meta.items() if r[col] == row[col]]
+        picks = [t for t in dict.fromkeys(picks) if t != ticker]
+        return picks[:limit]
+
+    def prefetch(self, tickers):
+        """Queues tickers for the next background pass and wakes it."""
+        with self._lock:
+            for t in tickers:
+                self._queue[t] = None
+        self._wake.set()
+
+    # --- BACKGROUND LOOP ---
+    def _run(self):
+        while True:
+            try:
+                self.warm()
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+    def due(self):
+        """Queued prefetches, then top-K requested tickers and their underlyings, that need a refresh soon."""
+        with self._lock:
+            queued = list(self._queue)
+            self._queue.clear()
+            top = [t for t, _ in self.counts.most_common(self.top_k) if t in self.universe]
+            underlyings = [self.meta.get(t, {}).get('Underlying', '-') for t in top]
+        candidates = dict.fromkeys(queued + top + [u for u in underlyings if u != '-'])
+        horizon = self.store.refresh_ttl - LEAD_SECONDS
+        due = []
+        for t in candidates:
+            _, refreshed_at = self.store.status(t)
+            if refreshed_at is None or time.time() - refreshed_at >= horizon:
+                due.append(t)
+        return due
+
+    def warm(self):
+        """One pass: refreshes whatever is due, within the hourly budget. Returns the tickers refreshed."""
+        due = self.due()
+        with self._lock:
+            now = time.time()
+            self._expire_budget(now)
+            allowed = due[:max(0, self.budget - len(self._spent))]
+            self.stats["over_budget"] += len(due) - len(allowed)
+            self._spent.extend([now] * len(allowed))
+        if not allowed:
+            return []
+
+        def refresh(ticker):
+            try:
+                self.store.refresh(ticker, force=True)
+                return ticker
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            done = [t for t in pool.map(refresh, allowed) if t is not None]
+        with self._lock:
+            self.stats["warmed"] += len(done)
+        return done
+
+    def _expire_budget(self, now):
+        while self._spent and now - self._spent[0] > 3600:
+            self._spent.popleft()